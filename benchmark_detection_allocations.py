@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+偵測結果結構配置量比較工具
+以相同的偵測框序列，比較舊版（每幀建立 dict / tuple）與預先配置的 __slots__ 偵測框池
+（DetectionBuffer + PortraitTransform）在「偵測結果 → 追蹤框 → 顯示座標 → 偵測框圖層」路徑上
+每幀的記憶體配置量與耗時。
+
+CPython 沒有提供配置次數計數，配置量以 tracemalloc 量測每幀的暫時配置峰值（位元組）。
+
+用法:
+    python benchmark_detection_allocations.py
+    python benchmark_detection_allocations.py --frames 5000 --faces 3
+"""
+
+import sys
+import os
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.detections import DetectionBuffer, PortraitTransform
+
+FRAME_SHAPE = (1080, 1920, 3)
+DISPLAY_SIZE = (1080, 1920)
+
+
+def make_boxes(frames, max_faces, seed=0):
+    """產生每幀 1~max_faces 個偵測框 (x, y, w, h, 信心度)"""
+    rng = np.random.default_rng(seed)
+    sequence = []
+    for _ in range(frames):
+        count = int(rng.integers(1, max_faces + 1))
+        boxes = []
+        for _ in range(count):
+            w = float(rng.uniform(120, 360))
+            boxes.append((float(rng.uniform(300, 1500)), float(rng.uniform(100, 700)),
+                          w, w * 1.2, float(rng.uniform(0.6, 1.0))))
+        sequence.append(boxes)
+    return sequence
+
+
+def legacy_adjust(detection, original_shape, display_width, display_height):
+    """舊版 MainWindow.adjust_detection_coordinates（每框回傳新的 dict）"""
+    orig_h, orig_w = original_shape[:2]
+    required_width = int(orig_h * 9 / 16)
+    crop_x = (orig_w - required_width) // 2
+
+    if detection['x'] + detection['width'] < crop_x or detection['x'] > crop_x + required_width:
+        return None
+    adjusted_x = max(0, detection['x'] - crop_x)
+    adjusted_width = min(detection['width'], required_width - adjusted_x)
+    if adjusted_x + adjusted_width <= 0 or detection['y'] + detection['height'] <= 0:
+        return None
+
+    scale_x = 1080 / required_width * display_width / 1080
+    scale_y = 1920 / orig_h * display_height / 1920
+    return {
+        'x': adjusted_x * scale_x,
+        'y': detection['y'] * scale_y,
+        'width': adjusted_width * scale_x,
+        'height': detection['height'] * scale_y,
+        'confidence': detection.get('confidence', 0),
+        'track_id': detection.get('track_id')
+    }
+
+
+def legacy_frame(boxes):
+    """舊版：後端 dict 列表 → 追蹤框 dict → 顯示座標 dict → 圖層 tuple"""
+    frame_h, frame_w = FRAME_SHAPE[:2]
+    detections = []
+    for x, y, w, h, confidence in boxes:
+        x1, y1 = max(0, x), max(0, y)
+        x2, y2 = min(frame_w, x + w), min(frame_h, y + h)
+        detections.append({'x': x1, 'y': y1, 'width': x2 - x1, 'height': y2 - y1, 'confidence': confidence})
+
+    tracks = [dict(detection, track_id=index) for index, detection in enumerate(detections)]
+    visible = []
+    for track in tracks:
+        adjusted = legacy_adjust(track, FRAME_SHAPE, *DISPLAY_SIZE)
+        if adjusted:
+            visible.append((track, adjusted))
+
+    rects = [(int(b['x']), max(0, int(b['y']) - int(b['height'] * 0.2)), int(b['width']), int(b['height']))
+             for _, b in visible]
+    return len(rects)
+
+
+class TypedPipeline:
+    """新版：後端偵測框池 → 追蹤框池 → PortraitTransform → 圖層矩形（偵測框皆預先配置）"""
+
+    def __init__(self):
+        self.detections = DetectionBuffer()
+        self.track_boxes = DetectionBuffer()
+        self.transform = PortraitTransform()
+
+    def frame(self, boxes):
+        frame_h, frame_w = FRAME_SHAPE[:2]
+        detections = self.detections
+        detections.clear()
+        for index, (x, y, w, h, confidence) in enumerate(boxes):
+            x1, y1 = max(0, x), max(0, y)
+            detections.append(x1, y1, min(frame_w, x + w) - x1, min(frame_h, y + h) - y1, confidence, index)
+
+        self.track_boxes.assign(detections.view())
+        visible = self.transform.apply(self.track_boxes.view(), FRAME_SHAPE, *DISPLAY_SIZE)
+        rects = self.transform.overlay_rects(visible)
+        return len(rects)
+
+
+def measure(process, sequence):
+    """回傳 (每幀平均暫時配置峰值位元組, 最大值, 每幀微秒數)"""
+    # 暖機：讓延遲建立的快取不計入
+    for boxes in sequence[:50]:
+        process(boxes)
+
+    start = time.perf_counter()
+    for boxes in sequence:
+        process(boxes)
+    elapsed = time.perf_counter() - start
+
+    peaks = []
+    tracemalloc.start()
+    for boxes in sequence:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        process(boxes)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return float(np.mean(peaks)), int(np.max(peaks)), elapsed / len(sequence) * 1e6
+
+
+def main():
+    """主函數"""
+    parser = argparse.ArgumentParser(description="偵測結果結構配置量比較")
+    parser.add_argument('--frames', type=int, default=3000, help="模擬幀數")
+    parser.add_argument('--faces', type=int, default=3, help="每幀最多人臉數")
+    args = parser.parse_args()
+
+    sequence = make_boxes(args.frames, args.faces)
+    typed = TypedPipeline()
+
+    print("=" * 60)
+    print("偵測結果結構配置量比較")
+    print("=" * 60)
+    print(f"{args.frames} 幀，每幀 1~{args.faces} 張臉\n")
+
+    print(f"{'版本':<12}{'平均配置B':>12}{'最大配置B':>12}{'每幀µs':>10}")
+    for name, process in (('dict/tuple', legacy_frame), ('偵測框池', typed.frame)):
+        mean_peak, max_peak, us = measure(process, sequence)
+        print(f"{name:<12}{mean_peak:>12.0f}{max_peak:>12}{us:>10.1f}")
+
+    print("\n配置量為每幀處理期間 tracemalloc 量到的暫時配置峰值；")
+    print("偵測框池版本只剩圖層矩形 tuple 與浮點運算結果，偵測框本身不再每幀建立")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
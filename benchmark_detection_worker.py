@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+人臉偵測行程模式比較工具
+以相同畫面分別在主行程偵測與獨立行程偵測（detector_process）下執行 60 FPS 的介面計時器，
+比較每個介面幀的處理時間與計時器間隔的抖動。
+
+用法:
+    python benchmark_detection_worker.py replay.mp4
+    python benchmark_detection_worker.py replay.mp4 --seconds 15 --affinity 2;3
+"""
+
+import sys
+import os
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt6.QtWidgets import QApplication, QLabel
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QPixmap
+
+from core.camera_manager import CameraManager
+from core.face_detector import FaceDetector
+from utils.config_loader import ConfigLoader
+
+
+def load_frames(video_path, max_frames):
+    """讀取錄影畫面（未指定時產生雜訊畫面）"""
+    frames = []
+    if video_path:
+        cap = cv2.VideoCapture(video_path)
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+    if not frames:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (1080, 1920, 3), dtype=np.uint8) for _ in range(4)]
+    return frames
+
+
+def run_mode(app, frames, config, seconds):
+    """以介面計時器執行一種模式，回傳 (每幀處理毫秒數, 計時器間隔毫秒數, 偵測結果數)"""
+    detector = FaceDetector(config)
+    label = QLabel()
+    label.resize(540, 960)
+
+    work_ms = []
+    intervals = []
+    results = [0]
+    state = {'index': 0, 'last_tick': None}
+
+    def on_result(detected, bbox):
+        results[0] += 1
+
+    detector.face_detected.connect(on_result)
+
+    def tick():
+        now = time.perf_counter()
+        if state['last_tick'] is not None:
+            intervals.append((now - state['last_tick']) * 1000)
+        state['last_tick'] = now
+
+        frame = frames[state['index'] % len(frames)]
+        state['index'] += 1
+
+        # 與 MainWindow.process_frame 相同的主執行緒工作：偵測與畫面顯示
+        detector.process_frame(frame)
+        height, width = frame.shape[:2]
+        crop_width = int(height * 9 / 16)
+        crop_x = (width - crop_width) // 2
+        display = cv2.resize(frame[:, crop_x:crop_x + crop_width], (540, 960), interpolation=cv2.INTER_LINEAR)
+        label.setPixmap(QPixmap.fromImage(CameraManager.frame_to_qimage(display)))
+
+        work_ms.append((time.perf_counter() - now) * 1000)
+
+    # 偵測行程需要數秒載入模型，先等待再開始計時
+    warm_up = 8000 if detector.worker is not None else 500
+    timer = QTimer()
+    timer.setTimerType(Qt.TimerType.PreciseTimer)
+    timer.timeout.connect(tick)
+    QTimer.singleShot(warm_up, lambda: timer.start(16))
+    QTimer.singleShot(warm_up + int(seconds * 1000), app.quit)
+    app.exec()
+
+    timer.stop()
+    detector.release()
+    return work_ms, intervals, results[0]
+
+
+def main():
+    """主函數"""
+    parser = argparse.ArgumentParser(description="人臉偵測行程模式比較")
+    parser.add_argument('video', nargs='?', help="錄影檔路徑（未指定時使用雜訊畫面）")
+    parser.add_argument('--seconds', type=float, default=10.0, help="每種模式執行秒數")
+    parser.add_argument('--max-frames', type=int, default=30, help="載入並循環使用的畫面數")
+    parser.add_argument('--affinity', default=None, help="偵測行程的 CPU 編號（如 2;3）")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    frames = load_frames(args.video, args.max_frames)
+    config = ConfigLoader().load_period_config()
+    if args.affinity is not None:
+        config['detector_cpu_affinity'] = args.affinity
+
+    print("=" * 60)
+    print("人臉偵測行程模式比較")
+    print("=" * 60)
+    print(f"畫面: {len(frames)} 幀 {frames[0].shape[1]}x{frames[0].shape[0]}，每種模式 {args.seconds:.0f} 秒")
+
+    rows = []
+    for name, process_mode in (('主行程', 0), ('獨立行程', 1)):
+        print(f"\n執行 {name}偵測...")
+        mode_config = dict(config)
+        mode_config['detector_process'] = process_mode
+        work_ms, intervals, results = run_mode(app, frames, mode_config, args.seconds)
+        rows.append((name, work_ms, intervals, results))
+
+    print()
+    print(f"{'模式':<10}{'p50ms':>8}{'p90ms':>8}{'p99ms':>8}{'間隔p99':>10}{'FPS':>8}{'結果數':>8}")
+    for name, work_ms, intervals, results in rows:
+        if not work_ms:
+            print(f"{name:<10}（沒有資料）")
+            continue
+        p50, p90, p99 = np.percentile(work_ms, [50, 90, 99])
+        interval_p99 = np.percentile(intervals, 99) if intervals else 0.0
+        fps = 1000 / np.mean(intervals) if intervals else 0.0
+        print(f"{name:<10}{p50:>8.1f}{p90:>8.1f}{p99:>8.1f}{interval_p99:>10.1f}{fps:>8.1f}{results:>8}")
+
+    print("\n每幀處理時間為介面執行緒上偵測 + 畫面顯示的耗時；間隔 p99 反映介面卡頓")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
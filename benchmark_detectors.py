@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+人臉偵測後端比較工具
+以同一段錄影依序執行各個偵測後端，輸出延遲百分位數、相對參考後端的召回率，
+以及模擬停留觸發（detect_duration）的時間差。
+
+用法:
+    python benchmark_detectors.py replay.mp4
+    python benchmark_detectors.py replay.mp4 --backends mediapipe_short,yunet --reference mediapipe_full
+"""
+
+import sys
+import os
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.detector_backends import BACKENDS, create_backend
+from core.face_tracker import FaceTracker
+from utils.config_loader import ConfigLoader
+
+
+def run_backend(backend, video_path, max_frames):
+    """以後端處理整段錄影，回傳 (每幀偵測框, 每幀毫秒數, fps)"""
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    boxes = []
+    latencies = []
+
+    while max_frames <= 0 or len(boxes) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        start = time.perf_counter()
+        detections = [d.copy() for d in backend.detect(frame)]  # 偵測結果為後端偵測框池的視圖，保留需複製
+        latencies.append((time.perf_counter() - start) * 1000)
+        boxes.append(detections)
+
+    cap.release()
+    return boxes, latencies, fps
+
+
+def iou(a, b):
+    """兩個偵測框的 IoU"""
+    inter_w = min(a.x + a.width, b.x + b.width) - max(a.x, b.x)
+    inter_h = min(a.y + a.height, b.y + b.height) - max(a.y, b.y)
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    inter = inter_w * inter_h
+    return inter / (a.width * a.height + b.width * b.height - inter)
+
+
+def match_counts(predicted, reference, threshold):
+    """逐幀貪婪配對，回傳 (配對數, 參考框總數, 偵測框總數)"""
+    matched = total_reference = total_predicted = 0
+    for frame_pred, frame_ref in zip(predicted, reference):
+        total_reference += len(frame_ref)
+        total_predicted += len(frame_pred)
+        pairs = sorted(((iou(p, r), i, j) for i, p in enumerate(frame_pred)
+                        for j, r in enumerate(frame_ref)), reverse=True)
+        used_pred, used_ref = set(), set()
+        for score, i, j in pairs:
+            if score < threshold:
+                break
+            if i in used_pred or j in used_ref:
+                continue
+            used_pred.add(i)
+            used_ref.add(j)
+            matched += 1
+    return matched, total_reference, total_predicted
+
+
+def trigger_time(boxes, fps, detect_duration, max_age):
+    """模擬停留觸發：任一身分連續出現 detect_duration 秒的時間點（秒），未觸發為 None"""
+    tracker = FaceTracker(max_age=max_age)
+    for index, detections in enumerate(boxes):
+        timestamp = index / fps
+        for track in tracker.update(detections, timestamp):
+            if track.dwell >= detect_duration:
+                return timestamp
+    return None
+
+
+def main():
+    """主函數"""
+    parser = argparse.ArgumentParser(description="人臉偵測後端比較")
+    parser.add_argument('video', help="錄影檔路徑")
+    parser.add_argument('--backends', default=','.join(BACKENDS),
+                        help="要比較的後端（逗號分隔）")
+    parser.add_argument('--reference', default='mediapipe_full', help="作為基準的後端")
+    parser.add_argument('--max-frames', type=int, default=0, help="最多處理幾幀（0 為全部）")
+    parser.add_argument('--iou', type=float, default=0.5, help="配對所需的 IoU")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.video):
+        print(f"找不到錄影檔: {args.video}")
+        return 1
+
+    config = ConfigLoader().load_period_config()
+    detect_duration = float(config.get('detect_duration', 3.0))
+    max_age = float(config.get('track_max_age', 0.5))
+
+    names = [name.strip() for name in args.backends.split(',') if name.strip()]
+    if args.reference not in names:
+        names.insert(0, args.reference)
+
+    print("=" * 60)
+    print("人臉偵測後端比較")
+    print("=" * 60)
+
+    results = {}
+    for name in names:
+        backend = create_backend(name, config, fallback=False)
+        if backend is None:
+            print(f"略過 {name}（無法使用）")
+            continue
+        print(f"執行 {name}...")
+        boxes, latencies, fps = run_backend(backend, args.video, args.max_frames)
+        backend.close()
+        results[name] = (boxes, latencies, fps)
+
+    if args.reference not in results:
+        print(f"基準後端 {args.reference} 無法使用，無法計算召回率")
+        reference_boxes = None
+        reference_trigger = None
+    else:
+        reference_boxes, _, fps = results[args.reference]
+        reference_trigger = trigger_time(reference_boxes, fps, detect_duration, max_age)
+
+    print()
+    print(f"{'後端':<18}{'p50ms':>8}{'p90ms':>8}{'p99ms':>8}{'召回率':>8}{'精確率':>8}{'觸發秒':>8}{'差異秒':>8}")
+    for name, (boxes, latencies, fps) in results.items():
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) if latencies else (0, 0, 0)
+
+        recall = precision = '-'
+        if reference_boxes is not None:
+            matched, total_reference, total_predicted = match_counts(boxes, reference_boxes, args.iou)
+            recall = f"{matched / total_reference:.2f}" if total_reference else '-'
+            precision = f"{matched / total_predicted:.2f}" if total_predicted else '-'
+
+        trigger = trigger_time(boxes, fps, detect_duration, max_age)
+        trigger_text = f"{trigger:.2f}" if trigger is not None else '-'
+        delta_text = '-'
+        if trigger is not None and reference_trigger is not None:
+            delta_text = f"{trigger - reference_trigger:+.2f}"
+
+        print(f"{name:<18}{p50:>8.1f}{p90:>8.1f}{p99:>8.1f}{recall:>8}{precision:>8}"
+              f"{trigger_text:>8}{delta_text:>8}")
+
+    print(f"\n基準: {args.reference}，IoU ≥ {args.iou}，停留觸發 {detect_duration:.1f} 秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,14 +4,19 @@
 from .state_machine import StateMachine, SystemState
 from .camera_manager import CameraManager
 from .face_detector import FaceDetector
+from .frame_pipeline import FramePipeline
 from .arduino_controller import ArduinoController
 from .ssr_controller import SSRController
+from .cancellation import CancellationToken, CycleCancelled
 
 __all__ = [
     'StateMachine',
     'SystemState', 
     'CameraManager',
     'FaceDetector',
+    'FramePipeline',
     'ArduinoController',
-    'SSRController'
+    'SSRController',
+    'CancellationToken',
+    'CycleCancelled'
 ]
\ No newline at end of file
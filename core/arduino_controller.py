@@ -22,6 +22,9 @@ class ArduinoThread(QThread):
         self.command_queue = []
         self.is_running = False
         
+        # 指令世代：取消時遞增，舊世代的指令會被略過或提早結束
+        self.generation = 0
+        
     def run(self):
         """執行緒主迴圈"""
         try:
@@ -38,6 +41,10 @@ class ArduinoThread(QThread):
                 if self.command_queue:
                     cmd = self.command_queue.pop(0)
                     
+                    # 略過已取消的指令
+                    if cmd.get('generation', self.generation) != self.generation:
+                        continue
+                    
                     # 檢查指令類型
                     if cmd.get('type') == 'pin_state':
                         self._execute_pin_state_command(cmd)
@@ -71,17 +78,20 @@ class ArduinoThread(QThread):
         high_time = cmd.get('high_time', 1000)
         wait_after = cmd.get('wait_after', 0)
         
+        generation = cmd.get('generation', self.generation)
+        
         # 前延遲
         if wait_before > 0:
-            time.sleep(wait_before / 1000.0)
+            if not self._sleep_unless_cancelled(wait_before, generation):
+                return
             
         # 設為 HIGH
         self._send_command(f"H{pin}")
         self.status_changed.emit(f"Pin {pin} -> HIGH")
         self.pin_state_changed.emit(pin, "HIGH")
         
-        # 維持 HIGH
-        time.sleep(high_time / 1000.0)
+        # 維持 HIGH（取消時提早結束，但一定會設回 LOW）
+        self._sleep_unless_cancelled(high_time, generation)
         
         # 設回 LOW
         self._send_command(f"L{pin}")
@@ -90,7 +100,20 @@ class ArduinoThread(QThread):
         
         # 後延遲
         if wait_after > 0:
-            time.sleep(wait_after / 1000.0)
+            self._sleep_unless_cancelled(wait_after, generation)
+            
+    def _sleep_unless_cancelled(self, duration_ms, generation):
+        """分段休眠，指令被取消時提早返回 False"""
+        end_time = time.time() + duration_ms / 1000.0
+        while time.time() < end_time:
+            if generation != self.generation or not self.is_running:
+                return False
+            time.sleep(min(0.01, max(0.0, end_time - time.time())))
+        return generation == self.generation
+        
+    def cancel_pending(self):
+        """取消所有排隊中與執行中的腳位脈衝指令"""
+        self.generation += 1
             
     def add_command(self, pin, wait_before=0, high_time=1000, wait_after=0):
         """新增控制指令"""
@@ -98,7 +121,8 @@ class ArduinoThread(QThread):
             'pin': pin,
             'wait_before': wait_before,
             'high_time': high_time,
-            'wait_after': wait_after
+            'wait_after': wait_after,
+            'generation': self.generation
         })
         
     def add_pin_state_command(self, pin, state, wait_before=0):
@@ -193,6 +217,11 @@ class ArduinoController(QObject):
             
         self.arduino_thread.add_command(pin, wait_before, high_time, wait_after)
         
+    def cancel_pending(self):
+        """取消尚未完成的腳位控制指令"""
+        if self.arduino_thread:
+            self.arduino_thread.cancel_pending()
+            
     def set_pin_state(self, pin, state, wait_before=0):
         """直接設置Pin狀態（不自動切換）"""
         if not self.is_connected or not self.arduino_thread:
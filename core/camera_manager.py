@@ -6,6 +6,7 @@ import numpy as np
 from PyQt6.QtCore import QObject, QThread, pyqtSignal
 from PyQt6.QtGui import QImage
 import os
+import threading
 from datetime import datetime
 
 
@@ -14,18 +15,27 @@ class CameraThread(QThread):
     frame_ready = pyqtSignal(np.ndarray)
     error_occurred = pyqtSignal(str)
     
-    def __init__(self, camera_index=0):
+    FULL_CAPTURE = (1920, 1080, 60)  # (寬, 高, FPS)
+    
+    def __init__(self, camera_index=0, idle_capture=(640, 360, 10)):
         super().__init__()
-        self.camera_index = camera_index
+        self.camera_index = camera_index  # 相機編號，或錄影檔路徑（重播，播完自動從頭開始）
+        self.is_replay = isinstance(camera_index, str)
         self.is_running = False
         self.cap = None
         
+        # 省電模式：降低擷取解析度與幀率（由主執行緒要求，於擷取迴圈中套用）
+        self.idle_capture = idle_capture
+        self.low_power = False
+        self.requested_low_power = False
+        self.mode_changed = threading.Event()  # 讓省電模式的等待可被立即喚醒
+        
     def run(self):
         """執行緒主迴圈"""
         try:
             # 使用 CAP_DSHOW 在 Windows 上可以加快相機開啟速度
             import platform
-            if platform.system() == "Windows":
+            if platform.system() == "Windows" and not self.is_replay:
                 self.cap = cv2.VideoCapture(self.camera_index, cv2.CAP_DSHOW)
             else:
                 self.cap = cv2.VideoCapture(self.camera_index)
@@ -34,9 +44,7 @@ class CameraThread(QThread):
             self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
             
             # 設定相機參數
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
-            self.cap.set(cv2.CAP_PROP_FPS, 60)
+            self._apply_capture_mode(False)
             
             if not self.cap.isOpened():
                 self.error_occurred.emit("無法開啟相機")
@@ -49,17 +57,27 @@ class CameraThread(QThread):
                 self.cap.read()
             
             while self.is_running:
+                if self.requested_low_power != self.low_power:
+                    self._apply_capture_mode(self.requested_low_power)
+                    
                 ret, frame = self.cap.read()
                 if ret:
                     # 不做裁切，保持原始比例
                     # 在顯示時再進行適當的縮放
                     self.frame_ready.emit(frame)
+                elif self.is_replay and self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0):
+                    continue
                 else:
                     self.error_occurred.emit("讀取畫面失敗")
                     break
                     
-                # 減少延遲，提高 FPS
-                self.msleep(16)  # ~60 FPS
+                if self.low_power:
+                    # 省電模式：以低幀率等待，恢復全速的要求會立即喚醒
+                    self.mode_changed.wait(1.0 / self.idle_capture[2])
+                    self.mode_changed.clear()
+                else:
+                    # 減少延遲，提高 FPS
+                    self.msleep(16)  # ~60 FPS
                 
         except Exception as e:
             self.error_occurred.emit(f"相機錯誤: {str(e)}")
@@ -67,9 +85,23 @@ class CameraThread(QThread):
             if self.cap:
                 self.cap.release()
                 
+    def _apply_capture_mode(self, low_power):
+        """設定擷取解析度與幀率"""
+        width, height, fps = self.idle_capture if low_power else self.FULL_CAPTURE
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.cap.set(cv2.CAP_PROP_FPS, fps)
+        self.low_power = low_power
+        
+    def set_low_power(self, enabled):
+        """要求切換省電模式（可由其他執行緒呼叫）"""
+        self.requested_low_power = enabled
+        self.mode_changed.set()
+        
     def stop(self):
         """停止執行緒"""
         self.is_running = False
+        self.mode_changed.set()
         self.wait()
 
 
@@ -79,24 +111,25 @@ class CameraManager(QObject):
     screenshot_saved = pyqtSignal(str)
     error_occurred = pyqtSignal(str)
     
-    def __init__(self):
+    def __init__(self, idle_capture=(640, 360, 10)):
         super().__init__()
         self.camera_thread = None
         self.current_frame = None
         self.camera_index = 0
+        self.idle_capture = idle_capture
         
         # 確保截圖目錄存在
         self.screenshot_dir = "webcam-shots"
         os.makedirs(self.screenshot_dir, exist_ok=True)
         
     def start(self, camera_index=0):
-        """啟動相機"""
+        """啟動相機（camera_index 為錄影檔路徑時重播該錄影）"""
         self.camera_index = camera_index
         
         if self.camera_thread and self.camera_thread.isRunning():
             self.stop()
             
-        self.camera_thread = CameraThread(camera_index)
+        self.camera_thread = CameraThread(camera_index, self.idle_capture)
         self.camera_thread.frame_ready.connect(self._on_frame_ready)
         self.camera_thread.error_occurred.connect(self.error_occurred.emit)
         self.camera_thread.start()
@@ -107,14 +140,21 @@ class CameraManager(QObject):
             self.camera_thread.stop()
             self.camera_thread = None
             
+    def set_low_power(self, enabled):
+        """切換省電擷取模式（低解析度、低幀率）"""
+        if self.camera_thread:
+            self.camera_thread.set_low_power(enabled)
+            
     def _on_frame_ready(self, frame):
         """處理新畫面"""
         self.current_frame = frame.copy()
         self.frame_ready.emit(frame)
         
-    def take_screenshot(self):
-        """擷取當前畫面"""
-        if self.current_frame is None:
+    def take_screenshot(self, frame=None):
+        """擷取畫面（未指定 frame 時使用當前畫面）"""
+        if frame is None:
+            frame = self.current_frame
+        if frame is None:
             self.error_occurred.emit("無可用畫面")
             return None
             
@@ -124,7 +164,7 @@ class CameraManager(QObject):
         filepath = os.path.join(self.screenshot_dir, filename)
         
         # 儲存圖片
-        cv2.imwrite(filepath, self.current_frame)
+        cv2.imwrite(filepath, frame)
         self.screenshot_saved.emit(filepath)
         
         return filepath
@@ -0,0 +1,62 @@
+# Location: project_v2/core/cancellation.py
+# Usage: 取消權杖，用於中止單一偵測週期內尚未完成的工作
+
+import threading
+
+
+class CycleCancelled(Exception):
+    """週期已被取消時由工作執行緒拋出"""
+    pass
+
+
+class CancellationToken:
+    """週期取消權杖
+
+    由狀態機在每次觸發截圖時建立，傳遞給 AI 分析、TTS 與武器展示流程。
+    可跨執行緒查詢；取消時會依序呼叫已註冊的回呼（在呼叫 cancel 的執行緒中執行）。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self.reason = ""
+
+    @property
+    def is_cancelled(self):
+        """是否已取消"""
+        return self._event.is_set()
+
+    def cancel(self, reason=""):
+        """取消週期並觸發所有回呼"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks = self._callbacks
+            self._callbacks = []
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"取消回呼執行失敗: {e}")
+
+    def add_callback(self, callback):
+        """註冊取消回呼，若已取消則立即執行"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+
+        callback()
+
+    def raise_if_cancelled(self):
+        """若已取消則拋出 CycleCancelled"""
+        if self._event.is_set():
+            raise CycleCancelled(self.reason)
+
+    def wait(self, timeout):
+        """等待指定秒數，若期間被取消則提早返回 True"""
+        return self._event.wait(timeout)
@@ -0,0 +1,305 @@
+# Location: project_v2/core/detection_worker.py
+# Usage: 獨立行程的人臉偵測：畫面經 shared_memory 環狀緩衝傳入（不經 pickle），結果以固定格式結構傳回
+
+import os
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from .detections import MAX_FACES, DetectionBuffer
+
+# 控制區：最新畫面序號、最新結果序號、執行旗標、後端狀態（0 初始化中 / 1 就緒 / -1 失敗）
+CONTROL_DTYPE = np.dtype([
+    ('frame_seq', '<i8'),
+    ('result_seq', '<i8'),
+    ('running', '<i8'),
+    ('ready', '<i8')
+])
+
+# 每個畫面槽的標頭（seq_begin / seq_end 為序號鎖：寫入前後各寫一次，讀取端比對兩者判斷是否被覆寫）
+SLOT_DTYPE = np.dtype([
+    ('seq_begin', '<i8'),
+    ('seq_end', '<i8'),
+    ('height', '<i4'),
+    ('width', '<i4'),
+    ('scale', '<f8'),  # 畫面超過槽大小時的縮小比例
+    ('timestamp', '<f8')
+])
+
+# 共享記憶體中的偵測框：原始畫面座標（左上角、寬高），track_id 未追蹤時為 -1
+DETECTION_DTYPE = np.dtype([
+    ('x', '<f4'),
+    ('y', '<f4'),
+    ('width', '<f4'),
+    ('height', '<f4'),
+    ('confidence', '<f4'),
+    ('track_id', '<i4')
+])
+
+# 偵測結果：boxes 為 DETECTION_DTYPE 記錄
+RESULT_DTYPE = np.dtype([
+    ('seq_begin', '<i8'),
+    ('seq_end', '<i8'),
+    ('frame_seq', '<i8'),
+    ('timestamp', '<f8'),
+    ('height', '<i4'),
+    ('width', '<i4'),
+    ('detect_ms', '<f4'),
+    ('count', '<i4'),
+    ('boxes', DETECTION_DTYPE, (MAX_FACES,))
+])
+
+
+def _align(offset, alignment=64):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+class SharedFrameRing:
+    """單一寫入者、單一讀取者的共享記憶體環狀緩衝（畫面與偵測結果）
+
+    兩端都不取鎖：寫入端先寫槽標頭的 seq_begin、再寫內容、最後寫 seq_end 與控制區序號；
+    讀取端讀完後確認 seq_begin 未改變，否則丟棄（代表讀取中被覆寫）。
+    """
+
+    def __init__(self, name=None, slots=4, results=4, max_width=1920, max_height=1080):
+        self.slots = slots
+        self.results = results
+        self.slot_bytes = max_width * max_height * 3
+
+        self.control_offset = 0
+        self.slot_offset = _align(CONTROL_DTYPE.itemsize)
+        self.result_offset = _align(self.slot_offset + SLOT_DTYPE.itemsize * slots)
+        self.frame_offset = _align(self.result_offset + RESULT_DTYPE.itemsize * results)
+        size = self.frame_offset + self.slot_bytes * slots
+
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+        buf = self.shm.buf
+        self.control = np.ndarray((), CONTROL_DTYPE, buf, self.control_offset)
+        self.headers = np.ndarray((slots,), SLOT_DTYPE, buf, self.slot_offset)
+        self.result_records = np.ndarray((results,), RESULT_DTYPE, buf, self.result_offset)
+        self.frames = np.ndarray((slots, self.slot_bytes), np.uint8, buf, self.frame_offset)
+        if self.owner:
+            self.control[()] = (0, 0, 1, 0)
+            self.headers[:] = np.zeros(slots, SLOT_DTYPE)
+            self.result_records[:] = np.zeros(results, RESULT_DTYPE)
+
+    # ---- 畫面（主行程寫入，偵測行程讀取） ----
+
+    def write_frame(self, frame, timestamp):
+        """寫入一幀並發布其序號"""
+        height, width = frame.shape[:2]
+        scale = 1.0
+        if height * width * 3 > self.slot_bytes:
+            scale = (self.slot_bytes / (height * width * 3)) ** 0.5
+            width, height = int(width * scale), int(height * scale)
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+        seq = int(self.control['frame_seq']) + 1
+        header = self.headers[seq % self.slots]
+        header['seq_begin'] = seq
+        self.frames[seq % self.slots, :height * width * 3].reshape(height, width, 3)[...] = frame
+        header['height'] = height
+        header['width'] = width
+        header['scale'] = scale
+        header['timestamp'] = timestamp
+        header['seq_end'] = seq
+        self.control['frame_seq'] = seq
+        return seq
+
+    def latest_frame(self):
+        """最新一幀 (序號, 畫面視圖, 縮小比例, 時間)；尚未寫完時為 None（視圖僅在 frame_intact 為真時有效）"""
+        seq = int(self.control['frame_seq'])
+        if seq == 0:
+            return None
+        header = self.headers[seq % self.slots]
+        if int(header['seq_end']) != seq:
+            return None
+        height, width = int(header['height']), int(header['width'])
+        view = self.frames[seq % self.slots, :height * width * 3].reshape(height, width, 3)
+        return seq, view, float(header['scale']), float(header['timestamp'])
+
+    def frame_intact(self, seq):
+        """讀取期間該槽是否未被覆寫"""
+        return int(self.headers[seq % self.slots]['seq_begin']) == seq
+
+    # ---- 結果（偵測行程寫入，主行程讀取） ----
+
+    def write_result(self, frame_seq, timestamp, shape, scale, detections, detect_ms):
+        """寫入偵測結果並發布"""
+        seq = int(self.control['result_seq']) + 1
+        record = self.result_records[seq % self.results]
+        record['seq_begin'] = seq
+        count = min(len(detections), MAX_FACES)
+        boxes = record['boxes']
+        for index in range(count):
+            d = detections[index]
+            boxes[index] = (d.x / scale, d.y / scale, d.width / scale, d.height / scale,
+                            d.confidence, d.track_id)
+        record['frame_seq'] = frame_seq
+        record['timestamp'] = timestamp
+        record['height'] = int(shape[0] / scale)
+        record['width'] = int(shape[1] / scale)
+        record['detect_ms'] = detect_ms
+        record['count'] = count
+        record['seq_end'] = seq
+        self.control['result_seq'] = seq
+        return seq
+
+    def read_result(self, after_seq):
+        """讀取比 after_seq 新的最新結果（複本）；沒有新結果或讀取中被覆寫時為 None"""
+        seq = int(self.control['result_seq'])
+        if seq <= after_seq:
+            return None
+        record = self.result_records[seq % self.results]
+        if int(record['seq_end']) != seq:
+            return None
+        result = record.copy()
+        if int(record['seq_begin']) != seq:
+            return None
+        return seq, result
+
+    def close(self):
+        """釋放共享記憶體（建立者同時刪除）"""
+        # 先釋放所有 numpy 視圖，SharedMemory 才能關閉
+        self.control = self.headers = self.result_records = self.frames = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def set_cpu_affinity(pid, cpus):
+    """設定行程的 CPU 親和性（Linux 使用 os.sched_setaffinity，其餘平台需 psutil；macOS 不支援）"""
+    if not cpus:
+        return False
+    try:
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(pid, cpus)
+        else:
+            import psutil
+            psutil.Process(pid).cpu_affinity(list(cpus))
+    except ImportError:
+        print("設定 CPU 親和性需要 psutil")
+        return False
+    except (AttributeError, OSError, ValueError) as e:
+        print(f"無法設定 CPU 親和性 {sorted(cpus)}: {e}")
+        return False
+    print(f"偵測行程 CPU 親和性: {sorted(cpus)}")
+    return True
+
+
+def parse_cpu_list(value):
+    """解析 '2,3' 形式的 CPU 清單"""
+    cpus = set()
+    for part in str(value).replace(';', ',').split(','):
+        part = part.strip()
+        if part:
+            try:
+                cpus.add(int(float(part)))
+            except ValueError:
+                print(f"忽略無效的 CPU 編號: {part}")
+    return cpus
+
+
+def _worker_main(ring_name, backend_name, config, slots, results):
+    """偵測行程主迴圈"""
+    # 延遲匯入：只在偵測行程載入偵測模型
+    from .detector_backends import create_backend
+
+    ring = SharedFrameRing(ring_name, slots=slots, results=results)
+    backend = create_backend(backend_name, config)
+    if backend is None:
+        ring.control['ready'] = -1
+        ring.close()
+        return
+    ring.control['ready'] = 1
+
+    last_seq = 0
+    idle_sleep = 0.001
+    try:
+        while ring.control['running']:
+            latest = ring.latest_frame()
+            if latest is None or latest[0] == last_seq:
+                # 沒有新畫面（例如偵測階段暫停）時逐步拉長輪詢間隔
+                time.sleep(idle_sleep)
+                idle_sleep = min(idle_sleep * 2, 0.01)
+                continue
+            idle_sleep = 0.001
+
+            seq, frame, scale, timestamp = latest
+            start = time.perf_counter()
+            detections = backend.detect(frame)
+            detect_ms = (time.perf_counter() - start) * 1000
+            if not ring.frame_intact(seq):
+                continue  # 偵測期間畫面被覆寫，改偵測最新一幀
+
+            last_seq = seq
+            ring.write_result(seq, timestamp, frame.shape, scale, detections, detect_ms)
+    finally:
+        backend.close()
+        ring.close()
+
+
+class DetectionWorker:
+    """偵測行程的主行程端：送出畫面、取回結果，兩者皆不阻塞"""
+
+    def __init__(self, backend_name, config, cpus=None, slots=4, results=4):
+        self.ring = SharedFrameRing(slots=slots, results=results)
+        self.last_result_seq = 0
+        self.results = DetectionBuffer()
+
+        # spawn：不複製主行程的 Qt 狀態
+        context = mp.get_context('spawn')
+        self.process = context.Process(
+            target=_worker_main,
+            args=(self.ring.name, backend_name, dict(config), slots, results),
+            name='FaceDetectionWorker',
+            daemon=True
+        )
+        self.process.start()
+        set_cpu_affinity(self.process.pid, cpus)
+        print(f"人臉偵測行程已啟動 (pid {self.process.pid})")
+
+    def is_failed(self):
+        """偵測行程無法建立後端或已結束"""
+        return self.ring.control['ready'] == -1 or not self.process.is_alive()
+
+    def submit(self, frame, timestamp):
+        """送出一幀（只複製到共享記憶體）"""
+        return self.ring.write_frame(frame, timestamp)
+
+    def poll(self):
+        """取回新的偵測結果：(偵測框記錄, 畫面時間, 畫面 (高, 寬), 偵測毫秒數)；沒有新結果時為 None
+
+        偵測框為自有偵測框池的視圖，下一次 poll() 時覆寫。
+        """
+        latest = self.ring.read_result(self.last_result_seq)
+        if latest is None:
+            return None
+        self.last_result_seq, record = latest
+        self.results.clear()
+        for box in record['boxes'][:int(record['count'])].tolist():
+            self.results.append(*box)
+        return (self.results.view(), float(record['timestamp']),
+                (int(record['height']), int(record['width'])), float(record['detect_ms']))
+
+    def close(self):
+        """停止偵測行程並釋放共享記憶體"""
+        if self.ring.control is not None:
+            self.ring.control['running'] = 0
+        self.process.join(timeout=2.0)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=1.0)
+        self.ring.close()
@@ -0,0 +1,136 @@
+# Location: project_v2/core/detections.py
+# Usage: 偵測結果的固定格式結構：__slots__ 偵測框與預先配置、每幀重複使用的偵測框池，及一次換算所有人臉的直式座標轉換
+
+
+MAX_FACES = 8
+
+
+class Detection:
+    """單一偵測框：左上角座標與寬高，track_id 未追蹤時為 -1"""
+
+    __slots__ = ('x', 'y', 'width', 'height', 'confidence', 'track_id')
+
+    def __init__(self, x=0.0, y=0.0, width=0.0, height=0.0, confidence=0.0, track_id=-1):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.confidence = confidence
+        self.track_id = track_id
+
+    def set(self, x, y, width, height, confidence, track_id=-1):
+        """覆寫所有欄位"""
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.confidence = confidence
+        self.track_id = track_id
+
+    def copy(self):
+        """獨立的複本（需保留到下一幀之後時使用）"""
+        return Detection(self.x, self.y, self.width, self.height, self.confidence, self.track_id)
+
+    def __repr__(self):
+        return (f"Detection(x={self.x:.1f}, y={self.y:.1f}, width={self.width:.1f}, "
+                f"height={self.height:.1f}, confidence={self.confidence:.2f}, track_id={self.track_id})")
+
+
+class DetectionBuffer:
+    """預先配置的偵測框池
+
+    容量內的 Detection 只建立一次，每幀以 clear() / append() 覆寫；
+    view() 回傳預先建立的前綴 tuple，不產生新物件。
+    視圖在下一次寫入前有效；需保留到之後的結果請用 copy()。
+    """
+
+    __slots__ = ('items', 'count', '_views')
+
+    def __init__(self, capacity=MAX_FACES):
+        self.items = tuple(Detection() for _ in range(capacity))
+        self.count = 0
+        self._views = tuple(self.items[:n] for n in range(capacity + 1))
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def append(self, x, y, width, height, confidence, track_id=-1):
+        """加入一筆偵測框；超過容量時忽略（回傳 False）"""
+        count = self.count
+        if count >= len(self.items):
+            return False
+        detection = self.items[count]
+        detection.x = x
+        detection.y = y
+        detection.width = width
+        detection.height = height
+        detection.confidence = confidence
+        detection.track_id = track_id
+        self.count = count + 1
+        return True
+
+    def assign(self, detections):
+        """以另一組偵測框覆寫內容"""
+        self.count = 0
+        for detection in detections:
+            if not self.append(detection.x, detection.y, detection.width, detection.height,
+                               detection.confidence, detection.track_id):
+                break
+
+    def view(self):
+        """有效部分（不複製）"""
+        return self._views[self.count]
+
+    def copy(self):
+        """有效部分的複本"""
+        return [detection.copy() for detection in self.view()]
+
+
+class PortraitTransform:
+    """原始畫面座標 → 直式顯示座標
+
+    與畫面顯示相同：取畫面中間 9:16 的範圍，再縮放到顯示尺寸；
+    一次換算所有偵測框，結果寫入預先配置的偵測框池，完全在裁切範圍外的框會被排除。
+    """
+
+    __slots__ = ('output', 'source_index')
+
+    def __init__(self, capacity=MAX_FACES):
+        self.output = DetectionBuffer(capacity)
+        self.source_index = [0] * capacity  # output 每一筆對應的輸入索引
+
+    def apply(self, boxes, frame_shape, display_width, display_height):
+        """換算 boxes，回傳可見的偵測框（output 的視圖，順序與輸入相同）"""
+        frame_h, frame_w = frame_shape[:2]
+        crop_width = int(frame_h * 9 / 16)
+        crop_x = (frame_w - crop_width) // 2
+        crop_right = crop_x + crop_width
+        scale_x = display_width / crop_width
+        scale_y = display_height / frame_h
+
+        output = self.output
+        output.clear()
+        for index, box in enumerate(boxes):
+            # 可見：與裁切範圍有重疊（以裁切前的座標判斷）
+            if box.x + box.width < crop_x or box.x > crop_right or box.y + box.height <= 0:
+                continue
+
+            # 裁切：左緣限制在裁切範圍內，寬度不超出右緣，再縮放到顯示尺寸
+            x = max(0, box.x - crop_x)
+            width = min(box.width, crop_width - x)
+            if x + width <= 0:
+                continue
+            self.source_index[output.count] = index
+            if not output.append(x * scale_x, box.y * scale_y, width * scale_x, box.height * scale_y,
+                                 box.confidence, box.track_id):
+                break
+        return output.view()
+
+    @staticmethod
+    def overlay_rects(boxes, lift_ratio=0.2):
+        """偵測框圖層的矩形：整數 (x, y, w, h)，並將框上移約框高的 lift_ratio（不超出畫面頂端）"""
+        return [(int(box.x), max(0, int(box.y) - int(box.height * lift_ratio)), int(box.width), int(box.height))
+                for box in boxes]
@@ -0,0 +1,201 @@
+# Location: project_v2/core/detector_backends.py
+# Usage: 可替換的人臉偵測後端（MediaPipe 近距 / 遠距、OpenCV YuNet、Haar cascade）
+
+import os
+import cv2
+
+from .detections import DetectionBuffer
+
+
+class DetectorBackend:
+    """人臉偵測後端介面
+
+    子類別實作 is_available() 與 detect()；detect() 回傳原始畫面座標的偵測框
+    （Detection 序列，為後端自有偵測框池的視圖，下一次 detect() 時覆寫）。
+    """
+
+    name = 'base'
+
+    def __init__(self, config):
+        self.config = config
+        self.confidence = config.get('detection_sensitivity', 0.5)
+        self.results = DetectionBuffer()
+
+    def is_available(self):
+        """後端所需的套件或模型檔是否存在（並完成初始化）"""
+        return False
+
+    def detect(self, frame):
+        """偵測畫面中的所有人臉"""
+        raise NotImplementedError
+
+    def close(self):
+        """釋放資源"""
+        pass
+
+    def _add_box(self, x, y, width, height, confidence, frame_shape):
+        """將框限制在畫面範圍內後加入結果"""
+        h, w = frame_shape[:2]
+        x = max(0, min(int(x), w - 1))
+        y = max(0, min(int(y), h - 1))
+        width = min(int(width), w - x)
+        height = min(int(height), h - y)
+        if width > 0 and height > 0:
+            self.results.append(x, y, width, height, float(confidence))
+
+
+class MediaPipeBackend(DetectorBackend):
+    """MediaPipe 人臉偵測（model_selection 0：2 公尺內，1：5 公尺內）"""
+
+    name = 'mediapipe_short'
+    model_selection = 0
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.face_detection = None
+
+    def is_available(self):
+        try:
+            import mediapipe as mp
+            self.face_detection = mp.solutions.face_detection.FaceDetection(
+                model_selection=self.model_selection,
+                min_detection_confidence=self.confidence
+            )
+        except Exception as e:
+            print(f"Failed to initialize MediaPipe face detection: {e}")
+            return False
+        return True
+
+    def detect(self, frame):
+        # 轉換為 RGB (MediaPipe 需要)
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        results = self.face_detection.process(rgb_frame)
+
+        self.results.clear()
+        if results and getattr(results, 'detections', None):
+            h, w = frame.shape[:2]
+            for detection in results.detections:
+                location = getattr(detection, 'location_data', None)
+                bbox = location.relative_bounding_box if location else None
+                if not bbox:
+                    continue
+                score = detection.score[0] if getattr(detection, 'score', None) else 0.0
+                self._add_box(bbox.xmin * w, bbox.ymin * h, bbox.width * w, bbox.height * h,
+                              score, frame.shape)
+        return self.results.view()
+
+    def close(self):
+        if self.face_detection is not None:
+            try:
+                self.face_detection.close()
+            except Exception as e:
+                print(f"Error closing face detection: {e}")
+            self.face_detection = None
+
+
+class MediaPipeFullRangeBackend(MediaPipeBackend):
+    """MediaPipe 遠距模型"""
+
+    name = 'mediapipe_full'
+    model_selection = 1
+
+
+class YuNetBackend(DetectorBackend):
+    """OpenCV DNN YuNet（需 face_detection_yunet ONNX 模型）"""
+
+    name = 'yunet'
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.model_path = config.get('yunet_model_path', os.path.join('models', 'face_detection_yunet_2023mar.onnx'))
+        self.work_width = 640  # 於縮小後的畫面偵測
+        self.detector = None
+        self.input_size = None
+
+    def is_available(self):
+        if not hasattr(cv2, 'FaceDetectorYN') or not os.path.exists(self.model_path):
+            return False
+        try:
+            self.detector = cv2.FaceDetectorYN.create(self.model_path, "", (320, 320), self.confidence)
+        except cv2.error as e:
+            print(f"YuNet 模型載入失敗: {e}")
+            return False
+        return True
+
+    def detect(self, frame):
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.work_width / w)
+        small = cv2.resize(frame, (int(w * scale), int(h * scale))) if scale < 1.0 else frame
+
+        size = (small.shape[1], small.shape[0])
+        if size != self.input_size:
+            self.detector.setInputSize(size)
+            self.input_size = size
+
+        _, faces = self.detector.detect(small)
+        self.results.clear()
+        if faces is not None:
+            for face in faces:
+                self._add_box(face[0] / scale, face[1] / scale, face[2] / scale, face[3] / scale,
+                              face[-1], frame.shape)
+        return self.results.view()
+
+
+class HaarBackend(DetectorBackend):
+    """OpenCV Haar cascade（無信心度，偵測到即為 1.0）"""
+
+    name = 'haar'
+
+    def __init__(self, config):
+        super().__init__(config)
+        default_path = ''
+        if hasattr(cv2, 'data'):
+            default_path = os.path.join(cv2.data.haarcascades, 'haarcascade_frontalface_default.xml')
+        self.cascade_path = config.get('haar_cascade_path', default_path)
+        self.work_width = 480
+        self.cascade = None
+
+    def is_available(self):
+        if not self.cascade_path or not os.path.exists(self.cascade_path):
+            return False
+        self.cascade = cv2.CascadeClassifier(self.cascade_path)
+        return not self.cascade.empty()
+
+    def detect(self, frame):
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.work_width / w)
+        small = cv2.resize(frame, (int(w * scale), int(h * scale))) if scale < 1.0 else frame
+        gray = cv2.equalizeHist(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+
+        faces = self.cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(24, 24))
+        self.results.clear()
+        for (x, y, fw, fh) in faces:
+            self._add_box(x / scale, y / scale, fw / scale, fh / scale, 1.0, frame.shape)
+        return self.results.view()
+
+
+BACKENDS = {
+    MediaPipeBackend.name: MediaPipeBackend,
+    MediaPipeFullRangeBackend.name: MediaPipeFullRangeBackend,
+    YuNetBackend.name: YuNetBackend,
+    HaarBackend.name: HaarBackend
+}
+
+
+def create_backend(name, config, fallback=True):
+    """建立偵測後端；無法使用時改用 MediaPipe 近距模型（fallback=False 時回傳 None）"""
+    backend_class = BACKENDS.get(name)
+    if backend_class is None:
+        print(f"未知的人臉偵測後端: {name}")
+    else:
+        backend = backend_class(config)
+        if backend.is_available():
+            return backend
+        print(f"人臉偵測後端 {name} 無法使用")
+
+    if fallback and name != MediaPipeBackend.name:
+        backend = MediaPipeBackend(config)
+        if backend.is_available():
+            print(f"改用人臉偵測後端: {backend.name}")
+            return backend
+    return None
@@ -1,47 +1,61 @@
 # Location: project_v2/core/face_detector.py
-# Usage: 使用 MediaPipe 進行高效能人臉偵測
+# Usage: 人臉偵測（可替換偵測後端，預設 MediaPipe）與多人臉追蹤
 
-import mediapipe as mp
-import numpy as np
+import time
 from PyQt6.QtCore import QObject, pyqtSignal
 import cv2
+from .detector_backends import create_backend
+from .detection_worker import DetectionWorker, parse_cpu_list
+from .detections import DetectionBuffer
+from .face_tracker import FaceTracker
+from .flow_tracker import OpticalFlowBoxTracker, box_drift
 
 
 class FaceDetector(QObject):
-    """MediaPipe 人臉偵測器"""
+    """人臉偵測器（偵測後端由 period_config.csv 的 detector_backend 選擇）"""
     
-    face_detected = pyqtSignal(bool, object)  # (偵測到與否, 偵測框資訊)
+    face_detected = pyqtSignal(bool, object)  # (偵測到與否, 主要偵測框記錄)
+    tracks_updated = pyqtSignal(object)  # 目前有效的 FaceTrack 列表
     
     def __init__(self, config=None):
         super().__init__()
         
         self.config = config or {}
         
-        # 初始化 MediaPipe
-        self.mp_face_detection = mp.solutions.face_detection
+        # 偵測後端：mediapipe_short / mediapipe_full / yunet / haar
+        self.backend_name = str(self.config.get('detector_backend', 'mediapipe_short'))
+        self.backend = None
+        self.worker = None
+        if int(self.config.get('detector_process', 0)):
+            # 在獨立行程偵測，主行程只負責把畫面複製到共享記憶體
+            cpus = parse_cpu_list(self.config.get('detector_cpu_affinity', ''))
+            self.worker = DetectionWorker(self.backend_name, self.config, cpus)
+        else:
+            self._create_backend()
         
-        # 從配置取得靈敏度
-        confidence = self.config.get('detection_sensitivity', 0.5)
+        self.last_detection = None
         
-        try:
-            self.face_detection = self.mp_face_detection.FaceDetection(
-                model_selection=0,  # 0: 短距離模型 (更快)
-                min_detection_confidence=confidence
-            )
-        except Exception as e:
-            print(f"Failed to initialize MediaPipe face detection: {e}")
-            self.face_detection = None
+        # 多人臉追蹤：固定身分 ID，並以 One-Euro 濾波取代原本的穩定性閾值過濾
+        self.tracker = FaceTracker(max_age=self.config.get('track_max_age', 0.5))
+        self.tracks = []
         
-        self.last_detection = None
-        self.main_face_id = 0
+        # 有效追蹤的偵測框（停留最久者在第一筆；每幀覆寫同一組 Detection）
+        self.track_boxes = DetectionBuffer()
         
-        # 穩定性過濾參數
-        self.position_threshold = 5  # 位置變化閾值（像素）
-        self.size_threshold = 0.1    # 尺寸變化閾值（比例）
+        # 關鍵幀偵測：每 detect_keyframe_interval 幀執行一次完整偵測，其間以光流推移人臉框
+        # （光流失準時立即重新偵測；設為 1 則每幀偵測）
+        self.keyframe_interval = max(1, int(self.config.get('detect_keyframe_interval', 3)))
+        self.flow_tracker = OpticalFlowBoxTracker()
+        self.frames_since_keyframe = 0
+        
+        # 效能統計（每 perf_report_interval 秒輸出一次）
+        self.perf_report_interval = 10.0
+        self.last_perf_report = time.monotonic()
+        self._reset_perf_stats()
         
     def process_frame(self, frame):
         """處理畫面並偵測人臉"""
-        if frame is None or self.face_detection is None:
+        if frame is None or (self.backend is None and self.worker is None):
             return None
         
         # 额外的安全检查
@@ -49,140 +63,170 @@ class FaceDetector(QObject):
             return None
             
         try:
-            # 轉換為 RGB (MediaPipe 需要)
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            # 執行偵測
-            results = self.face_detection.process(rgb_frame)
-            
-            if results and hasattr(results, 'detections') and results.detections:
-                # 選擇最大的臉部 (通常是最近的)
-                best_detection = self._select_main_face(results.detections, frame.shape)
+            if self.worker is not None:
+                return self._process_worker_frame(frame)
                 
-                if best_detection:
-                    # 轉換為畫面座標
-                    bbox = self._get_bbox_coords(best_detection, frame.shape)
+            start_time = time.perf_counter()
+            detections = None
+            keyframe = (self.keyframe_interval <= 1 or
+                        self.frames_since_keyframe + 1 >= self.keyframe_interval)
+            
+            # 非關鍵幀：以光流推移上一次的偵測框（沒有人臉時直接略過）
+            if not keyframe:
+                if self.flow_tracker.has_targets():
+                    detections = self.flow_tracker.propagate(frame)
+                else:
+                    detections = ()
+                    
+            if detections is None:
+                # 關鍵幀或光流失準：完整偵測，並記錄推移結果與偵測的差距
+                predicted = None
+                if keyframe and self.keyframe_interval > 1 and self.flow_tracker.has_targets():
+                    predicted = self.flow_tracker.propagate(frame)
                     
-                    # 穩定性過濾：只有當變化足夠大時才更新
-                    if self._should_update_detection(bbox):
-                        self.last_detection = bbox
-                        self.face_detected.emit(True, bbox)
-                        return bbox
-                    elif self.last_detection:
-                        # 使用上次的檢測結果，減少抖動
-                        self.face_detected.emit(True, self.last_detection)
-                        return self.last_detection
+                detections = self._detect(frame)
+                drift = box_drift(predicted, detections)  # predicted 為光流緩衝的視圖，須在 reset 前比較
+                if self.keyframe_interval > 1:
+                    self.flow_tracker.reset(frame, detections)
+                self.frames_since_keyframe = 0
+                self._record_perf('keyframe', time.perf_counter() - start_time, drift)
+            else:
+                self.frames_since_keyframe += 1
+                self._record_perf('flow', time.perf_counter() - start_time)
             
-            # 沒有偵測到人臉
-            self.last_detection = None
-            self.face_detected.emit(False, None)
-            return None
+            return self._update_tracks(detections, time.monotonic())
             
         except Exception as e:
             print(f"Face detection error: {e}")
             # 發生錯誤時，不發送偵測信號
             return None
-        
-    def _select_main_face(self, detections, frame_shape):
-        """選擇主要追蹤的人臉"""
-        if not detections:
+            
+    def _process_worker_frame(self, frame):
+        """偵測行程模式：送出畫面並套用已完成的最新結果（結果通常落後一至兩幀）"""
+        if self.worker.is_failed():
+            print("人臉偵測行程無法使用，改在主行程偵測")
+            self.worker.close()
+            self.worker = None
+            self._create_backend()
             return None
             
-        h, w = frame_shape[:2]
-        best_detection = None
-        max_area = 0
-        
-        for detection in detections:
-            try:
-                if hasattr(detection, 'location_data') and detection.location_data:
-                    bbox = detection.location_data.relative_bounding_box
-                    if bbox:
-                        area = bbox.width * bbox.height * w * h
-                        
-                        if area > max_area:
-                            max_area = area
-                            best_detection = detection
-            except Exception as e:
-                print(f"Error processing detection: {e}")
-                continue
-                
-        return best_detection
-        
-    def _get_bbox_coords(self, detection, frame_shape):
-        """將相對座標轉換為絕對座標"""
-        try:
-            h, w = frame_shape[:2]
+        self.worker.submit(frame, time.monotonic())
+        result = self.worker.poll()
+        if result is None:
+            return self.last_detection
             
-            # 安全地訪問bounding box
-            if not hasattr(detection, 'location_data') or not detection.location_data:
-                return None
+        detections, timestamp, shape, detect_ms = result
+        height, width = frame.shape[:2]
+        if shape != (height, width) and shape[0] > 0 and shape[1] > 0:
+            # 結果對應的畫面解析度不同（省電模式切換）：換算到目前畫面
+            sx, sy = width / shape[1], height / shape[0]
+            for detection in detections:
+                detection.x *= sx
+                detection.width *= sx
+                detection.y *= sy
+                detection.height *= sy
                 
-            bbox = detection.location_data.relative_bounding_box
-            if not bbox:
-                return None
-            
-            x = int(bbox.xmin * w)
-            y = int(bbox.ymin * h)
-            width = int(bbox.width * w)
-            height = int(bbox.height * h)
-            
-            # 確保座標在畫面範圍內
-            x = max(0, min(x, w - 1))
-            y = max(0, min(y, h - 1))
-            width = min(width, w - x)
-            height = min(height, h - y)
-            
-            # 安全地獲取confidence值
-            confidence = 0.0
-            try:
-                if hasattr(detection, 'score') and detection.score:
-                    confidence = detection.score[0] if len(detection.score) > 0 else 0.0
-            except (AttributeError, IndexError, TypeError):
-                confidence = 0.0
+        self._record_perf('keyframe', detect_ms / 1000)
+        return self._update_tracks(detections, timestamp)
+        
+    def _update_tracks(self, detections, timestamp):
+        """更新追蹤並發送信號；主要人臉為停留最久的身分"""
+        self.tracks = self.tracker.update(detections, timestamp)
+        self.track_boxes.clear()
+        for track in self.tracks:
+            track.write_to(self.track_boxes)
+        self.tracks_updated.emit(self.tracks)
+        
+        if self.tracks:
+            self.last_detection = self.track_boxes.items[0]
+            self.face_detected.emit(True, self.last_detection)
+            return self.last_detection
+        
+        # 沒有偵測到人臉
+        self.last_detection = None
+        self.face_detected.emit(False, None)
+        return None
+        
+    def _create_backend(self):
+        """在主行程建立偵測後端"""
+        self.backend = create_backend(self.backend_name, self.config)
+        if self.backend:
+            print(f"人臉偵測後端: {self.backend.name}")
+        
+    def reset(self):
+        """清除追蹤與光流狀態（偵測暫停後恢復時呼叫）"""
+        self.tracker.reset()
+        self.tracks = []
+        self.track_boxes.clear()
+        self.last_detection = None
+        self.flow_tracker.reset_targets()
+        self.frames_since_keyframe = self.keyframe_interval  # 下一幀立即完整偵測
+        
+    def _detect(self, frame):
+        """以偵測後端完整偵測，回傳偵測框列表"""
+        return self.backend.detect(frame)
+        
+    def _reset_perf_stats(self):
+        """清除效能統計"""
+        self.perf_stats = {
+            'keyframe_count': 0, 'keyframe_time': 0.0,
+            'flow_count': 0, 'flow_time': 0.0,
+            'drift_count': 0, 'drift_error': 0.0, 'drift_iou': 0.0
+        }
+        
+    def _record_perf(self, kind, elapsed, drift=None):
+        """記錄單幀耗時與漂移，定期輸出"""
+        stats = self.perf_stats
+        stats[f'{kind}_count'] += 1
+        stats[f'{kind}_time'] += elapsed
+        if drift:
+            stats['drift_count'] += 1
+            stats['drift_error'] += drift[0]
+            stats['drift_iou'] += drift[1]
             
-            return {
-                'x': x,
-                'y': y,
-                'width': width,
-                'height': height,
-                'confidence': confidence
-            }
+        now = time.monotonic()
+        if now - self.last_perf_report >= self.perf_report_interval:
+            self.last_perf_report = now
+            self._report_performance()
             
-        except Exception as e:
-            print(f"Error getting bbox coordinates: {e}")
-            return None
-    
-    def _should_update_detection(self, new_bbox):
-        """判斷是否應該更新檢測結果（穩定性過濾）"""
-        if not self.last_detection or not new_bbox:
-            return True
-        
-        last = self.last_detection
-        
-        # 檢查位置變化
-        pos_diff_x = abs(new_bbox['x'] - last['x'])
-        pos_diff_y = abs(new_bbox['y'] - last['y'])
-        if pos_diff_x > self.position_threshold or pos_diff_y > self.position_threshold:
-            return True
-        
-        # 檢查尺寸變化
-        last_area = last['width'] * last['height']
-        new_area = new_bbox['width'] * new_bbox['height']
-        if last_area > 0:
-            size_change = abs(new_area - last_area) / last_area
-            if size_change > self.size_threshold:
-                return True
-        
-        return False
+    def get_performance_stats(self):
+        """偵測效能統計：各類幀的平均毫秒數與光流漂移"""
+        stats = self.perf_stats
+        frames = stats['keyframe_count'] + stats['flow_count']
+        result = {
+            'frames': frames,
+            'keyframe_ms': stats['keyframe_time'] / stats['keyframe_count'] * 1000 if stats['keyframe_count'] else 0.0,
+            'flow_ms': stats['flow_time'] / stats['flow_count'] * 1000 if stats['flow_count'] else 0.0,
+            'frame_ms': (stats['keyframe_time'] + stats['flow_time']) / frames * 1000 if frames else 0.0,
+            'drift_px': None,
+            'drift_iou': None
+        }
+        if stats['drift_count']:
+            result['drift_px'] = stats['drift_error'] / stats['drift_count']
+            result['drift_iou'] = stats['drift_iou'] / stats['drift_count']
+        return result
+        
+    def _report_performance(self):
+        """輸出並清除效能統計"""
+        stats = self.get_performance_stats()
+        if stats['frames'] and self.worker is not None:
+            print(f"人臉偵測（獨立行程）: {stats['frames']} 次結果，平均偵測 {stats['keyframe_ms']:.1f}ms")
+        elif stats['frames']:
+            line = (f"人臉偵測: 平均 {stats['frame_ms']:.1f}ms/幀（關鍵幀 {stats['keyframe_ms']:.1f}ms，"
+                    f"光流 {stats['flow_ms']:.1f}ms，間隔 {self.keyframe_interval}）")
+            if stats['drift_px'] is not None:
+                line += f"，漂移 {stats['drift_px']:.1f}px / IoU {stats['drift_iou']:.2f}"
+            print(line)
+        self._reset_perf_stats()
         
     def draw_detection(self, frame, bbox):
         """在畫面上繪製偵測框 (用於測試)"""
         if bbox:
-            x, y, w, h = bbox['x'], bbox['y'], bbox['width'], bbox['height']
+            x, y, w, h = int(bbox.x), int(bbox.y), int(bbox.width), int(bbox.height)
             cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
             
             # 顯示信心度
-            conf_text = f"{bbox['confidence']:.2f}"
+            conf_text = f"{bbox.confidence:.2f}"
             cv2.putText(frame, conf_text, (x, y - 10),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
                        
@@ -190,8 +234,8 @@ class FaceDetector(QObject):
         
     def release(self):
         """釋放資源"""
-        if hasattr(self, 'face_detection') and self.face_detection is not None:
-            try:
-                self.face_detection.close()
-            except Exception as e:
-                print(f"Error closing face detection: {e}")
\ No newline at end of file
+        if self.worker is not None:
+            self.worker.close()
+            self.worker = None
+        if self.backend is not None:
+            self.backend.close()
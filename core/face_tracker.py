@@ -0,0 +1,268 @@
+# Location: project_v2/core/face_tracker.py
+# Usage: 多人臉追蹤器：IoU / 中心距離配對（匈牙利演算法）、固定追蹤 ID 與 One-Euro 平滑
+
+import math
+import numpy as np
+
+from .detections import MAX_FACES
+
+
+class OneEuroFilter:
+    """One-Euro 濾波器（逐分量）
+
+    移動慢時以低截止頻率強力平滑抖動，移動快時提高截止頻率以減少延遲。
+    value 為浮點數列表，每次更新就地覆寫（各分量數量少，逐一計算比 numpy 小陣列快）。
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.02, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.value = None
+        self.derivative = None
+        self.timestamp = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def reset(self, value, timestamp):
+        """以新值重新開始"""
+        self.value = [float(component) for component in value]
+        self.derivative = [0.0] * len(self.value)
+        self.timestamp = timestamp
+
+    def filter(self, value, timestamp):
+        """輸入新量測值，回傳平滑後的值"""
+        if self.value is None:
+            self.reset(value, timestamp)
+            return self.value
+
+        dt = timestamp - self.timestamp
+        if dt <= 0:
+            return self.value
+        self.timestamp = timestamp
+
+        alpha_d = self._alpha(self.d_cutoff, dt)
+        smoothed, derivative = self.value, self.derivative
+        for i, measured in enumerate(value):
+            derivative[i] += alpha_d * ((measured - smoothed[i]) / dt - derivative[i])
+            cutoff = self.min_cutoff + self.beta * abs(derivative[i])
+            alpha = 1.0 / (1.0 + 1.0 / (2 * math.pi * cutoff * dt))
+            smoothed[i] += alpha * (measured - smoothed[i])
+        return smoothed
+
+
+class FaceTrack:
+    """單一人臉的追蹤狀態"""
+
+    __slots__ = ('track_id', 'box', 'confidence', 'first_seen', 'last_seen',
+                 'hits', 'misses', 'filter')
+
+    def __init__(self, track_id, box, confidence, timestamp, filter_params):
+        self.track_id = track_id
+        self.filter = OneEuroFilter(*filter_params)
+        self.box = self.filter.filter(box, timestamp)  # 平滑後的 [中心x, 中心y, 寬, 高]
+        self.confidence = confidence
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.hits = 1
+        self.misses = 0
+
+    def update(self, box, confidence, timestamp):
+        """配對到新的偵測結果"""
+        self.box = self.filter.filter(box, timestamp)
+        self.confidence = confidence
+        self.last_seen = timestamp
+        self.hits += 1
+        self.misses = 0
+
+    @property
+    def dwell(self):
+        """此身分已連續出現的秒數"""
+        return self.last_seen - self.first_seen
+
+    @property
+    def area(self):
+        return self.box[2] * self.box[3]
+
+    def write_to(self, buffer):
+        """寫入偵測框池（DetectionBuffer，左上角座標並帶追蹤 ID）"""
+        cx, cy, w, h = self.box
+        buffer.append(cx - w / 2, cy - h / 2, w, h, self.confidence, self.track_id)
+
+
+def _box_to_xyxy(box):
+    cx, cy, w, h = box
+    return cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2
+
+
+def _iou(box_a, box_b):
+    """兩個 (中心x, 中心y, 寬, 高) 框的 IoU"""
+    ax1, ay1, ax2, ay2 = _box_to_xyxy(box_a)
+    bx1, by1, bx2, by2 = _box_to_xyxy(box_b)
+    inter_w = min(ax2, bx2) - max(ax1, bx1)
+    inter_h = min(ay2, by2) - max(ay1, by1)
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    inter = inter_w * inter_h
+    union = box_a[2] * box_a[3] + box_b[2] * box_b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+def linear_assignment(cost):
+    """匈牙利演算法：回傳總成本最小的 [(列, 行), ...]（矩形矩陣，每列每行最多配一次）"""
+    # 只有一列或一行（畫面中通常只有一位訪客）：直接取最小值
+    if len(cost) == 1:
+        row = cost[0]
+        return [(0, min(range(len(row)), key=row.__getitem__))] if len(row) else []
+    if len(cost) and len(cost[0]) == 1:
+        return [(min(range(len(cost)), key=lambda i: cost[i][0]), 0)]
+
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.size == 0:
+        return []
+
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    rows, cols = cost.shape
+
+    # 位勢法（O(n²m)），u / v 為列與行的對偶變數，索引 0 為虛擬起點
+    u = np.zeros(rows + 1)
+    v = np.zeros(cols + 1)
+    match = np.zeros(cols + 1, dtype=int)  # match[j] = 配到第 j 行的列（1 起算）
+    way = np.zeros(cols + 1, dtype=int)
+
+    for i in range(1, rows + 1):
+        match[0] = i
+        j0 = 0
+        min_value = np.full(cols + 1, np.inf)
+        used = np.zeros(cols + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            delta = np.inf
+            j1 = 0
+            for j in range(1, cols + 1):
+                if used[j]:
+                    continue
+                current = cost[i0 - 1, j - 1] - u[i0] - v[j]
+                if current < min_value[j]:
+                    min_value[j] = current
+                    way[j] = j0
+                if min_value[j] < delta:
+                    delta = min_value[j]
+                    j1 = j
+            for j in range(cols + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_value[j] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+
+    pairs = [(match[j] - 1, j - 1) for j in range(1, cols + 1) if match[j]]
+    if transposed:
+        pairs = [(col, row) for row, col in pairs]
+    return sorted(pairs)
+
+
+class FaceTracker:
+    """多人臉追蹤器
+
+    每次偵測以 IoU（重疊不足時改用中心距離）建立成本矩陣，匈牙利演算法配對；
+    未配對的偵測建立新追蹤，未配對的追蹤在 max_age 秒內保留原位置，
+    避免偶發漏偵測時身分與停留時間被重置。
+    """
+
+    NO_MATCH = 1e6
+
+    def __init__(self, iou_threshold=0.2, centroid_gate=0.6, max_age=0.5, min_hits=2,
+                 min_cutoff=1.0, beta=0.02):
+        self.iou_threshold = iou_threshold
+        self.centroid_gate = centroid_gate  # 中心距離 / 框邊長 的上限
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.filter_params = (min_cutoff, beta)
+
+        self.tracks = []
+        self.next_id = 1
+        self._boxes = [[0.0] * 4 for _ in range(MAX_FACES)]  # 本次偵測的 [中心x, 中心y, 寬, 高]（每幀覆寫）
+
+    def reset(self):
+        """清除所有追蹤"""
+        self.tracks = []
+
+    def update(self, detections, timestamp):
+        """以新的偵測結果更新追蹤，回傳目前有效的追蹤（停留時間長者在前）
+
+        detections: Detection 序列（原始畫面座標）
+        """
+        count = min(len(detections), len(self._boxes))
+        boxes = self._boxes
+        for box, detection in zip(boxes, detections):
+            box[0] = detection.x + detection.width / 2
+            box[1] = detection.y + detection.height / 2
+            box[2] = detection.width
+            box[3] = detection.height
+
+        pairs = []
+        if self.tracks and count:
+            cost = [[self._match_cost(track.box, boxes[index]) for index in range(count)]
+                    for track in self.tracks]
+            pairs = [(t, d) for t, d in linear_assignment(cost) if cost[t][d] < self.NO_MATCH]
+
+        matched_tracks = set()
+        matched_detections = set()
+        for track_index, detection_index in pairs:
+            self.tracks[track_index].update(boxes[detection_index],
+                                            detections[detection_index].confidence, timestamp)
+            matched_tracks.add(track_index)
+            matched_detections.add(detection_index)
+
+        # 未配對的追蹤：累計漏偵測，超過保留時間即移除
+        for index, track in enumerate(self.tracks):
+            if index not in matched_tracks:
+                track.misses += 1
+        self.tracks = [track for track in self.tracks
+                       if timestamp - track.last_seen <= self.max_age]
+
+        # 未配對的偵測：建立新追蹤
+        for index in range(count):
+            if index not in matched_detections:
+                self.tracks.append(FaceTrack(self.next_id, boxes[index], detections[index].confidence,
+                                             timestamp, self.filter_params))
+                self.next_id += 1
+
+        return self.active_tracks()
+
+    def _match_cost(self, track_box, box):
+        """配對成本：IoU 足夠時為 1 - IoU，否則依中心距離（一律比 IoU 配對差）"""
+        iou = _iou(track_box, box)
+        if iou >= self.iou_threshold:
+            return 1.0 - iou
+
+        size = max(track_box[2], track_box[3], 1.0)
+        distance = math.hypot(track_box[0] - box[0], track_box[1] - box[1]) / size
+        if distance <= self.centroid_gate:
+            return 1.0 + distance
+        return self.NO_MATCH
+
+    def active_tracks(self):
+        """已確認（連續出現 min_hits 次以上）的追蹤，停留時間長、面積大者在前"""
+        tracks = [track for track in self.tracks if track.hits >= self.min_hits]
+        tracks.sort(key=lambda track: (-track.dwell, -track.area))
+        return tracks
+
+    def primary_track(self):
+        """主要追蹤對象（停留最久者）"""
+        tracks = self.active_tracks()
+        return tracks[0] if tracks else None
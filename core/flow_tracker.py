@@ -0,0 +1,172 @@
+# Location: project_v2/core/flow_tracker.py
+# Usage: 關鍵幀之間以光流（Lucas-Kanade）推移人臉框，取代每幀完整偵測
+
+import math
+
+import cv2
+import numpy as np
+
+from .detections import DetectionBuffer
+
+
+class OpticalFlowBoxTracker:
+    """以稀疏光流推移偵測框
+
+    關鍵幀時在每個偵測框內取特徵點；之後每幀以前向 / 反向光流檢查追蹤點，
+    依存活點的位移中位數移動框、依到中心距離的比例中位數縮放框。
+    任一框的存活比例低於 min_confidence 時回傳 None，由呼叫端立即重新偵測。
+    """
+
+    def __init__(self, work_width=480, max_points=24, min_points=4,
+                 min_confidence=0.5, fb_threshold=1.0):
+        self.work_width = work_width  # 光流在縮小後的灰階影像上計算
+        self.max_points = max_points
+        self.min_points = min_points
+        self.min_confidence = min_confidence
+        self.fb_threshold = fb_threshold  # 前向-反向誤差上限（像素，縮小後座標）
+
+        self.prev_gray = None
+        self.scale = 1.0
+        self.boxes = DetectionBuffer()  # 目前的框（原始座標）
+        self.next_boxes = DetectionBuffer()  # 推移結果（與 boxes 交替使用）
+        self.points = []  # 每個框的追蹤點 (N, 2)（縮小後座標）
+
+        self.lk_params = dict(
+            winSize=(15, 15),
+            maxLevel=2,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03)
+        )
+
+    def _prepare(self, frame):
+        """轉為縮小的灰階影像"""
+        height, width = frame.shape[:2]
+        self.scale = min(1.0, self.work_width / width)
+        if self.scale < 1.0:
+            frame = cv2.resize(frame, (int(width * self.scale), int(height * self.scale)),
+                               interpolation=cv2.INTER_LINEAR)
+        if frame.ndim == 3:
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return frame
+
+    def _seed_points(self, gray, box):
+        """在框內取特徵點"""
+        s = self.scale
+        x1 = max(0, int(box.x * s))
+        y1 = max(0, int(box.y * s))
+        x2 = min(gray.shape[1], int((box.x + box.width) * s))
+        y2 = min(gray.shape[0], int((box.y + box.height) * s))
+        if x2 - x1 < 4 or y2 - y1 < 4:
+            return np.empty((0, 2), dtype=np.float32)
+
+        # 只在框的範圍內搜尋
+        corners = cv2.goodFeaturesToTrack(gray[y1:y2, x1:x2], self.max_points, 0.01, 3)
+        if corners is None:
+            return np.empty((0, 2), dtype=np.float32)
+        return corners.reshape(-1, 2) + np.array([x1, y1], dtype=np.float32)
+
+    def reset(self, frame, detections):
+        """關鍵幀：以完整偵測結果重新建立追蹤點"""
+        gray = self._prepare(frame)
+        self.prev_gray = gray
+        self.boxes.assign(detections)
+        self.points = [self._seed_points(gray, box) for box in self.boxes.view()]
+
+    def reset_targets(self):
+        """清除追蹤目標與上一幀"""
+        self.prev_gray = None
+        self.boxes.clear()
+        self.points = []
+
+    def has_targets(self):
+        """目前是否有可推移的框"""
+        return self.prev_gray is not None and len(self.boxes) > 0
+
+    def propagate(self, frame):
+        """推移到新的畫面，回傳新框（自有緩衝的視圖，下一次推移或 reset 時覆寫）；追蹤失準時回傳 None"""
+        if self.prev_gray is None:
+            return None
+
+        gray = self._prepare(frame)
+        if gray.shape != self.prev_gray.shape:
+            # 相機切換解析度（省電模式）：無法沿用上一幀，重新偵測
+            return None
+        if not len(self.boxes):
+            self.prev_gray = gray
+            return self.boxes.view()
+
+        counts = [len(points) for points in self.points]
+        if min(counts) < self.min_points:
+            return None
+
+        # 所有框的追蹤點一次計算
+        previous = np.concatenate(self.points).astype(np.float32).reshape(-1, 1, 2)
+        forward, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, previous, None, **self.lk_params)
+        backward, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, forward, None, **self.lk_params)
+
+        previous = previous.reshape(-1, 2)
+        forward = forward.reshape(-1, 2)
+        fb_error = np.linalg.norm(previous - backward.reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < self.fb_threshold)
+
+        new_boxes = self.next_boxes
+        new_boxes.clear()
+        new_points = []
+        start = 0
+        for box, count in zip(self.boxes.view(), counts):
+            end = start + count
+            keep = good[start:end]
+            old_pts = previous[start:end][keep]
+            new_pts = forward[start:end][keep]
+            start = end
+
+            if len(new_pts) < self.min_points or keep.mean() < self.min_confidence:
+                return None
+
+            # 位移：中位數；縮放：到中心距離比例的中位數
+            shift = np.median(new_pts - old_pts, axis=0) / self.scale
+            old_spread = np.linalg.norm(old_pts - old_pts.mean(axis=0), axis=1)
+            new_spread = np.linalg.norm(new_pts - new_pts.mean(axis=0), axis=1)
+            valid = old_spread > 1e-3
+            zoom = float(np.median(new_spread[valid] / old_spread[valid])) if valid.any() else 1.0
+            zoom = min(max(zoom, 0.8), 1.25)
+
+            center_x = box.x + box.width / 2 + float(shift[0])
+            center_y = box.y + box.height / 2 + float(shift[1])
+            width = box.width * zoom
+            height = box.height * zoom
+            new_boxes.append(center_x - width / 2, center_y - height / 2, width, height,
+                             box.confidence, box.track_id)
+
+            # 追蹤點過少時在新位置補點
+            if len(new_pts) < self.max_points // 2:
+                new_pts = self._seed_points(gray, new_boxes.items[new_boxes.count - 1])
+            new_points.append(new_pts)
+
+        self.prev_gray = gray
+        self.boxes, self.next_boxes = new_boxes, self.boxes
+        self.points = new_points
+        return new_boxes.view()
+
+
+def box_drift(predicted, detected):
+    """推移結果與完整偵測的差距：回傳 (平均中心誤差像素, 平均 IoU)，無可比較時為 None"""
+    if predicted is None or not len(predicted) or not len(detected):
+        return None
+
+    # 每個推移框與中心最近的偵測框比較
+    total_error = total_iou = 0.0
+    for box in predicted:
+        pcx = box.x + box.width / 2
+        pcy = box.y + box.height / 2
+        error, nearest = min((math.hypot(d.x + d.width / 2 - pcx, d.y + d.height / 2 - pcy), i)
+                             for i, d in enumerate(detected))
+        nearest = detected[nearest]
+        total_error += error
+
+        inter_w = min(box.x + box.width, nearest.x + nearest.width) - max(box.x, nearest.x)
+        inter_h = min(box.y + box.height, nearest.y + nearest.height) - max(box.y, nearest.y)
+        inter = max(0.0, inter_w) * max(0.0, inter_h)
+        union = box.width * box.height + nearest.width * nearest.height - inter
+        total_iou += inter / union if union > 0 else 0.0
+
+    return total_error / len(predicted), total_iou / len(predicted)
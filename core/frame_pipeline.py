@@ -0,0 +1,59 @@
+# Location: project_v2/core/frame_pipeline.py
+# Usage: 依系統狀態開關相機畫面處理階段（顯示、偵測框、人臉偵測），畫面被遮住時不做多餘的工作
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .state_machine import SystemState
+
+
+class FramePipeline(QObject):
+    """畫面處理階段開關
+
+    render：裁切、縮放並顯示相機畫面
+    overlay：繪製偵測框
+    detect：人臉偵測與追蹤
+
+    CAPTION / SPOTLIGHT 期間相機畫面被全畫面截圖遮住；IMG_SHOW 期間由黑幕與武器圖層遮住
+    （武器圖層為黑色底，圖片小於視窗時周圍也不會露出相機畫面）。
+    偵測結果也不會被使用，三個階段都停止，把 CPU 留給 AI 分析與 TTS。
+    LLM_LOADING 仍需偵測訪客是否離開。
+    """
+
+    stages_changed = pyqtSignal(dict)  # 有變化的階段 {階段名稱: 是否啟用}
+
+    STAGES = ('render', 'overlay', 'detect')
+
+    STATE_STAGES = {
+        SystemState.DETECTING:          {'render': True,  'overlay': True,  'detect': True},
+        SystemState.SCREENSHOT_TRIGGER: {'render': True,  'overlay': True,  'detect': True},
+        SystemState.LLM_LOADING:        {'render': True,  'overlay': True,  'detect': True},
+        SystemState.CAPTION:            {'render': False, 'overlay': False, 'detect': False},
+        SystemState.SPOTLIGHT:          {'render': False, 'overlay': False, 'detect': False},
+        SystemState.IMG_SHOW:           {'render': False, 'overlay': False, 'detect': False},
+        SystemState.RESET:              {'render': True,  'overlay': True,  'detect': True},
+    }
+
+    def __init__(self):
+        super().__init__()
+        self.active = dict(self.STATE_STAGES[SystemState.DETECTING])
+
+    def on_state_changed(self, state):
+        """狀態變更時套用該狀態的階段設定（連接 StateMachine.state_changed）"""
+        stages = self.STATE_STAGES.get(state, dict.fromkeys(self.STAGES, True))
+        changed = {stage: enabled for stage, enabled in stages.items()
+                   if self.active.get(stage) != enabled}
+        if not changed:
+            return
+
+        self.active = dict(stages)
+        print(f"畫面處理階段 ({state.value}): " +
+              ", ".join(f"{stage}={'on' if enabled else 'off'}" for stage, enabled in self.active.items()))
+        self.stages_changed.emit(changed)
+
+    def is_enabled(self, stage):
+        """階段目前是否啟用"""
+        return self.active.get(stage, True)
+
+    def is_idle(self):
+        """所有階段都停止"""
+        return not any(self.active.values())
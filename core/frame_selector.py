@@ -0,0 +1,101 @@
+# Location: project_v2/core/frame_selector.py
+# Usage: 截圖最佳畫面挑選：偵測階段為最近的畫面評分（清晰度、臉部大小、信心度、正面程度），觸發時送出分數最高者
+
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+class BestFrameSelector:
+    """滑動視窗內的最佳畫面
+
+    每幀只在主要人臉範圍內評分（縮小到 roi_width 寬的灰階）：
+    - 清晰度：Laplacian 變異數（模糊、晃動時下降）
+    - 大小：臉部面積佔畫面比例
+    - 信心度：偵測信心度
+    - 正面程度：左半臉與鏡像右半臉的相似度（側臉、閉眼單側時下降）
+
+    以單調佇列保存：新畫面加入時移除比它舊且分數不高於它的畫面，
+    佇列由舊到新分數遞減，隊首即視窗內最高分，記憶體只需保留少數幾幀。
+    """
+
+    WEIGHTS = {'sharpness': 0.4, 'size': 0.2, 'confidence': 0.2, 'frontal': 0.2}
+
+    def __init__(self, window=1.0, roi_width=96, sharpness_scale=150.0, size_scale=0.04):
+        self.window = window  # 只比較最近幾秒的畫面
+        self.roi_width = roi_width
+        self.sharpness_scale = sharpness_scale  # Laplacian 變異數達此值時清晰度約 0.5
+        self.size_scale = size_scale  # 臉部面積佔畫面比例達此值即為滿分
+
+        self.entries = deque()  # (時間, 分數, 畫面, 各項分數)
+        self._reset_cost()
+
+    def _reset_cost(self):
+        self.score_count = 0
+        self.score_time = 0.0
+
+    def reset(self):
+        """清除所有候選畫面"""
+        self.entries.clear()
+        self._reset_cost()
+
+    def add(self, frame, bbox, timestamp):
+        """加入一幀與其主要人臉框（Detection），回傳分數"""
+        start = time.perf_counter()
+        parts = self.score(frame, bbox)
+        total = sum(self.WEIGHTS[key] * value for key, value in parts.items())
+        self.score_time += time.perf_counter() - start
+        self.score_count += 1
+
+        entries = self.entries
+        while entries and entries[-1][1] <= total:
+            entries.pop()
+        entries.append((timestamp, total, frame, parts))
+        while entries[0][0] < timestamp - self.window:
+            entries.popleft()
+        return total
+
+    def score(self, frame, bbox):
+        """各項分數（0~1）"""
+        frame_h, frame_w = frame.shape[:2]
+        x1 = max(0, int(bbox.x))
+        y1 = max(0, int(bbox.y))
+        x2 = min(frame_w, int(bbox.x + bbox.width))
+        y2 = min(frame_h, int(bbox.y + bbox.height))
+        parts = {'sharpness': 0.0, 'size': 0.0, 'confidence': float(bbox.confidence), 'frontal': 0.0}
+        if x2 - x1 < 8 or y2 - y1 < 8:
+            return parts
+
+        # 臉部範圍縮小為固定寬度，評分成本與解析度、臉部大小無關
+        # （大臉先以間隔取樣到接近 roi_width，再平均縮小）
+        step = max(1, (x2 - x1) // self.roi_width)
+        roi = frame[y1:y2:step, x1:x2:step]
+        roi_h = max(8, int((y2 - y1) * self.roi_width / (x2 - x1)))
+        roi = cv2.resize(roi, (self.roi_width, roi_h), interpolation=cv2.INTER_AREA)
+        if roi.ndim == 3:
+            roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+
+        _, stddev = cv2.meanStdDev(cv2.Laplacian(roi, cv2.CV_32F))
+        variance = float(stddev[0, 0]) ** 2
+        parts['sharpness'] = variance / (variance + self.sharpness_scale)
+
+        parts['size'] = min(1.0, (x2 - x1) * (y2 - y1) / (frame_w * frame_h) / self.size_scale)
+
+        half = self.roi_width // 2
+        left = roi[:, :half].astype(np.int16)
+        right = roi[:, -half:][:, ::-1].astype(np.int16)
+        parts['frontal'] = max(0.0, 1.0 - float(np.mean(np.abs(left - right))) / 64.0)
+        return parts
+
+    def best(self):
+        """視窗內分數最高的 (畫面, 分數, 時間, 各項分數)；沒有候選時為 None"""
+        if not self.entries:
+            return None
+        timestamp, total, frame, parts = self.entries[0]
+        return frame, total, timestamp, parts
+
+    def get_cost_ms(self):
+        """平均每幀評分毫秒數"""
+        return self.score_time / self.score_count * 1000 if self.score_count else 0.0
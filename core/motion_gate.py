@@ -0,0 +1,47 @@
+# Location: project_v2/core/motion_gate.py
+# Usage: 省電模式的動態偵測：縮小灰階畫面的幀差，只在畫面有變化時才執行人臉偵測
+
+import cv2
+
+
+class MotionGate:
+    """低成本動態偵測
+
+    畫面縮小到 work_width 寬的灰階並模糊去雜訊，與上一幀相減；
+    變化超過 pixel_threshold 的像素比例達 area_ratio 即視為有動靜。
+    """
+
+    def __init__(self, work_width=160, pixel_threshold=25, area_ratio=0.01, settle_frames=2):
+        self.work_width = work_width
+        self.pixel_threshold = pixel_threshold
+        self.area_ratio = area_ratio
+        self.settle_frames = settle_frames  # 重置後略過的幀數（相機切換解析度時曝光會跳動）
+
+        self.prev_gray = None
+        self.skip = 0
+
+    def reset(self):
+        """重新建立比較基準"""
+        self.prev_gray = None
+        self.skip = self.settle_frames
+
+    def update(self, frame):
+        """輸入新畫面，回傳是否有動靜"""
+        height, width = frame.shape[:2]
+        small_size = (self.work_width, max(1, int(height * self.work_width / width)))
+        small = cv2.resize(frame, small_size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(small, (5, 5), 0)
+
+        prev_gray = self.prev_gray
+        self.prev_gray = gray
+        if self.skip > 0:
+            self.skip -= 1
+            return False
+        if prev_gray is None or prev_gray.shape != gray.shape:
+            return False
+
+        diff = cv2.absdiff(gray, prev_gray)
+        _, changed = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+        return cv2.countNonZero(changed) >= self.area_ratio * changed.size
@@ -5,6 +5,11 @@ from enum import Enum
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer
 import time
 
+from .cancellation import CancellationToken
+
+
+# No LLM 模式的固定字幕
+NO_LLM_CAPTION = 'Emergency defense protocol activated.'
 
 class SystemState(Enum):
     """系統狀態定義"""
@@ -30,6 +35,7 @@ class StateMachine(QObject):
     spotlight_requested = pyqtSignal()  # 新增聚光燈信號
     weapon_display_requested = pyqtSignal(list)  # 武器列表
     reset_requested = pyqtSignal()
+    cycle_cancelled = pyqtSignal(str)  # 取消原因
     
     def __init__(self, config):
         super().__init__()
@@ -37,9 +43,14 @@ class StateMachine(QObject):
         self.current_state = SystemState.DETECTING
         self.detection_start_time = None
         self.face_detected = False
+        self.dwell_start_times = {}  # 追蹤 ID -> 在 DETECTING 狀態中開始停留的時間
         self.no_llm_mode = False
         self.pending_weapons = []  # 暫存武器列表
         
+        # 週期取消
+        self.cycle_token = None
+        self.absence_start_time = None
+        
         # 計時器
         self.state_timer = QTimer()
         self.state_timer.timeout.connect(self._handle_state_timeout)
@@ -55,6 +66,8 @@ class StateMachine(QObject):
     def stop(self):
         """停止狀態機"""
         self.state_timer.stop()
+        if self.cycle_token:
+            self.cycle_token.cancel("shutdown")
         
     def transition_to(self, new_state):
         """狀態轉換"""
@@ -74,16 +87,22 @@ class StateMachine(QObject):
             # 重置偵測
             self.detection_start_time = None
             self.face_detected = False
+            self.dwell_start_times = {}
             self.pending_weapons = []
+            self.absence_start_time = None
             
         elif state == SystemState.SCREENSHOT_TRIGGER:
+            # 建立本週期的取消權杖
+            self.cycle_token = CancellationToken()
+            self.absence_start_time = None
+            
             # 觸發截圖
             self.screenshot_requested.emit()
             # 直接轉到下一狀態
             if self.no_llm_mode:
                 # No LLM 模式：跳過 AI 分析
                 default_response = {
-                    'caption': 'Emergency defense protocol activated.',
+                    'caption': NO_LLM_CAPTION,
                     'caption_tc': '緊急防禦協議啟動。',
                     'weapons': ['01', '02']
                 }
@@ -125,6 +144,10 @@ class StateMachine(QObject):
             
     def update_face_detection(self, face_detected):
         """更新人臉偵測狀態"""
+        if self.current_state == SystemState.LLM_LOADING:
+            self._update_visitor_presence(face_detected)
+            return
+            
         if self.current_state != SystemState.DETECTING:
             return
             
@@ -146,6 +169,60 @@ class StateMachine(QObject):
                 if elapsed >= threshold:
                     self.transition_to(SystemState.SCREENSHOT_TRIGGER)
                     
+    def update_face_tracks(self, track_ids):
+        """以人臉追蹤結果（畫面中可見的追蹤 ID）更新偵測狀態：停留時間依身分分別計算
+
+        任一身分在 DETECTING 狀態中連續停留達到 detect_duration 即觸發截圖；
+        其他人進出畫面或排列順序改變不會重置該身分的計時。
+        """
+        has_faces = len(track_ids) > 0
+        if self.current_state == SystemState.LLM_LOADING:
+            self._update_visitor_presence(has_faces)
+            return
+            
+        if self.current_state != SystemState.DETECTING:
+            return
+            
+        now = time.time()
+        self.dwell_start_times = {track_id: self.dwell_start_times.get(track_id, now)
+                                  for track_id in track_ids}
+        self.face_detected = has_faces
+        if not has_faces:
+            self.detection_start_time = None
+            return
+            
+        # 停留最久的身分
+        self.detection_start_time = min(self.dwell_start_times.values())
+        threshold = self.config.get('detect_duration', 3.0)
+        if now - self.detection_start_time >= threshold:
+            self.transition_to(SystemState.SCREENSHOT_TRIGGER)
+            
+    def _update_visitor_presence(self, face_detected):
+        """AI 分析期間追蹤訪客是否離開"""
+        if face_detected:
+            self.absence_start_time = None
+            return
+            
+        abort_after = self.config.get('abort_absence_time', 3.0)
+        if abort_after <= 0:
+            return
+            
+        if self.absence_start_time is None:
+            self.absence_start_time = time.time()
+        elif time.time() - self.absence_start_time >= abort_after:
+            print(f"Visitor gone for {abort_after:.1f}s during LLM_LOADING - cancelling cycle")
+            self.cancel_cycle("visitor_left")
+            
+    def cancel_cycle(self, reason=""):
+        """取消目前週期的所有待處理工作並直接返回偵測狀態"""
+        if self.current_state in (SystemState.DETECTING, SystemState.RESET):
+            return
+            
+        if self.cycle_token:
+            self.cycle_token.cancel(reason)
+        self.cycle_cancelled.emit(reason)
+        self.transition_to(SystemState.DETECTING)
+        
     def on_llm_complete(self, response):
         """AI 分析完成"""
         if self.current_state == SystemState.LLM_LOADING:
@@ -3,6 +3,7 @@
 
 import sys
 import os
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import Qt
 from ui import StartupWindow, MainWindow
@@ -141,4 +142,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # 打包後的執行檔啟動人臉偵測行程時需要
+    multiprocessing.freeze_support()
     sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+無視窗執行工具
+不建立任何視窗，以相機或錄影重播驅動完整流程（人臉偵測 → 狀態機 → AI 分析 → TTS → Arduino），
+每完成一個週期輸出各狀態耗時，用於伺服器或 CI 上量測整個週期的吞吐量。
+畫面顯示預設略過（no-op）；加上 --render 時以 offscreen 平台執行與主視窗相同的裁切、縮放與 QImage 轉換。
+
+用法:
+    python run_headless.py --replay replay.mp4 --no-llm --cycles 5
+    python run_headless.py --camera 0 --seconds 600 --csv cycles.csv
+    python run_headless.py --replay replay.mp4 --arduino /dev/ttyACM0 --render
+"""
+
+import sys
+import os
+import csv
+import time
+import signal
+import argparse
+import multiprocessing
+
+# 沒有顯示器時使用 offscreen 平台（須在建立 QGuiApplication 前設定）
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import cv2
+import numpy as np
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt6.QtGui import QGuiApplication
+from PyQt6.QtCore import QObject, QTimer
+
+from core import StateMachine, SystemState, CameraManager, FaceDetector, ArduinoController, FramePipeline
+from core.frame_selector import BestFrameSelector
+from core.detections import PortraitTransform
+from core.state_machine import NO_LLM_CAPTION
+from core.ssr_controller import SSRController
+from services import OllamaService, TTSService
+from services.ollama_service import FALLBACK_CAPTION, ERROR_CAPTION
+from ui.caption_widget import CaptionWidget
+from utils import ConfigLoader
+
+DISPLAY_SIZE = (1080, 1920)
+CYCLE_STATES = [state for state in SystemState]
+
+
+class HeadlessPipeline(QObject):
+    """與 MainWindow 相同的流程與信號連接，但不建立任何視窗元件
+
+    字幕與武器展示只保留時間軸：字幕以打字預估時間 + caption_wait_after 計時，
+    並等待 TTS 朗讀完成；武器依 weapon_config 的淡入、展示、淡出時間切換並控制 Arduino。
+    """
+
+    def __init__(self, options):
+        super().__init__()
+        self.options = options
+
+        # 載入設定
+        self.config_loader = ConfigLoader()
+        self.config = self.config_loader.load_period_config()
+        self.weapon_config = self.config_loader.load_weapon_config()
+
+        # 核心元件
+        self.state_machine = StateMachine(self.config)
+        self.state_machine.set_no_llm_mode(options.no_llm)
+        self.camera_manager = CameraManager()
+        self.face_detector = FaceDetector(self.config)
+        self.display_transform = PortraitTransform()
+        self.frame_selector = BestFrameSelector(window=float(self.config.get('screenshot_best_window', 1.0)))
+        self.frame_pipeline = FramePipeline()
+
+        # Arduino (選配)
+        self.arduino_controller = None
+        if options.arduino:
+            self.arduino_controller = ArduinoController()
+            self.arduino_controller.connect(options.arduino)
+        self.ssr_controller = SSRController(self.arduino_controller)
+
+        # 服務
+        self.ollama_service = OllamaService()
+        self.tts_service = TTSService(enabled=not options.no_tts)
+        if self.tts_service.is_available():
+            self.tts_service.warm_up_cache([NO_LLM_CAPTION, FALLBACK_CAPTION, ERROR_CAPTION])
+
+        # 週期狀態
+        self.current_screenshot_path = None
+        self.current_weapons = []
+        self.weapon_display_index = 0
+        self.caption_completed = False
+        self.tts_completed = True
+        self.wait_timer_completed = False
+        self.cycle_timers = []
+
+        # 計時
+        self.cycles = []  # 每個週期的紀錄
+        self.cycle_start = None
+        self.state_start = None
+        self.timed_state = None
+        self.state_times = {}
+        self.frame_ms = []
+        self.cycle_cancelled = False
+        self.first_frame_time = None
+
+        self.connect_signals()
+
+    def connect_signals(self):
+        """連接信號"""
+        self.state_machine.state_changed.connect(self.on_state_changed)
+        self.state_machine.state_changed.connect(self.frame_pipeline.on_state_changed)
+        self.frame_pipeline.stages_changed.connect(self.on_pipeline_stages_changed)
+        self.state_machine.screenshot_requested.connect(self.take_screenshot)
+        self.state_machine.llm_analysis_requested.connect(self.start_llm_analysis)
+        self.state_machine.caption_display_requested.connect(self.display_caption)
+        self.state_machine.spotlight_requested.connect(self.ssr_controller.start_spotlight)
+        self.state_machine.weapon_display_requested.connect(self.display_weapons)
+        self.state_machine.reset_requested.connect(self.reset_system)
+        self.state_machine.cycle_cancelled.connect(self.on_cycle_cancelled)
+
+        self.camera_manager.frame_ready.connect(self.process_frame)
+        self.camera_manager.error_occurred.connect(lambda message: print(f"相機錯誤: {message}"))
+        self.ollama_service.analysis_complete.connect(self.state_machine.on_llm_complete)
+        self.tts_service.tts_finished.connect(self.on_tts_finished)
+        self.ssr_controller.spotlight_ready.connect(self.state_machine.on_spotlight_ready)
+
+    def start(self):
+        """啟動相機與狀態機"""
+        source = self.options.replay if self.options.replay else self.options.camera
+        self.camera_manager.start(source)
+        self.state_machine.start()
+
+    # ---- 畫面處理 ----
+
+    def process_frame(self, frame):
+        """處理相機畫面（與 MainWindow.process_frame 相同，但不繪製偵測框）"""
+        start = time.perf_counter()
+        if self.first_frame_time is None:
+            self.first_frame_time = start
+            print(f"第一個畫面: {frame.shape[1]}x{frame.shape[0]}")
+
+        if self.frame_pipeline.is_idle():
+            return
+
+        if self.options.render and self.frame_pipeline.is_enabled('render'):
+            self.render_frame(frame)
+
+        if not self.frame_pipeline.is_enabled('detect'):
+            return
+
+        self.face_detector.process_frame(frame)
+        current_state = self.state_machine.current_state
+
+        boxes = self.face_detector.track_boxes.view()
+        display_boxes = self.display_transform.apply(boxes, frame.shape, *DISPLAY_SIZE)
+
+        if display_boxes and current_state == SystemState.DETECTING:
+            self.frame_selector.add(frame, boxes[self.display_transform.source_index[0]], time.monotonic())
+
+        if current_state in [SystemState.DETECTING, SystemState.LLM_LOADING]:
+            self.state_machine.update_face_tracks([box.track_id for box in display_boxes])
+
+        self.frame_ms.append((time.perf_counter() - start) * 1000)
+
+    def render_frame(self, frame):
+        """offscreen 顯示：裁切、縮放與 QImage 轉換（不輸出到螢幕）"""
+        height, width = frame.shape[:2]
+        crop_width = int(height * 9 / 16)
+        crop_x = (width - crop_width) // 2
+        portrait = cv2.resize(frame[:, crop_x:crop_x + crop_width], DISPLAY_SIZE, interpolation=cv2.INTER_LINEAR)
+        CameraManager.frame_to_qimage(portrait)
+
+    def on_pipeline_stages_changed(self, changed):
+        """畫面處理階段切換"""
+        if changed.get('detect') is True:
+            self.face_detector.reset()
+
+    # ---- 週期流程 ----
+
+    def take_screenshot(self):
+        """擷取畫面：使用最近畫面中品質最好的一幀"""
+        best = self.frame_selector.best()
+        self.current_screenshot_path = self.camera_manager.take_screenshot(best[0] if best else None)
+
+        if self.state_machine.cycle_token:
+            self.state_machine.cycle_token.add_callback(self.abort_cycle_work)
+
+        if self.current_screenshot_path and not self.options.no_llm:
+            self.state_machine.llm_analysis_requested.emit(self.current_screenshot_path)
+
+    def start_llm_analysis(self, image_path):
+        """開始 AI 分析"""
+        weapon_list = self.config_loader.get_weapon_list()
+        self.ollama_service.analyze_image(image_path, weapon_list, self.state_machine.cycle_token)
+
+    def display_caption(self, response):
+        """字幕時間軸：打字完成後等待 caption_wait_after
+
+        有 TTS 時與 MainWindow 的同步模式相同（預先合成模式同樣經 prepare_speech / play_prepared），
+        字幕在朗讀結束時完成；否則以打字預估時間計時。
+        """
+        self.caption_completed = False
+        self.wait_timer_completed = False
+        self.ssr_controller.start_caption_lighting()
+
+        caption_tc = response.get('caption_tc', '')
+        caption_en = response.get('caption', '')
+        self.current_weapons = response.get('weapons', [])
+
+        self.tts_completed = True
+        if caption_en and self.tts_service.is_available():
+            self.tts_completed = False
+            print(f"預估朗讀 {self.tts_service.get_estimated_duration(caption_en):.1f}s")
+            self.start_caption_speech(caption_en)
+            return
+
+        typing_speed = self.config.get('caption_typing_speed', 50)
+        typing_time = CaptionWidget.estimate_typing_duration(typing_speed, caption_tc, caption_en)
+        self.schedule_cycle_timer(typing_time * 1000, self.on_caption_typing_complete)
+
+    def start_caption_speech(self, caption_en):
+        """開始朗讀（與 MainWindow 相同：預先合成模式於截圖淡入期間合成、經音訊快取與句子串流，淡入後播放）"""
+        cycle_token = self.state_machine.cycle_token
+
+        if not self.tts_service.uses_presynthesis():
+            self.tts_service.speak_text(caption_en, cycle_token)
+            return
+
+        self.tts_service.prepare_speech(caption_en, cycle_token)
+        fade_in_delay = 0
+        if self.current_screenshot_path:
+            fade_in_delay = self.config.get('screenshot_fade_in', 1.0) * 1000
+        self.schedule_cycle_timer(fade_in_delay, self.tts_service.play_prepared)
+
+    def on_caption_typing_complete(self):
+        """字幕打字完成"""
+        self.caption_completed = True
+        wait_time = self.config.get('caption_wait_after', 2.0) * 1000
+        self.schedule_cycle_timer(wait_time, self.on_wait_timer_complete)
+
+    def on_tts_finished(self):
+        """TTS朗讀完成（同步模式的字幕同時完成）"""
+        self.tts_completed = True
+        if not self.caption_completed and self.state_machine.current_state == SystemState.CAPTION:
+            self.on_caption_typing_complete()
+        self.check_all_completed()
+
+    def on_wait_timer_complete(self):
+        """等待計時器完成"""
+        self.wait_timer_completed = True
+        self.check_all_completed()
+
+    def check_all_completed(self):
+        """檢查所有事件是否完成"""
+        if self.caption_completed and self.tts_completed and self.wait_timer_completed:
+            self.state_machine.on_caption_complete()
+
+    def display_weapons(self, weapon_ids):
+        """武器展示時間軸"""
+        self.weapon_display_index = 0
+        self.current_weapons = weapon_ids
+        self.display_next_weapon()
+
+    def display_next_weapon(self):
+        """切換到下一個武器並控制 Arduino"""
+        if self.weapon_display_index >= len(self.current_weapons):
+            self.ssr_controller.stop_all_lighting()
+            self.state_machine.on_weapon_display_complete()
+            return
+
+        weapon_info = self.weapon_config.get(self.current_weapons[self.weapon_display_index])
+        self.weapon_display_index += 1
+
+        total_time = 2000
+        if weapon_info:
+            if self.arduino_controller and weapon_info['pin']:
+                self.arduino_controller.control_pin(
+                    weapon_info['pin'],
+                    weapon_info['wait_before'],
+                    weapon_info['high_time'],
+                    weapon_info['wait_after']
+                )
+            total_time = (weapon_info.get('image_fade_in', 1.0) + weapon_info.get('image_display', 3.0) +
+                          weapon_info.get('image_fade_out', 1.0) +
+                          self.config.get('weapon_switch_delay', 0.5)) * 1000
+
+        self.schedule_cycle_timer(total_time, self.display_next_weapon)
+
+    def schedule_cycle_timer(self, delay_ms, callback):
+        """排程本週期的單次計時器，週期取消時會被停止"""
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.timeout.connect(callback)
+        timer.timeout.connect(lambda: self._release_cycle_timer(timer))
+        self.cycle_timers.append(timer)
+        timer.start(int(delay_ms))
+        return timer
+
+    def _release_cycle_timer(self, timer):
+        """移除已觸發的計時器"""
+        if timer in self.cycle_timers:
+            self.cycle_timers.remove(timer)
+        timer.deleteLater()
+
+    def abort_cycle_work(self):
+        """中止本週期所有待處理的計時器與 Arduino 指令"""
+        for timer in self.cycle_timers:
+            timer.stop()
+            timer.deleteLater()
+        self.cycle_timers = []
+        if self.arduino_controller:
+            self.arduino_controller.cancel_pending()
+
+    def on_cycle_cancelled(self, reason):
+        """週期被取消"""
+        print(f"週期取消 ({reason})")
+        self.cycle_cancelled = True
+        self.reset_system()
+        self.abort_cycle_work()
+
+    def reset_system(self):
+        """清除本週期的截圖與狀態並關閉燈光"""
+        if self.current_screenshot_path and os.path.exists(self.current_screenshot_path):
+            try:
+                os.remove(self.current_screenshot_path)
+            except OSError:
+                pass
+        self.current_screenshot_path = None
+        self.current_weapons = []
+        self.caption_completed = False
+        self.tts_completed = True
+        self.wait_timer_completed = False
+        self.ssr_controller.stop_all_lighting()
+
+    # ---- 週期計時 ----
+
+    def on_state_changed(self, state):
+        """累計各狀態耗時；返回 DETECTING 時結束一個週期"""
+        now = time.monotonic()
+        if self.timed_state is not None:
+            elapsed = now - self.state_start
+            self.state_times[self.timed_state] = self.state_times.get(self.timed_state, 0.0) + elapsed
+        self.state_start = now
+        self.timed_state = state
+
+        if state == SystemState.DETECTING:
+            # 週期自進入 DETECTING 開始（含等待訪客），到下一次回到 DETECTING 為止
+            if self.cycle_start is not None:
+                self.finish_cycle(now)
+            self.cycle_start = now
+            self.state_times = {}
+            self.frame_ms = []
+            self.cycle_cancelled = False
+            self.frame_selector.reset()
+
+    def finish_cycle(self, now):
+        """輸出一個週期的耗時"""
+        frame_ms = np.array(self.frame_ms) if self.frame_ms else np.zeros(1)
+        record = {
+            'cycle': len(self.cycles) + 1,
+            'total': now - self.cycle_start,
+            'cancelled': self.cycle_cancelled,
+            'frames': len(self.frame_ms),
+            'frame_p50': float(np.percentile(frame_ms, 50)),
+            'frame_p99': float(np.percentile(frame_ms, 99)),
+        }
+        for state in CYCLE_STATES:
+            record[state.value] = self.state_times.get(state, 0.0)
+        self.cycles.append(record)
+
+        parts = "、".join(f"{state.value} {record[state.value]:.2f}s"
+                         for state in CYCLE_STATES if record[state.value] > 0)
+        status = "（取消）" if record['cancelled'] else ""
+        print(f"週期 {record['cycle']}{status}：總計 {record['total']:.2f}s（{parts}），"
+              f"偵測幀 {record['frames']} 張 p50 {record['frame_p50']:.1f}ms p99 {record['frame_p99']:.1f}ms")
+
+        if self.options.cycles and len(self.cycles) >= self.options.cycles:
+            QTimer.singleShot(0, QGuiApplication.instance().quit)
+
+    def shutdown(self):
+        """停止所有元件"""
+        self.state_machine.stop()
+        self.camera_manager.stop()
+        self.face_detector.release()
+        if self.arduino_controller:
+            self.arduino_controller.disconnect()
+        self.ssr_controller.cleanup()
+        self.tts_service.shutdown()
+
+
+def write_csv(path, cycles):
+    """將每個週期的耗時寫入 CSV"""
+    fields = ['cycle', 'total', 'cancelled', 'frames', 'frame_p50', 'frame_p99'] + [state.value for state in CYCLE_STATES]
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(cycles)
+    print(f"已寫入 {path}")
+
+
+def main():
+    """主函數"""
+    parser = argparse.ArgumentParser(description="無視窗執行完整流程並量測週期耗時")
+    parser.add_argument('--camera', type=int, default=0, help="相機編號")
+    parser.add_argument('--replay', default=None, help="以錄影檔取代相機（循環播放）")
+    parser.add_argument('--arduino', default=None, help="Arduino 串口（未指定時不連接）")
+    parser.add_argument('--no-llm', action='store_true', help="跳過 AI 分析（No LLM 模式）")
+    parser.add_argument('--no-tts', action='store_true', help="停用 TTS 朗讀")
+    parser.add_argument('--render', action='store_true', help="執行 offscreen 畫面裁切與轉換（計入每幀耗時）")
+    parser.add_argument('--cycles', type=int, default=0, help="完成幾個週期後結束（0 為不限）")
+    parser.add_argument('--seconds', type=float, default=0, help="最多執行秒數（0 為不限）")
+    parser.add_argument('--csv', default=None, help="將每個週期的耗時寫入 CSV")
+    args = parser.parse_args()
+
+    # 設定工作目錄為腳本所在目錄（設定檔與截圖目錄使用相對路徑）
+    if args.replay:
+        args.replay = os.path.abspath(args.replay)
+        if not os.path.exists(args.replay):
+            print(f"找不到錄影檔: {args.replay}")
+            return 1
+    if args.csv:
+        args.csv = os.path.abspath(args.csv)
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    app = QGuiApplication(sys.argv)
+
+    print("=" * 60)
+    print("無視窗執行")
+    print("=" * 60)
+    print(f"來源: {args.replay or f'相機 {args.camera}'}，"
+          f"AI 分析: {'停用' if args.no_llm else '啟用'}，TTS: {'停用' if args.no_tts else '啟用'}，"
+          f"Arduino: {args.arduino or '未連接'}，畫面: {'offscreen' if args.render else '略過'}")
+
+    pipeline = HeadlessPipeline(args)
+
+    # Ctrl+C 結束：定期回到 Python 讓信號處理函式有機會執行
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    signal_timer = QTimer()
+    signal_timer.timeout.connect(lambda: None)
+    signal_timer.start(200)
+
+    if args.seconds > 0:
+        QTimer.singleShot(int(args.seconds * 1000), app.quit)
+    QTimer.singleShot(0, pipeline.start)
+
+    start = time.monotonic()
+    app.exec()
+    elapsed = time.monotonic() - start
+    pipeline.shutdown()
+
+    print()
+    print("=" * 60)
+    cycles = pipeline.cycles
+    if not cycles:
+        print(f"執行 {elapsed:.0f} 秒，沒有完成任何週期")
+        return 0
+
+    totals = np.array([cycle['total'] for cycle in cycles])
+    p50, p90 = np.percentile(totals, [50, 90])
+    cancelled = sum(1 for cycle in cycles if cycle['cancelled'])
+    print(f"完成 {len(cycles)} 個週期（取消 {cancelled}），執行 {elapsed:.0f} 秒")
+    print(f"週期耗時 平均 {totals.mean():.2f}s  p50 {p50:.2f}s  p90 {p90:.2f}s")
+    print(f"吞吐量 {len(cycles) / elapsed * 3600:.1f} 週期/小時")
+    for state in CYCLE_STATES:
+        durations = [cycle[state.value] for cycle in cycles]
+        if any(durations):
+            print(f"  {state.value:<20}平均 {np.mean(durations):.2f}s")
+
+    if args.csv:
+        write_csv(args.csv, cycles)
+    return 0
+
+
+if __name__ == "__main__":
+    # 偵測行程模式使用 spawn 啟動子行程
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -8,6 +8,12 @@ import json
 import os
 import re
 
+from core.cancellation import CycleCancelled
+
+
+# 預設回應字幕（策略生成失敗 / 服務不可用時使用）
+FALLBACK_CAPTION = 'Defense protocol activated.'
+ERROR_CAPTION = 'System analysis unavailable. Activating default protocol.'
 
 class OllamaThread(QThread):
     """Ollama 執行緒"""
@@ -15,11 +21,12 @@ class OllamaThread(QThread):
     error_occurred = pyqtSignal(str)
     progress_update = pyqtSignal(str)
     
-    def __init__(self, image_path, weapon_list, prompt_template):
+    def __init__(self, image_path, weapon_list, prompt_template, cancel_token=None):
         super().__init__()
         self.image_path = image_path
         self.weapon_list = weapon_list
         self.prompt_template = prompt_template
+        self.cancel_token = cancel_token
         
         # 模型設定
         self.img_model = "llava"
@@ -39,11 +46,41 @@ class OllamaThread(QThread):
             self.progress_update.emit("正在生成策略...")
             response = self._generate_strategy(image_description)
             
+            self._check_cancelled()
             self.result_ready.emit(response)
             
+        except CycleCancelled:
+            print("AI 分析已取消")
         except Exception as e:
             self.error_occurred.emit(str(e))
             
+    def _check_cancelled(self):
+        """檢查週期是否已取消"""
+        if self.cancel_token:
+            self.cancel_token.raise_if_cancelled()
+            
+    def _generate(self, model, prompt, images=None):
+        """以串流方式呼叫模型，每收到一段回應就檢查是否已取消"""
+        self._check_cancelled()
+        
+        kwargs = {'model': model, 'prompt': prompt, 'stream': True}
+        if images:
+            kwargs['images'] = images
+            
+        parts = []
+        stream = ollama.generate(**kwargs)
+        try:
+            for chunk in stream:
+                # 取消時中斷迴圈，關閉串流即中止 HTTP 請求
+                self._check_cancelled()
+                parts.append(chunk['response'] or '')
+        finally:
+            close = getattr(stream, 'close', None)
+            if close:
+                close()
+                
+        return {'response': ''.join(parts)}
+            
     def _analyze_image(self):
         """使用圖像模型分析圖片"""
         try:
@@ -52,7 +89,7 @@ class OllamaThread(QThread):
                 image_data = base64.b64encode(f.read()).decode()
                 
             # 呼叫 llava 模型
-            response = ollama.generate(
+            response = self._generate(
                 model=self.img_model,
                 prompt="Describe this person's appearance, clothing, and any notable features in detail.",
                 images=[image_data]
@@ -65,6 +102,8 @@ class OllamaThread(QThread):
                 print("=" * 50)
                 return response['response']
                 
+        except CycleCancelled:
+            raise
         except Exception as e:
             print(f"圖像分析錯誤: {e}")
             
@@ -86,7 +125,7 @@ class OllamaThread(QThread):
             )
             
             # 呼叫 yi 模型
-            response = ollama.generate(
+            response = self._generate(
                 model=self.desc_model,
                 prompt=prompt
             )
@@ -100,12 +139,14 @@ class OllamaThread(QThread):
                 # 解析回應
                 return self._parse_response(response['response'])
                 
+        except CycleCancelled:
+            raise
         except Exception as e:
             print(f"策略生成錯誤: {e}")
             
         # 返回預設回應
         return {
-            'caption': 'Defense protocol activated.',
+            'caption': FALLBACK_CAPTION,
             'caption_tc': '防禦協議已啟動。',
             'weapons': ['01', '02']
         }
@@ -255,6 +296,8 @@ class OllamaService(QObject):
     def __init__(self):
         super().__init__()
         self.thread = None
+        self.cancel_token = None
+        self.stale_threads = []  # 已取消但尚未結束的執行緒
         self.prompt_template = self._load_prompt_template()
         
     def _load_prompt_template(self):
@@ -280,24 +323,51 @@ Caption_TC: [繁體中文生存策略，80字內]
 Caption_EN: [English survival strategy, within 80 words]
 Weapons: [weapon1_id, weapon2_id, weapon3_id]"""
 
-    def analyze_image(self, image_path, weapon_list):
+    def analyze_image(self, image_path, weapon_list, cancel_token=None):
         """分析圖像"""
         if self.thread and self.thread.isRunning():
             return
             
-        self.thread = OllamaThread(image_path, weapon_list, self.prompt_template)
+        self.cancel_token = cancel_token
+        self.thread = OllamaThread(image_path, weapon_list, self.prompt_template, cancel_token)
         self.thread.result_ready.connect(self.analysis_complete.emit)
         self.thread.error_occurred.connect(self._handle_error)
         self.thread.progress_update.connect(self.progress_update.emit)
         self.thread.start()
         
+        if cancel_token:
+            cancel_token.add_callback(self.cancel)
+        
+    def cancel(self):
+        """放棄目前的分析，結果將不再送出"""
+        if self.thread and self.thread.isRunning():
+            # 執行緒會在下一段串流回應時結束，不需等待
+            self._retire_thread(self.thread)
+            self.thread = None
+            
+    def _retire_thread(self, thread):
+        """中斷執行緒的信號連接，保留參照直到其結束"""
+        try:
+            thread.result_ready.disconnect()
+            thread.error_occurred.disconnect()
+            thread.progress_update.disconnect()
+        except TypeError:
+            pass
+            
+        # 清除已結束的舊執行緒（仍在執行的 QThread 不可被回收）
+        self.stale_threads = [t for t in self.stale_threads if not t.isFinished()]
+        self.stale_threads.append(thread)
+        
     def _handle_error(self, error):
         """處理錯誤"""
         print(f"Ollama 錯誤: {error}")
         
+        if self.cancel_token and self.cancel_token.is_cancelled:
+            return
+        
         # 使用預設回應
         default_response = {
-            'caption': 'System analysis unavailable. Activating default protocol.',
+            'caption': ERROR_CAPTION,
             'caption_tc': '系統分析不可用。啟動預設協議。',
             'weapons': ['01', '02']
         }
@@ -0,0 +1,391 @@
+# Location: project_v2/services/tts_audio.py
+# Usage: 預先合成的 TTS 音訊：WAV 分析、單詞時間軸與低延遲播放
+
+import re
+import time
+import wave
+from collections import deque
+import numpy as np
+from PyQt6.QtCore import Qt, QObject, QTimer, QUrl, pyqtSignal
+
+
+class WordTiming:
+    """單一單詞在音訊中的時間與字元範圍"""
+
+    __slots__ = ('start', 'end', 'char_start', 'char_end')
+
+    def __init__(self, start, end, char_start, char_end):
+        self.start = start
+        self.end = end
+        self.char_start = char_start
+        self.char_end = char_end
+
+
+class SynthesizedSpeech:
+    """已合成完成的語音片段"""
+
+    def __init__(self, text, audio_path, duration, word_timings):
+        self.text = text
+        self.audio_path = audio_path
+        self.duration = duration
+        self.word_timings = word_timings
+        self.is_cached = False  # 快取中的檔案播放後不可刪除
+        self.voiced_end = None  # 最後一段有聲區段的結束時間
+        self.tag = None  # 呼叫端附加的識別資訊
+
+    @property
+    def playback_end(self):
+        """實際需要播放的長度（略過結尾靜音，以便下一句無縫接上）"""
+        if self.voiced_end is None:
+            return self.duration
+        return min(self.duration, self.voiced_end + 0.08)
+
+    def position_at(self, elapsed):
+        """依播放時間換算目前應顯示到的字元位置"""
+        if elapsed >= self.duration:
+            return len(self.text)
+
+        position = 0
+        for timing in self.word_timings:
+            if elapsed < timing.start:
+                break
+            if elapsed >= timing.end:
+                position = timing.char_end
+                continue
+            # 單詞朗讀中：在字元範圍內線性推進
+            span = max(timing.end - timing.start, 1e-6)
+            fraction = (elapsed - timing.start) / span
+            position = timing.char_start + int(round((timing.char_end - timing.char_start) * fraction))
+            break
+
+        return position
+
+
+def read_wav_samples(path):
+    """讀取 WAV 檔，回傳 (單聲道浮點樣本, 取樣率)"""
+    with wave.open(path, 'rb') as wav:
+        sample_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        raw = wav.readframes(wav.getnframes())
+
+    if sample_width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+    elif sample_width == 4:
+        samples = np.frombuffer(raw, dtype=np.int32).astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"不支援的取樣寬度: {sample_width}")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+
+    return samples, sample_rate
+
+
+def find_voiced_segments(samples, sample_rate, min_pause_ms=120, frame_ms=10, threshold_db=-35.0):
+    """以短時能量偵測有聲區段，回傳 [(開始秒, 結束秒), ...]"""
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    frame_count = len(samples) // frame_len
+    if frame_count == 0:
+        return []
+
+    frames = samples[:frame_count * frame_len].reshape(frame_count, frame_len)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    peak = float(rms.max())
+    if peak <= 0:
+        return []
+
+    voiced = rms > peak * (10.0 ** (threshold_db / 20.0))
+
+    # 找出有聲區段的邊界
+    edges = np.diff(voiced.astype(np.int8))
+    starts = list(np.where(edges == 1)[0] + 1)
+    ends = list(np.where(edges == -1)[0] + 1)
+    if voiced[0]:
+        starts.insert(0, 0)
+    if voiced[-1]:
+        ends.append(frame_count)
+
+    # 合併短於最小停頓的靜音間隔
+    min_gap_frames = max(1, int(min_pause_ms / frame_ms))
+    segments = []
+    for start, end in zip(starts, ends):
+        if segments and start - segments[-1][1] < min_gap_frames:
+            segments[-1][1] = end
+        else:
+            segments.append([start, end])
+
+    frame_sec = frame_len / sample_rate
+    return [(start * frame_sec, end * frame_sec) for start, end in segments]
+
+
+def _split_words(text):
+    """切分單詞，回傳 [(開始索引, 結束索引, 是否為片語結尾)]"""
+    words = []
+    for match in re.finditer(r'\S+', text):
+        phrase_end = bool(re.search(r'[,.;:!?]$', match.group()))
+        words.append((match.start(), match.end(), phrase_end))
+    return words
+
+
+def _distribute_words(words, segments):
+    """依字元數比例將單詞分配到有聲區段（略過其間的靜音）"""
+    total_voiced = sum(end - start for start, end in segments)
+    total_chars = sum(char_end - char_start + 1 for char_start, char_end, _ in words)
+    if total_voiced <= 0 or total_chars <= 0:
+        return []
+
+    def voiced_to_real(voiced_time):
+        for start, end in segments:
+            length = end - start
+            if voiced_time <= length:
+                return start + voiced_time
+            voiced_time -= length
+        return segments[-1][1]
+
+    timings = []
+    consumed = 0
+    for char_start, char_end, _ in words:
+        weight = char_end - char_start + 1
+        word_start = voiced_to_real(total_voiced * consumed / total_chars)
+        consumed += weight
+        word_end = voiced_to_real(total_voiced * consumed / total_chars)
+        timings.append(WordTiming(word_start, word_end, char_start, char_end))
+
+    return timings
+
+
+def estimate_word_timings(text, segments):
+    """將文字對齊到音訊的有聲區段
+
+    以標點切分片語；若偵測到的長停頓數量足以區隔所有片語，
+    則每個片語對應到一段語音，否則整段語音依字元數比例分配。
+    """
+    words = _split_words(text)
+    if not words or not segments:
+        return []
+
+    phrases = []
+    current = []
+    for word in words:
+        current.append(word)
+        if word[2]:
+            phrases.append(current)
+            current = []
+    if current:
+        phrases.append(current)
+
+    gaps = [(segments[i + 1][0] - segments[i][1], i) for i in range(len(segments) - 1)]
+    needed = len(phrases) - 1
+
+    if needed <= 0 or len(gaps) < needed:
+        return _distribute_words(words, segments)
+
+    # 取最長的停頓作為片語邊界
+    boundaries = sorted(index for _, index in sorted(gaps, reverse=True)[:needed])
+
+    timings = []
+    segment_start = 0
+    for phrase, boundary in zip(phrases, boundaries + [len(segments) - 1]):
+        timings.extend(_distribute_words(phrase, segments[segment_start:boundary + 1]))
+        segment_start = boundary + 1
+
+    return timings
+
+
+def analyze_speech_file(text, audio_path, min_pause_ms=120):
+    """分析合成音訊並建立 SynthesizedSpeech"""
+    samples, sample_rate = read_wav_samples(audio_path)
+    if len(samples) == 0:
+        raise ValueError("合成音訊為空")
+
+    duration = len(samples) / sample_rate
+    segments = find_voiced_segments(samples, sample_rate, min_pause_ms)
+    timings = estimate_word_timings(text, segments)
+
+    speech = SynthesizedSpeech(text, audio_path, duration, timings)
+    if segments:
+        speech.voiced_end = segments[-1][1]
+    return speech
+
+
+class SentenceSplitter:
+    """將陸續到達的文字片段切分為完整句子，並記錄每句在全文中的位置"""
+
+    SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+')
+
+    def __init__(self):
+        self.buffer = ""
+        self.buffer_offset = 0  # buffer 開頭在全文中的位置
+
+    def feed(self, chunk):
+        """加入文字片段，回傳新完成的句子 [(全文位置, 句子), ...]"""
+        self.buffer += chunk
+        sentences = []
+
+        while True:
+            match = self.SENTENCE_END.search(self.buffer)
+            if not match:
+                break
+            sentences.extend(self._take(match.end()))
+
+        return sentences
+
+    def flush(self):
+        """文字結束，回傳剩餘內容"""
+        return self._take(len(self.buffer))
+
+    def _take(self, end):
+        """從 buffer 取出前 end 個字元作為一句"""
+        raw = self.buffer[:end]
+        offset = self.buffer_offset + (len(raw) - len(raw.lstrip()))
+        sentence = raw.strip()
+
+        self.buffer = self.buffer[end:]
+        self.buffer_offset += end
+
+        return [(offset, sentence)] if sentence else []
+
+
+class SpeechPlayer(QObject):
+    """低延遲音訊播放器
+
+    依序播放預先載入的語音片段：每一段在有聲內容結束時立即接上下一段，
+    並以單調時鐘推算播放位置，回報在全文中的字元進度。
+    """
+
+    playback_started = pyqtSignal()
+    segment_finished = pyqtSignal(object)  # 單一片段播放完畢（SynthesizedSpeech）
+    queue_drained = pyqtSignal()  # 佇列已播完（串流可能仍有後續片段）
+    playback_error = pyqtSignal(str)
+    progress = pyqtSignal(int, int)  # (當前字符位置, 總字符數)
+
+    def __init__(self, progress_interval=50, volume=1.0):
+        super().__init__()
+        self.segments = deque()  # [(speech, 全文位置, effect)]
+        self.current = None
+        self.previous_effect = None
+        self.start_time = None
+        self.volume = volume
+        self.total_length = 0
+
+        self.progress_timer = QTimer()
+        self.progress_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.progress_timer.timeout.connect(self._report_progress)
+        self.progress_interval = progress_interval
+
+        # 片段結束計時器：在有聲內容結束時切換到下一段
+        self.segment_timer = QTimer()
+        self.segment_timer.setSingleShot(True)
+        self.segment_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.segment_timer.timeout.connect(self._on_segment_end)
+
+        try:
+            from PyQt6.QtMultimedia import QSoundEffect
+            self._effect_class = QSoundEffect
+        except Exception as e:
+            print(f"TTS: 無法載入 QtMultimedia，預先合成模式不可用: {e}")
+            self._effect_class = None
+
+    def is_available(self):
+        """播放器是否可用"""
+        return self._effect_class is not None
+
+    def is_playing(self):
+        """是否正在播放"""
+        return self.current is not None
+
+    def enqueue(self, speech, offset=0):
+        """加入語音片段並立即預先載入，使播放能無延遲開始"""
+        if not self._effect_class:
+            return False
+
+        effect = self._effect_class()
+        effect.setSource(QUrl.fromLocalFile(speech.audio_path))
+        effect.setVolume(self.volume)
+        self.segments.append((speech, offset, effect))
+        return True
+
+    def play(self):
+        """若目前閒置則開始播放佇列中的下一段"""
+        if self.current is None and self.segments:
+            self._start_next()
+
+    def _start_next(self):
+        """播放下一段"""
+        first_segment = self.start_time is None
+        self.current = self.segments.popleft()
+        speech, _, effect = self.current
+
+        effect.play()
+        self.start_time = time.monotonic()
+        self.segment_timer.start(max(1, int(speech.playback_end * 1000)))
+
+        if not self.progress_timer.isActive():
+            self.progress_timer.start(self.progress_interval)
+        if first_segment:
+            self.playback_started.emit()
+
+    def _on_segment_end(self):
+        """目前片段的有聲內容已結束"""
+        if self.current is None:
+            return
+
+        speech, offset, effect = self.current
+        self.progress.emit(offset + len(speech.text), self.total_length)
+
+        # 上一段的結尾靜音可能仍在播放，於下一段結束時再釋放
+        self._release_effect(self.previous_effect)
+        self.previous_effect = effect
+        self.current = None
+
+        if self.segments:
+            self._start_next()
+        else:
+            self.progress_timer.stop()
+
+        # 接收端可能在此加入並開始下一段
+        self.segment_finished.emit(speech)
+        if self.current is None:
+            self.queue_drained.emit()
+
+    def elapsed(self):
+        """目前片段的播放秒數"""
+        if self.start_time is None or self.current is None:
+            return 0.0
+        return time.monotonic() - self.start_time
+
+    def stop(self):
+        """停止播放並清空佇列"""
+        self.progress_timer.stop()
+        self.segment_timer.stop()
+
+        if self.current:
+            self._release_effect(self.current[2])
+            self.current = None
+        while self.segments:
+            self._release_effect(self.segments.popleft()[2])
+        self._release_effect(self.previous_effect)
+        self.previous_effect = None
+
+        self.start_time = None
+        self.total_length = 0
+
+    def _release_effect(self, effect):
+        """停止並釋放 QSoundEffect"""
+        if effect:
+            effect.stop()
+            effect.deleteLater()
+
+    def _report_progress(self):
+        """依播放時間回報字元進度"""
+        if self.current is None:
+            return
+
+        speech, offset, _ = self.current
+        position = offset + speech.position_at(self.elapsed())
+        self.progress.emit(position, max(self.total_length, position))
+
+
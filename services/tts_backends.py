@@ -0,0 +1,319 @@
+# Location: project_v2/services/tts_backends.py
+# Usage: 可替換的離線 TTS 合成後端（pyttsx3 / espeak-ng / piper ONNX），於獨立行程中合成並串流回傳 PCM
+
+import os
+import wave
+import shutil
+import tempfile
+import subprocess
+import multiprocessing
+import queue
+import time
+import numpy as np
+
+
+# 每次回傳的 PCM 長度（取樣數）
+CHUNK_FRAMES = 4096
+
+
+class TTSBackend:
+    """合成後端介面
+
+    子類別實作 is_available() 與 stream()；stream() 依序產生
+    (取樣率, 16-bit 單聲道 PCM 位元組)。後端只在合成行程中建立。
+    """
+
+    name = 'base'
+
+    def __init__(self, options):
+        self.options = options
+
+    def is_available(self):
+        """後端所需的套件或執行檔是否存在"""
+        return False
+
+    def stream(self, text):
+        """合成文本並逐段產生 PCM"""
+        raise NotImplementedError
+
+    def describe(self):
+        """用於快取鍵的語音描述"""
+        return self.name
+
+
+def _stream_wav_file(wav):
+    """從已開啟的 wave 物件逐段讀出 PCM（非 16-bit 或多聲道時轉換）"""
+    sample_rate = wav.getframerate()
+    channels = wav.getnchannels()
+    sample_width = wav.getsampwidth()
+
+    while True:
+        frames = wav.readframes(CHUNK_FRAMES)
+        if not frames:
+            break
+        if sample_width != 2 or channels != 1:
+            frames = _to_int16_mono(frames, sample_width, channels)
+        yield sample_rate, frames
+
+
+def _to_int16_mono(frames, sample_width, channels):
+    """將 PCM 轉為 16-bit 單聲道"""
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.int16) - 128) << 8
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype=np.int16)
+    elif sample_width == 4:
+        samples = (np.frombuffer(frames, dtype=np.int32) >> 16).astype(np.int16)
+    else:
+        raise ValueError(f"不支援的取樣寬度: {sample_width}")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples.tobytes()
+
+
+class Pyttsx3Backend(TTSBackend):
+    """pyttsx3（系統語音：SAPI5 / NSSS / espeak）"""
+
+    name = 'pyttsx3'
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.engine = None
+
+    def is_available(self):
+        try:
+            import pyttsx3
+            engine_name = self.options.get('engine_priority', 'sapi5')
+            self.engine = pyttsx3.init('sapi5') if engine_name == 'sapi5' else pyttsx3.init()
+        except Exception:
+            return False
+
+        voice_id = self.options.get('voice_id')
+        if voice_id:
+            self.engine.setProperty('voice', voice_id)
+        self.engine.setProperty('rate', self.options.get('rate', 120))
+        self.engine.setProperty('volume', self.options.get('volume', 0.7))
+        return True
+
+    def stream(self, text):
+        # pyttsx3 只能輸出檔案，合成完成後再分段回傳
+        fd, path = tempfile.mkstemp(suffix='.wav', prefix='tts_backend_')
+        os.close(fd)
+        try:
+            self.engine.save_to_file(text, path)
+            self.engine.runAndWait()
+            with wave.open(path, 'rb') as wav:
+                yield from _stream_wav_file(wav)
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def describe(self):
+        return f"pyttsx3:{self.options.get('voice_id', '')}"
+
+
+class EspeakBackend(TTSBackend):
+    """espeak-ng 命令列（邊合成邊由 stdout 讀取 WAV）"""
+
+    name = 'espeak-ng'
+
+    def _executable(self):
+        return shutil.which('espeak-ng') or shutil.which('espeak')
+
+    def is_available(self):
+        return self._executable() is not None
+
+    def stream(self, text):
+        # espeak 的 -a 音量為 0-200，-p 音調為 0-99（預設 50）
+        volume = int(self.options.get('volume', 0.7) * 200)
+        pitch = max(0, min(99, 50 + self.options.get('pitch', 0) // 2))
+        command = [
+            self._executable(), '--stdout',
+            '-v', self.options.get('espeak_voice', 'en-us'),
+            '-s', str(self.options.get('rate', 120)),
+            '-a', str(volume),
+            '-p', str(pitch),
+            text
+        ]
+
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            with wave.open(process.stdout, 'rb') as wav:
+                yield from _stream_wav_file(wav)
+        finally:
+            process.stdout.close()
+            process.wait(timeout=5)
+
+    def describe(self):
+        return f"espeak-ng:{self.options.get('espeak_voice', 'en-us')}"
+
+
+class PiperBackend(TTSBackend):
+    """piper 神經網路語音（ONNX 模型，逐段產生音訊）"""
+
+    name = 'piper'
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.voice = None
+
+    def is_available(self):
+        model_path = self.options.get('piper_model_path', '')
+        if not model_path or not os.path.exists(model_path):
+            return False
+        try:
+            from piper import PiperVoice
+            self.voice = PiperVoice.load(model_path)
+        except Exception:
+            return False
+        return True
+
+    def stream(self, text):
+        sample_rate = self.voice.config.sample_rate
+        length_scale = self.options.get('piper_length_scale', 1.0)
+
+        if hasattr(self.voice, 'synthesize_stream_raw'):
+            # piper-tts 1.2
+            for audio_bytes in self.voice.synthesize_stream_raw(text, length_scale=length_scale):
+                yield sample_rate, audio_bytes
+        else:
+            # piper-tts 1.3 以後
+            from piper import SynthesisConfig
+            config = SynthesisConfig(length_scale=length_scale)
+            for chunk in self.voice.synthesize(text, syn_config=config):
+                yield chunk.sample_rate, chunk.audio_int16_bytes
+
+    def describe(self):
+        model_name = os.path.basename(self.options.get('piper_model_path', ''))
+        return f"piper:{model_name}:{self.options.get('piper_length_scale', 1.0)}"
+
+
+BACKENDS = {
+    Pyttsx3Backend.name: Pyttsx3Backend,
+    EspeakBackend.name: EspeakBackend,
+    PiperBackend.name: PiperBackend
+}
+
+
+def _synthesis_process_main(backend_name, options, request_queue, result_queue):
+    """合成行程主程式：接收文本，逐段回傳 PCM"""
+    backend = BACKENDS[backend_name](options)
+    if not backend.is_available():
+        result_queue.put(('ready', None, False, f"後端 {backend_name} 無法使用"))
+        return
+    result_queue.put(('ready', None, True, backend.describe()))
+
+    while True:
+        request = request_queue.get()
+        if request is None:
+            break
+
+        job_id, text = request
+        try:
+            started = False
+            for sample_rate, pcm in backend.stream(text):
+                if not started:
+                    result_queue.put(('start', job_id, sample_rate, None))
+                    started = True
+                result_queue.put(('pcm', job_id, pcm, None))
+            result_queue.put(('end', job_id, started, None))
+        except Exception as e:
+            result_queue.put(('error', job_id, str(e), None))
+
+
+class ProcessSynthesizer:
+    """在獨立行程中執行合成後端
+
+    合成不與 GUI 共用 GIL；PCM 以小段串流回傳並直接寫入 WAV 檔。
+    由 TTSWorker 線程呼叫，一次處理一個工作。
+    """
+
+    def __init__(self, backend_name, options, start_timeout=20.0):
+        self.backend_name = backend_name
+        self.description = backend_name
+        self.job_counter = 0
+
+        context = multiprocessing.get_context('spawn')
+        self.request_queue = context.Queue()
+        self.result_queue = context.Queue()
+        self.process = context.Process(
+            target=_synthesis_process_main,
+            args=(backend_name, options, self.request_queue, self.result_queue),
+            daemon=True
+        )
+        self.process.start()
+
+        # 等待後端載入（神經網路模型可能需要數秒）
+        try:
+            _, _, ready, detail = self.result_queue.get(timeout=start_timeout)
+        except queue.Empty:
+            ready, detail = False, "合成行程啟動逾時"
+
+        if not ready:
+            self.shutdown()
+            raise RuntimeError(detail)
+        self.description = detail
+
+    def synthesize_to_file(self, text, path, timeout=15.0):
+        """合成文本並寫入 WAV，回傳 (音訊秒數, 首段 PCM 延遲秒數)"""
+        self.job_counter += 1
+        job_id = self.job_counter
+        self.request_queue.put((job_id, text))
+
+        request_time = time.perf_counter()
+        first_chunk_latency = None
+        frames = 0
+        wav = None
+        deadline = request_time + timeout
+
+        try:
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    raise TimeoutError(f"合成超過 {timeout:.0f} 秒")
+                try:
+                    kind, result_id, payload, _ = self.result_queue.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if result_id != job_id:
+                    continue  # 逾時工作遺留的結果
+
+                if kind == 'start':
+                    wav = wave.open(path, 'wb')
+                    wav.setnchannels(1)
+                    wav.setsampwidth(2)
+                    wav.setframerate(payload)
+                    sample_rate = payload
+                elif kind == 'pcm':
+                    if first_chunk_latency is None:
+                        first_chunk_latency = time.perf_counter() - request_time
+                    wav.writeframes(payload)
+                    frames += len(payload) // 2
+                elif kind == 'end':
+                    if not payload:
+                        raise RuntimeError("合成結果為空")
+                    break
+                elif kind == 'error':
+                    raise RuntimeError(payload)
+        finally:
+            if wav:
+                wav.close()
+
+        return frames / sample_rate, first_chunk_latency or 0.0
+
+    def is_alive(self):
+        """合成行程是否仍在執行"""
+        return self.process.is_alive()
+
+    def shutdown(self):
+        """結束合成行程"""
+        try:
+            self.request_queue.put(None)
+        except Exception:
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.terminate()
@@ -0,0 +1,117 @@
+# Location: project_v2/services/tts_cache.py
+# Usage: TTS 合成音訊的磁碟快取，以內容雜湊為鍵並依容量做 LRU 淘汰
+
+import os
+import json
+import hashlib
+import threading
+
+
+class TTSAudioCache:
+    """內容定址的 TTS 音訊快取
+
+    鍵由文本、語音 ID、語速、音量與音調組成；檔案修改時間作為最近使用時間，
+    總容量超過上限時從最久未使用的檔案開始刪除（已固定的項目除外）。
+    """
+
+    def __init__(self, cache_dir='tts_cache', max_size_mb=50):
+        self.cache_dir = cache_dir
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.pinned_keys = set()
+        self.lock = threading.Lock()
+
+        # 統計
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text, voice_id, rate, volume, pitch):
+        """計算快取鍵"""
+        payload = json.dumps({
+            'text': text,
+            'voice_id': str(voice_id),
+            'rate': int(rate),
+            'volume': round(float(volume), 3),
+            'pitch': int(pitch)
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        """快取檔案路徑"""
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def temp_path_for(self, key):
+        """合成用的暫存路徑（完成後再移入快取）"""
+        return os.path.join(self.cache_dir, f"{key}.tmp.wav")
+
+    def lookup(self, key):
+        """查詢快取，命中時更新最近使用時間並回傳路徑"""
+        path = self.path_for(key)
+        with self.lock:
+            if os.path.exists(path) and os.path.getsize(path) > 0:
+                try:
+                    os.utime(path, None)
+                except OSError:
+                    pass
+                self.hits += 1
+                return path
+            self.misses += 1
+        return None
+
+    def store(self, key, source_path):
+        """將合成完成的檔案移入快取，並視需要淘汰舊項目"""
+        path = self.path_for(key)
+        with self.lock:
+            os.replace(source_path, path)
+            self._evict()
+        return path
+
+    def pin(self, key):
+        """固定項目，不參與淘汰"""
+        with self.lock:
+            self.pinned_keys.add(key)
+
+    def _evict(self):
+        """容量超過上限時刪除最久未使用的項目"""
+        entries = []
+        total_size = 0
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith('.wav') or filename.endswith('.tmp.wav'):
+                continue
+            path = os.path.join(self.cache_dir, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            total_size += stat.st_size
+            entries.append((stat.st_mtime, stat.st_size, filename[:-4], path))
+
+        if total_size <= self.max_size:
+            return
+
+        for _, size, key, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            if key in self.pinned_keys:
+                continue
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError:
+                pass
+
+    def get_stats(self):
+        """快取統計"""
+        with self.lock:
+            files = [f for f in os.listdir(self.cache_dir)
+                     if f.endswith('.wav') and not f.endswith('.tmp.wav')]
+            size = sum(os.path.getsize(os.path.join(self.cache_dir, f)) for f in files)
+            return {
+                'entries': len(files),
+                'size_mb': size / (1024 * 1024),
+                'pinned': len(self.pinned_keys),
+                'hits': self.hits,
+                'misses': self.misses
+            }
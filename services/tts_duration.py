@@ -0,0 +1,170 @@
+# Location: project_v2/services/tts_duration.py
+# Usage: 以實際量測的朗讀時間校正的語音時長模型（依語音與語速分別擬合）
+
+import os
+import re
+import json
+import threading
+import numpy as np
+
+
+class SpeechDurationModel:
+    """語音時長模型
+
+    特徵取自實際送入引擎的文本（_process_text_pauses 處理後），
+    包含字元數、單詞數、句末停頓、逗號停頓、其他標點與停頓標記秒數。
+    每個語音 ID + 語速各自以脊迴歸擬合，並向經驗公式收斂：
+    樣本少時接近原本的估算，樣本越多越貼近實測。
+    """
+
+    FEATURES = ('chars', 'words', 'sentence_pauses', 'comma_pauses',
+                'other_punctuation', 'pause_seconds', 'intercept')
+
+    def __init__(self, model_path='tts_duration_model.json', max_samples=200, prior_weight=1.0):
+        self.model_path = model_path
+        self.max_samples = max_samples
+        self.prior_weight = prior_weight
+        self.lock = threading.Lock()
+
+        self.samples = {}  # voice_key -> [[特徵..., 實測秒數], ...]
+        self.coefficients = {}  # voice_key -> 擬合係數（記錄新樣本時失效）
+
+        self.load()
+
+    @staticmethod
+    def voice_key(voice_id, rate):
+        """模型鍵：語音 ID 與語速"""
+        return f"{voice_id}@{int(rate)}"
+
+    @staticmethod
+    def extract_features(processed_text):
+        """從送入引擎的文本取出特徵向量"""
+        # 停頓標記：SSML <break time="Xs"/> 或未移除的 [pause:X]
+        pause_seconds = sum(float(value) for value in
+                            re.findall(r'<break time="(\d+\.?\d*)s"/>', processed_text))
+        pause_seconds += sum(float(value) for value in
+                             re.findall(r'\[pause:(\d+\.?\d*)\]', processed_text))
+        text = re.sub(r'<[^>]+>|\[pause:[^\]]*\]', ' ', processed_text)
+
+        return np.array([
+            len(re.findall(r'[A-Za-z0-9]', text)),
+            len(re.findall(r'[A-Za-z0-9]+', text)),
+            len(re.findall(r'\.+|[!?]+', text)),  # '. ' 改寫為 '... ' 後仍視為一次停頓
+            len(re.findall(r',+', text)),  # ', ' 改寫為 ',, ' 後仍視為一次停頓
+            len(re.findall(r'[;:]', text)),
+            pause_seconds,
+            1.0
+        ], dtype=np.float64)
+
+    @staticmethod
+    def prior_coefficients(rate):
+        """經驗公式係數（每分鐘 rate 個單詞，句號 0.5 秒、逗號 0.2 秒）"""
+        return np.array([0.0, 60.0 / max(rate, 1), 0.5, 0.2, 0.3, 1.0, 0.0])
+
+    def record(self, voice_key, processed_text, duration):
+        """記錄一次實測朗讀"""
+        if duration <= 0 or not processed_text.strip():
+            return
+
+        features = self.extract_features(processed_text)
+        with self.lock:
+            entries = self.samples.setdefault(voice_key, [])
+            entries.append(list(features) + [float(duration)])
+            if len(entries) > self.max_samples:
+                del entries[:len(entries) - self.max_samples]
+            self.coefficients.pop(voice_key, None)
+
+        self.save()
+
+    def estimate(self, voice_key, processed_text, rate):
+        """估算朗讀秒數"""
+        features = self.extract_features(processed_text)
+        coefficients = self._get_coefficients(voice_key, rate)
+        return max(0.0, float(features @ coefficients))
+
+    def _get_coefficients(self, voice_key, rate):
+        """取得（必要時重新擬合）係數"""
+        with self.lock:
+            coefficients = self.coefficients.get(voice_key)
+            if coefficients is None:
+                coefficients = self._fit(self.samples.get(voice_key, []), rate)
+                self.coefficients[voice_key] = coefficients
+            return coefficients
+
+    def _fit(self, entries, rate):
+        """以經驗公式為先驗的脊迴歸：w = (XᵀX + λD)⁻¹ (Xᵀy + λDw₀)"""
+        prior = self.prior_coefficients(rate)
+        if not entries:
+            return prior
+
+        data = np.array(entries, dtype=np.float64)
+        x, y = data[:, :-1], data[:, -1]
+
+        # 依特徵尺度正規化，使 prior_weight 約等於「幾筆樣本」的份量
+        scale = np.diag(np.mean(x * x, axis=0) + 1e-6) * max(self.prior_weight, 1e-3)
+        gram = x.T @ x + scale
+        target = x.T @ y + scale @ prior
+
+        # 時長不應隨特徵增加而減少：係數為負者固定為 0 後重新求解
+        active = np.ones(len(prior), dtype=bool)
+        coefficients = np.zeros(len(prior))
+        while active.any():
+            coefficients[:] = 0.0
+            coefficients[active] = np.linalg.solve(gram[np.ix_(active, active)], target[active])
+            if coefficients.min() >= 0:
+                break
+            active[np.argmin(coefficients)] = False
+
+        return np.maximum(coefficients, 0.0)
+
+    def get_stats(self, voice_key=None):
+        """模型統計：樣本數與平均誤差"""
+        with self.lock:
+            keys = [voice_key] if voice_key else list(self.samples)
+            stats = {}
+            for key in keys:
+                entries = self.samples.get(key, [])
+                if not entries:
+                    continue
+                data = np.array(entries, dtype=np.float64)
+                coefficients = self.coefficients.get(key)
+                if coefficients is None:
+                    rate = float(key.rsplit('@', 1)[-1]) if '@' in key else 120
+                    coefficients = self._fit(entries, rate)
+                    self.coefficients[key] = coefficients
+                error = np.abs(data[:, :-1] @ coefficients - data[:, -1])
+                stats[key] = {
+                    'samples': len(entries),
+                    'mean_error': float(error.mean())
+                }
+            return stats
+
+    def load(self):
+        """讀取已儲存的樣本"""
+        if not self.model_path or not os.path.exists(self.model_path):
+            return
+
+        try:
+            with open(self.model_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            width = len(self.FEATURES) + 1
+            self.samples = {key: [entry for entry in entries if len(entry) == width]
+                            for key, entries in data.get('samples', {}).items()}
+        except Exception as e:
+            print(f"語音時長模型讀取失敗: {e}")
+            self.samples = {}
+
+    def save(self):
+        """儲存樣本（先寫入暫存檔再取代）"""
+        if not self.model_path:
+            return
+
+        with self.lock:
+            data = {'features': list(self.FEATURES), 'samples': self.samples}
+            temp_path = self.model_path + '.tmp'
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(temp_path, self.model_path)
+            except Exception as e:
+                print(f"語音時長模型儲存失敗: {e}")
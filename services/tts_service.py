@@ -6,8 +6,14 @@ import threading
 import queue
 import time
 import re
+import os
+import tempfile
 from PyQt6.QtCore import QObject, pyqtSignal, QThread, QTimer
 from utils import TTSConfigLoader
+from .tts_audio import SpeechPlayer, SentenceSplitter, analyze_speech_file
+from .tts_cache import TTSAudioCache
+from .tts_duration import SpeechDurationModel
+from .tts_backends import ProcessSynthesizer
 
 
 class TTSWorker(QThread):
@@ -17,6 +23,10 @@ class TTSWorker(QThread):
     tts_finished = pyqtSignal()
     tts_error = pyqtSignal(str)
     tts_progress = pyqtSignal(int, int)  # (當前字符位置, 總字符數)
+    speech_rendered = pyqtSignal(object)  # SynthesizedSpeech
+    render_failed = pyqtSignal(object)  # 合成失敗的工作
+    
+    BUSY_CHECK_DELAY = 0.5  # 送出語句後多久開始以引擎閒置判斷完成（秒）
     
     def __init__(self, config_loader=None):
         super().__init__()
@@ -44,6 +54,37 @@ class TTSWorker(QThread):
         self.current_position = 0
         self.text_length = 0
         
+        # 合成音訊快取（由 TTSService 在預先合成模式下設定）
+        self.audio_cache = None
+        self.voice_signature = None
+        
+        # 持續運行的引擎迴圈（startLoop(False) + iterate）
+        self.loop_started = False
+        self.loop_interval = max(1, self.config.get_int('loop_interval_ms', 10)) / 1000.0
+        self.queue_timeout = self.config.get_float('queue_timeout', 1.0)
+        self.text_processing_delay = self.config.get_int('text_processing_delay', 100) / 1000.0
+        self.stop_event = threading.Event()
+        self.utterance_counter = 0
+        self.active_utterance = None  # 目前朗讀中的語句資訊
+        self.pending_render = None  # 目前輸出中的合成工作名稱
+        self.resume_time = 0.0  # 上一句結束後，下一句最早可開始的時間
+        self.consecutive_errors = 0
+        
+        # 每句開始延遲統計（秒）
+        self.start_latencies = []
+        
+        # 以實測朗讀時間校正的時長模型
+        self.duration_model = None
+        if self.config.get_bool('duration_model_enabled', True):
+            self.duration_model = SpeechDurationModel(
+                self.config.get_str('duration_model_file', 'tts_duration_model.json'),
+                prior_weight=self.config.get_float('duration_model_prior_weight', 1.0)
+            )
+        self.progress_interval = self.config.get_int('progress_report_interval', 50) / 1000.0
+        
+        # 獨立行程的合成後端（預先合成用；None 表示使用本線程的引擎）
+        self.synthesizer = None
+        
     def init_engine(self):
         """初始化 TTS 引擎"""
         try:
@@ -73,13 +114,16 @@ class TTSWorker(QThread):
             # 設定語音事件回調
             self._setup_callbacks()
             
+            # 記錄影響合成結果的語音參數，作為快取鍵的一部分
+            self._init_voice_signature()
+            
             if self.config.get_bool('verbose_logging', True):
                 print(f"TTS引擎設定: 速度={rate}, 音量={volume}")
             
             # 測試模式播放測試音頻
             if self.config.get_bool('test_mode', False):
                 test_text = self.config.get_str('test_text', 'TTS test successful.')
-                QTimer.singleShot(1000, lambda: self._test_speech(test_text))
+                self._test_speech(test_text)
             
             return True
             
@@ -87,6 +131,42 @@ class TTSWorker(QThread):
             print(f"TTS 引擎初始化失敗: {e}")
             return False
     
+    def _init_voice_signature(self):
+        """記錄影響合成結果的語音參數（快取鍵與時長模型鍵）"""
+        voice_id = self.engine.getProperty('voice')
+        if self.synthesizer:
+            voice_id = self.synthesizer.description
+        self.voice_signature = {
+            'voice_id': voice_id,
+            'rate': self.engine.getProperty('rate'),
+            'volume': self.engine.getProperty('volume'),
+            'pitch': self.config.get_int('pitch_adjustment', 0)
+        }
+    
+    def _init_synthesizer(self):
+        """依設定啟動獨立行程的合成後端"""
+        backend = self.config.get_str('synthesis_backend', 'engine')
+        if backend == 'engine' or not self.config.get_bool('presynthesis_mode', True):
+            return
+        
+        options = {
+            'engine_priority': self.config.get_str('engine_priority', 'sapi5'),
+            'voice_id': self.engine.getProperty('voice'),
+            'rate': self.engine.getProperty('rate'),
+            'volume': self.engine.getProperty('volume'),
+            'pitch': self.config.get_int('pitch_adjustment', 0),
+            'espeak_voice': self.config.get_str('espeak_voice', 'en-us'),
+            'piper_model_path': self.config.get_str('piper_model_path', ''),
+            'piper_length_scale': self.config.get_float('piper_length_scale', 1.0)
+        }
+        try:
+            self.synthesizer = ProcessSynthesizer(backend, options)
+            print(f"TTS: 合成後端 {self.synthesizer.description} 已於獨立行程啟動")
+        except Exception as e:
+            print(f"TTS: 合成後端 {backend} 啟動失敗 ({e})，使用內建引擎")
+            self.synthesizer = None
+        self._init_voice_signature()
+    
     def _setup_callbacks(self):
         """設定TTS事件回調"""
         if not self.engine:
@@ -102,12 +182,27 @@ class TTSWorker(QThread):
     
     def _on_speech_start(self, name):
         """語音開始事件"""
+        utterance = self.active_utterance
+        if not utterance or utterance['name'] != name:
+            return
+        
         self.is_speaking = True
         self.current_position = 0
+        utterance['started_at'] = time.perf_counter()
+        
+        # 從排入隊列到實際開始發聲的延遲
+        latency = utterance['started_at'] - utterance['queued_at']
+        self.start_latencies.append(latency)
+        if len(self.start_latencies) > 100:
+            self.start_latencies.pop(0)
+        if self.config.get_bool('verbose_logging', True):
+            print(f"TTS: 開始延遲 {latency * 1000:.0f}ms")
         
     def _on_word(self, name, location, length):
         """單詞朗讀事件"""
         try:
+            if self.active_utterance:
+                self.active_utterance['word_events'] = True
             if location is not None and length is not None:
                 self.current_position = location + length
                 if self.text_length > 0:
@@ -119,7 +214,29 @@ class TTSWorker(QThread):
     
     def _on_speech_end(self, name, completed):
         """語音結束事件"""
+        if self.pending_render == name:
+            self.pending_render = None
+            return
+        
+        utterance = self.active_utterance
+        if utterance and utterance['name'] == name:
+            self._finish_utterance(completed)
+    
+    def _finish_utterance(self, completed=True):
+        """目前語句結束（完成或被中斷）"""
+        utterance = self.active_utterance
+        self.active_utterance = None
         self.is_speaking = False
+        self.consecutive_errors = 0
+        self.resume_time = time.perf_counter() + self.text_processing_delay
+        
+        # 只有完整朗讀的語句可作為時長樣本
+        if completed and utterance.get('started_at'):
+            self._record_duration(utterance['processed_text'],
+                                  time.perf_counter() - utterance['started_at'])
+        
+        print(f"TTS: 完成朗讀 '{utterance['text']}'")
+        self.tts_finished.emit()
         
     def _setup_voice(self):
         """設定語音"""
@@ -225,22 +342,91 @@ class TTSWorker(QThread):
                 print(f"TTS: 音調調整不支持: {e}")
     
     def _test_speech(self, test_text):
-        """測試語音"""
-        if not self.engine:
-            print("TTS測試失敗: 引擎未初始化")
-            return
-            
-        try:
-            print(f"TTS測試: {test_text}")
-            self.engine.say(test_text)
-            self.engine.runAndWait()
-        except Exception as e:
-            print(f"TTS測試失敗: {e}")
+        """測試語音（排入隊列，由引擎迴圈朗讀）"""
+        print(f"TTS測試: {test_text}")
+        self.add_text(test_text)
+    
+    def add_text(self, text, preempt=False):
+        """添加文本到朗讀隊列
+
+        preempt 為 True 時清空隊列並中斷目前語句，新文本立即開始朗讀。
+        """
+        if text and text.strip():
+            if preempt:
+                self.clear_queue()
+                self.stop_current()
+            self.text_queue.put({
+                'type': 'speak',
+                'text': text.strip(),
+                'queued_at': time.perf_counter()
+            })
     
-    def add_text(self, text):
-        """添加文本到朗讀隊列"""
+    def add_render_job(self, text, audio_path, warm_up=False, tag=None):
+        """添加預先合成工作：將文本輸出為音訊檔而不直接朗讀"""
         if text and text.strip():
-            self.text_queue.put(text.strip())
+            self.text_queue.put({
+                'type': 'render',
+                'text': text.strip(),
+                'path': audio_path,
+                'warm_up': warm_up,
+                'tag': tag
+            })
+    
+    def _render_to_file(self, job):
+        """將文本合成為 WAV 並分析單詞時間軸"""
+        text = job['text']
+        try:
+            if self.synthesizer and not self.synthesizer.is_alive():
+                print("TTS: 合成行程已結束，改用內建引擎")
+                self.synthesizer = None
+                self._init_voice_signature()
+            
+            processed_text = self._process_text_pauses(text)
+            start_time = time.time()
+            
+            # 先查詢快取
+            cache_key = None
+            audio_path = None
+            if self.audio_cache and self.voice_signature:
+                cache_key = TTSAudioCache.make_key(processed_text, **self.voice_signature)
+                if job.get('warm_up'):
+                    self.audio_cache.pin(cache_key)
+                audio_path = self.audio_cache.lookup(cache_key)
+            
+            cache_hit = audio_path is not None
+            if not cache_hit:
+                target_path = self.audio_cache.temp_path_for(cache_key) if cache_key else job['path']
+                if self.synthesizer:
+                    _, first_chunk = self.synthesizer.synthesize_to_file(
+                        processed_text, target_path, self.config.get_float('render_timeout', 15.0))
+                    if self.config.get_bool('verbose_logging', True):
+                        print(f"TTS: {self.synthesizer.description} 首段音訊 {first_chunk * 1000:.0f}ms")
+                else:
+                    self._save_to_file(processed_text, target_path)
+                audio_path = self.audio_cache.store(cache_key, target_path) if cache_key else target_path
+            
+            min_pause_ms = self.config.get_int('presynthesis_min_pause_ms', 120)
+            speech = analyze_speech_file(text, audio_path, min_pause_ms)
+            speech.is_cached = cache_key is not None
+            if not cache_hit:
+                self._record_duration(processed_text, speech.playback_end)
+            speech.tag = job.get('tag')
+            
+            if self.config.get_bool('verbose_logging', True):
+                source = "快取命中" if cache_hit else "預先合成完成"
+                print(f"TTS: {source} {speech.duration:.2f}s 音訊，"
+                      f"{len(speech.word_timings)} 個單詞，耗時 {time.time() - start_time:.2f}s")
+            
+            # 暖機工作只需寫入快取
+            if not job.get('warm_up'):
+                self.speech_rendered.emit(speech)
+            
+        except Exception as e:
+            if job.get('warm_up'):
+                print(f"TTS: 快取暖機失敗 '{text}': {e}")
+                return
+            print(f"TTS: 預先合成失敗 ({e})，改用即時朗讀")
+            self.render_failed.emit(job)
     
     def clear_queue(self):
         """清空朗讀隊列"""
@@ -251,68 +437,187 @@ class TTSWorker(QThread):
                 break
     
     def stop_current(self):
-        """停止當前朗讀"""
-        if self.engine:
+        """停止當前朗讀（由引擎迴圈處理，不會關閉引擎）"""
+        self.stop_event.set()
+    
+    def _next_name(self, prefix):
+        """產生語句名稱，用於比對引擎事件"""
+        self.utterance_counter += 1
+        return f"{prefix}-{self.utterance_counter}"
+    
+    def _start_loop(self):
+        """啟動外部驅動的引擎迴圈"""
+        self.engine.startLoop(False)
+        self.loop_started = True
+    
+    def _end_loop(self):
+        """結束引擎迴圈"""
+        if self.engine and self.loop_started:
             try:
-                self.engine.stop()
-            except:
+                self.engine.endLoop()
+            except Exception:
                 pass
+        self.loop_started = False
+    
+    def _iterate(self):
+        """推進引擎一次"""
+        if self.engine and self.loop_started:
+            self.engine.iterate()
+    
+    def _handle_stop_request(self):
+        """在工作線程中停止目前語句，引擎保持運作"""
+        if not self.stop_event.is_set():
+            return
+        self.stop_event.clear()
+        
+        if self.active_utterance:
+            try:
+                self.engine.stop()
+            except Exception as e:
+                print(f"TTS: 停止朗讀失敗: {e}")
+            self._finish_utterance(completed=False)
+            # 被中斷時不需要句間延遲
+            self.resume_time = 0.0
+    
+    def _speak(self, job):
+        """開始朗讀一段文本（非阻塞，由 iterate 推進）"""
+        text = job['text']
+        self.current_text = text
+        self.text_length = len(text)
+        self.current_position = 0
+        
+        print(f"TTS: 開始朗讀 '{text}'")
+        
+        # 處理文本中的停頓標記
+        processed_text = self._process_text_pauses(text)
+        
+        name = self._next_name('speak')
+        self.active_utterance = {
+            'name': name,
+            'text': text,
+            'processed_text': processed_text,
+            'queued_at': job['queued_at'],
+            'said_at': time.perf_counter(),
+            'started_at': None,
+            'estimate': self.get_estimated_duration(text),
+            'word_events': False,
+            'last_progress': 0.0
+        }
+        self.tts_started.emit()
+        
+        self.engine.say(processed_text, name)
+    
+    def _save_to_file(self, text, path):
+        """輸出音訊檔，推進引擎迴圈直到完成"""
+        name = self._next_name('render')
+        self.pending_render = name
+        self.engine.save_to_file(text, path, name)
+        
+        timeout = self.config.get_float('render_timeout', 15.0)
+        deadline = time.perf_counter() + timeout
+        self._iterate()
+        # 部分驅動程式同步輸出而不發出結束事件，因此也以引擎閒置判斷完成
+        while self.pending_render == name and self.engine.isBusy():
+            if time.perf_counter() > deadline:
+                self.pending_render = None
+                raise TimeoutError(f"合成超過 {timeout:.0f} 秒")
+            time.sleep(self.loop_interval)
+            self._iterate()
+        self.pending_render = None
+    
+    def _next_job(self):
+        """取得下一個工作；朗讀中與句間延遲期間不取出，閒置時阻塞等待"""
+        if self.active_utterance:
+            return None
+        
+        delay = self.resume_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(min(delay, self.loop_interval))
+            return None
+        
+        try:
+            return self.text_queue.get(timeout=self.queue_timeout)
+        except queue.Empty:
+            return None
+    
+    def _recover_engine(self):
+        """連續錯誤過多時才重建引擎"""
+        self.consecutive_errors += 1
+        retry_count = self.config.get_int('error_retry_count', 2)
+        if self.consecutive_errors <= retry_count:
+            return
+        
+        print("TTS: 連續錯誤，重新初始化引擎")
+        self._end_loop()
+        self.active_utterance = None
+        self.pending_render = None
+        self.is_speaking = False
+        time.sleep(0.5)
+        if self.init_engine():
+            self._start_loop()
+        self.consecutive_errors = 0
+    
+    def get_latency_stats(self):
+        """每句開始延遲統計（毫秒）"""
+        if not self.start_latencies:
+            return None
+        latencies = sorted(self.start_latencies)
+        return {
+            'count': len(latencies),
+            'avg_ms': sum(latencies) / len(latencies) * 1000,
+            'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+            'max_ms': latencies[-1] * 1000
+        }
     
     def run(self):
-        """主運行循環"""
+        """主運行循環：引擎只初始化一次，以 iterate 推進朗讀並隨時接受新工作"""
         if not self.init_engine():
             self.tts_error.emit("TTS 引擎初始化失敗")
             return
         
+        try:
+            self._start_loop()
+        except Exception as e:
+            self.tts_error.emit(f"TTS 引擎迴圈啟動失敗: {e}")
+            return
+        
+        self._init_synthesizer()
         print("TTS 服務已啟動")
         
         while self.running:
             try:
-                # 等待新的文本，超時設定從配置讀取
-                timeout = self.config.get_float('queue_timeout', 1.0)
-                text = self.text_queue.get(timeout=timeout)
-                
-                if not text or not self.running:
-                    continue
-                
-                self.current_text = text
-                self.text_length = len(text)
-                self.current_position = 0
-                
-                print(f"TTS: 開始朗讀 '{text}'")
-                
-                self.tts_started.emit()
+                self._handle_stop_request()
                 
-                # 處理文本中的停頓標記
-                processed_text = self._process_text_pauses(text)
+                job = self._next_job()
+                if job and self.running:
+                    self._handle_stop_request()
+                    
+                    # 預先合成工作
+                    if job.get('type') == 'render':
+                        if self.engine:
+                            self._render_to_file(job)
+                        else:
+                            self.render_failed.emit(job)
+                    elif job.get('type') == 'speak' and self.engine:
+                        self._speak(job)
                 
-                # 執行語音合成
-                if self.engine:
-                    self.engine.say(processed_text)
-                    self.engine.runAndWait()
+                if self.active_utterance:
+                    self._iterate()
+                    self._report_estimated_progress()
+                    self._check_utterance_stalled()
+                    time.sleep(self.loop_interval)
                 
-                print(f"TTS: 完成朗讀 '{text}'")
-                self.tts_finished.emit()
-                
-                # 文本處理延遲
-                delay = self.config.get_int('text_processing_delay', 100)
-                if delay > 0:
-                    time.sleep(delay / 1000.0)
-                
-            except queue.Empty:
-                # 超時，繼續循環
-                continue
             except Exception as e:
                 print(f"TTS 錯誤: {e}")
                 self.tts_error.emit(str(e))
                 
-                # 錯誤重試
-                retry_count = self.config.get_int('error_retry_count', 2)
-                if retry_count > 0:
-                    time.sleep(0.5)
-                    # 重新初始化引擎
-                    self.init_engine()
+                if self.active_utterance:
+                    self._finish_utterance(completed=False)
+                self._recover_engine()
         
+        self._end_loop()
+        if self.synthesizer:
+            self.synthesizer.shutdown()
         print("TTS 服務已停止")
     
     def _process_text_pauses(self, text):
@@ -348,11 +653,74 @@ class TTSWorker(QThread):
         
         return processed
     
+    def _check_utterance_stalled(self):
+        """部分驅動程式不發出結束事件：引擎已閒置或超過預估時長加上容許時間時，視為朗讀結束"""
+        utterance = self.active_utterance
+        if not utterance:
+            return
+        
+        elapsed = time.perf_counter() - utterance['said_at']
+        # 與 _save_to_file 相同以引擎閒置判斷完成（剛送出時引擎可能尚未轉為忙碌，稍候再判斷）
+        if elapsed > self.BUSY_CHECK_DELAY and not self.engine.isBusy():
+            print("TTS: 未收到結束事件，引擎已閒置，視為朗讀完成")
+            self._finish_utterance(completed=True)
+            return
+        
+        timeout = utterance['estimate'] * 1.5 + self.config.get_float('speak_timeout_margin', 5.0)
+        if elapsed > timeout:
+            print(f"TTS: 朗讀超過 {timeout:.1f} 秒仍未結束，強制停止")
+            try:
+                self.engine.stop()
+            except Exception as e:
+                print(f"TTS: 停止朗讀失敗: {e}")
+            self._finish_utterance(completed=False)
+    
+    def _report_estimated_progress(self):
+        """引擎未發出 started-word 事件時，依時長模型推算字幕進度"""
+        utterance = self.active_utterance
+        if not utterance or utterance['word_events'] or not utterance['started_at']:
+            return
+        if utterance['estimate'] <= 0 or self.text_length <= 0:
+            return
+        
+        now = time.perf_counter()
+        if now - utterance['last_progress'] < self.progress_interval:
+            return
+        utterance['last_progress'] = now
+        
+        # 保留最後一個字元給實際的結束事件
+        fraction = min(1.0, (now - utterance['started_at']) / utterance['estimate'])
+        position = min(self.text_length - 1, int(self.text_length * fraction))
+        if position > self.current_position:
+            self.current_position = position
+            self.tts_progress.emit(position, self.text_length)
+    
+    def _duration_key(self):
+        """目前語音設定對應的時長模型鍵"""
+        if not self.voice_signature:
+            return None
+        return SpeechDurationModel.voice_key(self.voice_signature['voice_id'],
+                                             self.voice_signature['rate'])
+    
+    def _record_duration(self, processed_text, duration):
+        """記錄實測朗讀時長"""
+        key = self._duration_key()
+        if self.duration_model and key:
+            self.duration_model.record(key, processed_text, duration)
+    
     def get_estimated_duration(self, text):
-        """估算文本朗讀時長"""
+        """估算文本朗讀時長（以實際送入引擎的文本及實測校正的模型計算）"""
         if not text:
             return 0.0
-            
+        
+        key = self._duration_key()
+        if self.duration_model and key:
+            return self.duration_model.estimate(key, self._process_text_pauses(text),
+                                                self.voice_signature['rate'])
+        return self._estimate_heuristic(text)
+    
+    def _estimate_heuristic(self, text):
+        """未啟用時長模型時的經驗估算"""
         # 基於配置的語速估算
         rate = self.config.get_int('rate', 120)  # words per minute
         
@@ -384,7 +752,7 @@ class TTSWorker(QThread):
         
         # 添加一個空項目來喚醒隊列等待
         try:
-            self.text_queue.put("", timeout=0.1)
+            self.text_queue.put({'type': 'wake'}, timeout=0.1)
         except:
             pass
 
@@ -405,8 +773,22 @@ class TTSService(QObject):
         self.worker = None
         self.is_speaking = False
         
+        # 預先合成模式：逐句輸出音訊檔，以低延遲播放器無縫接續播放並依音訊時間同步字幕
+        self.player = None
+        self.render_dir = os.path.join(tempfile.gettempdir(), 'defense_tts')
+        self.audio_cache = None
+        self.stream_id = 0
+        self.queued_speech = []
+        self.rendered_speech = {}
+        self._reset_stream()
+        
         if self.enabled:
             self.init_worker()
+            if self.config.get_bool('presynthesis_mode', True):
+                self.init_player()
+            elif self.config.get_bool('audio_cache_enabled', True):
+                # 即時朗讀直接由語音引擎發聲，沒有可播放快取音訊的播放器
+                print("TTS: 即時朗讀模式不使用音訊快取（僅預先合成模式適用）")
     
     def init_worker(self):
         """初始化 TTS 工作線程"""
@@ -418,6 +800,8 @@ class TTSService(QObject):
             self.worker.tts_finished.connect(self.on_tts_finished)
             self.worker.tts_error.connect(self.on_tts_error)
             self.worker.tts_progress.connect(self.on_tts_progress)
+            self.worker.speech_rendered.connect(self.on_speech_rendered)
+            self.worker.render_failed.connect(self.on_render_failed)
             
             # 啟動工作線程
             self.worker.start()
@@ -428,11 +812,288 @@ class TTSService(QObject):
             print(f"TTS 服務初始化失敗: {e}")
             self.enabled = False
     
-    def speak_text(self, text):
+    def init_player(self):
+        """初始化預先合成模式的播放器"""
+        interval = self.config.get_int('progress_report_interval', 50)
+        self.player = SpeechPlayer(interval)
+        
+        if not self.player.is_available():
+            self.player = None
+            return
+            
+        self.player.playback_started.connect(self.on_tts_started)
+        self.player.segment_finished.connect(self.on_segment_finished)
+        self.player.queue_drained.connect(self.on_queue_drained)
+        self.player.playback_error.connect(self.on_tts_error)
+        self.player.progress.connect(self.on_tts_progress)
+        
+        # 清除上次執行殘留的暫存音訊
+        os.makedirs(self.render_dir, exist_ok=True)
+        for filename in os.listdir(self.render_dir):
+            if filename.startswith('speech_'):
+                self._remove_audio_file(os.path.join(self.render_dir, filename))
+        
+        # 持久化音訊快取
+        if self.config.get_bool('audio_cache_enabled', True):
+            try:
+                self.audio_cache = TTSAudioCache(
+                    self.config.get_str('audio_cache_dir', 'tts_cache'),
+                    self.config.get_float('audio_cache_max_mb', 50.0)
+                )
+                self.worker.audio_cache = self.audio_cache
+            except Exception as e:
+                print(f"TTS 音訊快取初始化失敗: {e}")
+                self.audio_cache = None
+        
+        print("TTS 預先合成模式已啟用")
+    
+    def warm_up_cache(self, phrases):
+        """啟動時預先合成固定字幕（含測試文本）並寫入快取
+
+        串流模式以句子為單位合成，因此快取也以句子為單位暖機。
+        音訊快取只在預先合成模式使用；即時朗讀模式下不做任何事。
+        """
+        if not self.uses_presynthesis() or not self.audio_cache:
+            return
+        
+        phrases = list(phrases)
+        test_text = self.config.get_str('test_text', '')
+        if test_text:
+            phrases.append(test_text)
+        
+        count = 0
+        for phrase in phrases:
+            splitter = SentenceSplitter()
+            for _, sentence in splitter.feed(phrase) + splitter.flush():
+                cleaned = self._clean_sentence(sentence)
+                if cleaned:
+                    self.worker.add_render_job(cleaned, None, warm_up=True)
+                    count += 1
+        
+        print(f"TTS: 已排入 {count} 個固定句子進行快取暖機")
+    
+    def uses_presynthesis(self):
+        """是否使用預先合成模式"""
+        return self.is_available() and self.player is not None
+    
+    def begin_stream(self, cancel_token=None, autoplay=True):
+        """開始新的句子串流：之後以 feed_text() 陸續送入文字，end_stream() 結束
+
+        每個完整句子會立即排入背景合成；播放第 N 句時同時合成後續句子，
+        最多預先合成 stream_lookahead 句。
+        """
+        if not self.uses_presynthesis():
+            return False
+        
+        if cancel_token:
+            if cancel_token.is_cancelled:
+                return False
+            cancel_token.add_callback(self.cancel_speech)
+        
+        self._reset_stream()
+        self.stream_id += 1
+        self.stream_active = True
+        self.autoplay = autoplay
+        return True
+    
+    def feed_text(self, chunk):
+        """送入一段文字，完成的句子會立即開始合成"""
+        if not self.stream_active or not chunk:
+            return
+        
+        self.player.total_length += len(chunk)
+        for offset, sentence in self.splitter.feed(chunk):
+            self._add_sentence(offset, sentence)
+        self._pump_stream()
+    
+    def end_stream(self):
+        """文字已全部送入"""
+        if not self.stream_active:
+            return
+        
+        for offset, sentence in self.splitter.flush():
+            self._add_sentence(offset, sentence)
+        self.stream_closed = True
+        self._pump_stream()
+    
+    def start_playback(self):
+        """開始播放串流；已合成的句子立即播放，其餘在合成完成後接續"""
+        if not self.stream_active:
+            return
+        
+        self.autoplay = True
+        self._pump_stream()
+    
+    def prepare_speech(self, text, cancel_token=None):
+        """在背景將文本合成為音訊，待 play_prepared() 時立即播放"""
+        if not self.uses_presynthesis() or not text:
+            return
+        
+        if not self.filter_english_text(text):
+            print(f"TTS: 文本過濾後為空，跳過合成: '{text}'")
+            return
+        
+        if not self.begin_stream(cancel_token, autoplay=False):
+            return
+        
+        print(f"TTS: 預先合成 '{text}'")
+        self.feed_text(text)
+        self.end_stream()
+    
+    def play_prepared(self):
+        """播放已合成的音訊；若尚未合成完成則在完成後立即播放"""
+        self.start_playback()
+    
+    def _clean_sentence(self, sentence):
+        """清理單一句子；只要包含英文字母即保留（整段文本已檢查過最少字數）"""
+        if not self.config.get_bool('auto_clean_text', True):
+            return sentence
+        
+        if self.config.get_bool('speak_punctuation', False):
+            cleaned = re.sub(r'[^\w\s\.\,\!\?\:\;\-\'\"\(\)\[\]]', ' ', sentence)
+        else:
+            cleaned = re.sub(r'[^\w\s\.\,\!\?\:\;\-\'\"]', ' ', sentence)
+        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+        
+        if not re.search(r'[a-zA-Z]', cleaned):
+            return ""
+        return cleaned
+    
+    def _add_sentence(self, offset, sentence):
+        """加入串流句子"""
+        cleaned = self._clean_sentence(sentence)
+        if cleaned:
+            self.stream_sentences.append((offset, cleaned))
+    
+    def _pump_stream(self):
+        """推進串流：排入合成工作、將完成的句子依序送入播放器，並判斷是否結束"""
+        if not self.stream_active:
+            return
+        
+        # 失敗後其餘文字改為即時朗讀
+        if self.fallback_index is not None:
+            if self.stream_closed and self.autoplay and not self.player.is_playing():
+                self._speak_live_fallback()
+            return
+        
+        # 目前播放中的一句加上 lookahead 句
+        lookahead = max(0, self.config.get_int('stream_lookahead', 2))
+        while (self.next_render_index < len(self.stream_sentences) and
+               self.next_render_index - self.finished_count <= lookahead):
+            index = self.next_render_index
+            text = self.stream_sentences[index][1]
+            audio_path = os.path.join(
+                self.render_dir, f"speech_{self.stream_id}_{index}_{int(time.time() * 1000)}.wav")
+            self.worker.add_render_job(text, audio_path, tag=(self.stream_id, index))
+            self.next_render_index += 1
+        
+        # 依序送入播放器
+        while self.next_enqueue_index in self.rendered_speech:
+            speech = self.rendered_speech.pop(self.next_enqueue_index)
+            offset = self.stream_sentences[self.next_enqueue_index][0]
+            self.player.enqueue(speech, offset)
+            self.queued_speech.append(speech)
+            self.next_enqueue_index += 1
+        
+        if self.autoplay:
+            self.player.play()
+            
+            if (self.stream_closed and not self.player.is_playing() and
+                    self.next_enqueue_index >= len(self.stream_sentences)):
+                self._finish_stream()
+    
+    def on_speech_rendered(self, speech):
+        """句子合成完成"""
+        stream_id, index = speech.tag if speech.tag else (None, None)
+        if stream_id != self.stream_id or not self.stream_active:
+            # 已被取消或被新的串流取代
+            if not speech.is_cached:
+                self._remove_audio_file(speech.audio_path)
+            return
+        
+        self.rendered_speech[index] = speech
+        self._pump_stream()
+    
+    def on_render_failed(self, job):
+        """句子合成失敗，該句起改用即時朗讀"""
+        stream_id, index = job.get('tag') or (None, None)
+        if stream_id != self.stream_id or not self.stream_active:
+            return
+        
+        if self.fallback_index is None or index < self.fallback_index:
+            self.fallback_index = index
+        self._pump_stream()
+    
+    def on_segment_finished(self, speech):
+        """串流中的一句播放完畢"""
+        if speech in self.queued_speech:
+            self.queued_speech.remove(speech)
+            if not speech.is_cached:
+                self._remove_audio_file(speech.audio_path)
+        self.finished_count += 1
+        self._pump_stream()
+    
+    def on_queue_drained(self):
+        """播放器已播完目前佇列"""
+        if self.stream_active:
+            if (self.stream_closed and self.fallback_index is None and
+                    self.next_enqueue_index < len(self.stream_sentences)):
+                print("TTS: 下一句尚未合成完成，等待中")
+            self._pump_stream()
+    
+    def _finish_stream(self):
+        """整個串流播放完畢"""
+        self._reset_stream()
+        self.on_tts_finished()
+    
+    def _speak_live_fallback(self):
+        """以即時朗讀取代尚未播放的句子"""
+        start = self.stream_sentences[self.fallback_index][0]
+        text = " ".join(sentence for offset, sentence in self.stream_sentences
+                        if offset >= start)
+        self._reset_stream()
+        if text:
+            self.worker.add_text(text)
+    
+    def _reset_stream(self):
+        """停止播放並清除串流狀態（快取中的檔案不會被刪除）"""
+        if self.player:
+            self.player.stop()
+        for speech in self.queued_speech + list(self.rendered_speech.values()):
+            if not speech.is_cached:
+                self._remove_audio_file(speech.audio_path)
+        
+        self.stream_active = False
+        self.stream_closed = False
+        self.autoplay = False
+        self.splitter = SentenceSplitter()
+        self.stream_sentences = []
+        self.rendered_speech = {}
+        self.queued_speech = []
+        self.next_render_index = 0
+        self.next_enqueue_index = 0
+        self.finished_count = 0
+        self.fallback_index = None
+    
+    def _remove_audio_file(self, path):
+        """刪除暫存音訊檔"""
+        try:
+            if path and os.path.exists(path):
+                os.remove(path)
+        except OSError:
+            pass
+    
+    def speak_text(self, text, cancel_token=None):
         """朗讀文本"""
         if not self.enabled or not self.worker or not text:
             return
         
+        # 週期取消時立即停止朗讀
+        if cancel_token:
+            if cancel_token.is_cancelled:
+                return
+            cancel_token.add_callback(self.cancel_speech)
+        
         # 只朗讀英文文本，過濾掉中文和特殊字符
         filtered_text = self.filter_english_text(text)
         
@@ -480,6 +1141,14 @@ class TTSService(QObject):
                 self.worker.clear_queue()
         self.is_speaking = False
     
+    def cancel_speech(self):
+        """無條件停止當前朗讀並清空隊列"""
+        if self.worker:
+            self.worker.clear_queue()
+            self.worker.stop_current()
+        self._reset_stream()
+        self.is_speaking = False
+    
     def clear_queue(self):
         """清空朗讀隊列"""
         if self.worker:
@@ -525,8 +1194,25 @@ class TTSService(QObject):
     def shutdown(self):
         """關閉 TTS 服務"""
         if self.worker:
+            if self.worker.duration_model:
+                for key, stats in self.worker.duration_model.get_stats().items():
+                    print(f"TTS 時長模型 {key}: {stats['samples']} 筆樣本，"
+                          f"平均誤差 {stats['mean_error']:.2f}s")
+            
+            latency = self.worker.get_latency_stats()
+            if latency:
+                print(f"TTS 開始延遲: {latency['count']} 句，平均 {latency['avg_ms']:.0f}ms，"
+                      f"P95 {latency['p95_ms']:.0f}ms，最大 {latency['max_ms']:.0f}ms")
+            
             self.worker.shutdown()
             self.worker.wait(3000)  # 等待最多3秒
             self.worker = None
         
+        self._reset_stream()
+        
+        if self.audio_cache:
+            stats = self.audio_cache.get_stats()
+            print(f"TTS 音訊快取: {stats['entries']} 項 ({stats['size_mb']:.1f} MB)，"
+                  f"命中 {stats['hits']} 次，未命中 {stats['misses']} 次")
+        
         print("TTS 服務已關閉")
\ No newline at end of file
@@ -0,0 +1,165 @@
+# Location: project_v2/ui/caption_layout.py
+# Usage: 字幕排版快取，完整字幕只換行一次，打字時依目前字數切出可見行
+
+import re
+import time
+from PyQt6.QtCore import QThread, pyqtSignal
+from PyQt6.QtGui import QFont, QFontMetrics
+
+
+class CaptionLine:
+    """單行排版結果"""
+
+    __slots__ = ('start', 'end', 'text', 'widths')
+
+    def __init__(self, start, end, text, widths):
+        self.start = start  # 在清理後全文中的起點
+        self.end = end
+        self.text = text
+        self.widths = widths  # widths[k] = text[:k] 的像素寬度
+
+
+class CaptionLayout:
+    """整段字幕的換行結果
+
+    建立時對完整文本做一次清理與換行，記錄每行的斷點與累計寬度；
+    打字過程只需以目前字數切片，不再重複量測文字。
+    """
+
+    def __init__(self, text, font, max_width):
+        self.source_text = text
+        self.font_key = font.key()
+        self.max_width = max_width
+
+        metrics = QFontMetrics(font)
+        self.line_height = metrics.height()
+
+        self.text, self.index_map = self._clean_text_for_display(text)
+        self.lines = self._wrap(self.text, metrics, max_width)
+
+    def matches(self, text, font, max_width):
+        """排版結果是否仍適用（文字、字型與寬度皆相同）"""
+        return (self.source_text == text and self.font_key == font.key()
+                and self.max_width == max_width)
+
+    def visible_lines(self, source_index):
+        """原文前 source_index 個字元對應的可見行 [(文字, 寬度), ...]"""
+        source_index = max(0, min(source_index, len(self.source_text)))
+        visible = self.index_map[source_index]
+
+        result = []
+        for line in self.lines:
+            if line.start >= visible:
+                break
+            count = min(line.end, visible) - line.start
+            text = line.text[:count].rstrip()
+            if text:
+                result.append((text, line.widths[len(text)]))
+            elif count > 0:
+                result.append(("", 0))
+        return result
+
+    @staticmethod
+    def _clean_text_for_display(text):
+        """清理文本，回傳 (清理後文本, 原文位置 -> 清理後字數)
+
+        規則與逐幀清理相同：不可見字元視為空白，連續空白合併，去除頭尾空白。
+        """
+        replaced = re.sub(r'[^\x00-\x7F\u4e00-\u9fff]', ' ', text)
+
+        chars = []
+        index_map = [0]
+        for char in replaced:
+            if char.isspace():
+                if chars and chars[-1] != ' ':
+                    chars.append(' ')
+            else:
+                chars.append(char)
+            index_map.append(len(chars))
+
+        # 去除結尾空白（前綴的可見字數不會超過清理後長度）
+        while chars and chars[-1] == ' ':
+            chars.pop()
+        length = len(chars)
+        index_map = [min(count, length) for count in index_map]
+
+        return ''.join(chars), index_map
+
+    def _wrap(self, text, metrics, max_width):
+        """文字自動換行，回傳 CaptionLine 列表"""
+        if not text:
+            return []
+
+        # 檢測是否為中文文本
+        chinese_char_count = sum(1 for char in text if '\u4e00' <= char <= '\u9fff')
+        is_mostly_chinese = chinese_char_count > len(text) * 0.5
+
+        if is_mostly_chinese:
+            spans = self._wrap_by_character(text, metrics, max_width)
+        else:
+            spans = self._wrap_by_word(text, metrics, max_width)
+
+        lines = []
+        for start, end in spans:
+            line_text = text[start:end]
+            widths = [0]
+            for k in range(1, len(line_text) + 1):
+                widths.append(metrics.horizontalAdvance(line_text[:k]))
+            lines.append(CaptionLine(start, end, line_text, widths))
+        return lines
+
+    def _wrap_by_word(self, text, metrics, max_width):
+        """英文按單詞換行，回傳每行的 (起點, 終點)"""
+        spans = []
+        line_start = 0
+        line_end = 0
+
+        for match in re.finditer(r'[^ ]+', text):
+            candidate = text[line_start:match.end()]
+            if metrics.horizontalAdvance(candidate) > max_width and line_end > line_start:
+                spans.append((line_start, line_end))
+                line_start = match.start()
+            line_end = match.end()
+
+        if line_end > line_start:
+            spans.append((line_start, line_end))
+        return spans
+
+    def _wrap_by_character(self, text, metrics, max_width):
+        """按字符換行（主要用於中文），回傳每行的 (起點, 終點)"""
+        spans = []
+        line_start = 0
+
+        for index in range(len(text)):
+            if (index > line_start and
+                    metrics.horizontalAdvance(text[line_start:index + 1]) > max_width):
+                spans.append((line_start, index))
+                line_start = index
+
+        if line_start < len(text):
+            spans.append((line_start, len(text)))
+        return spans
+
+
+class CaptionLayoutThread(QThread):
+    """在背景線程預先排版字幕（QFont / QFontMetrics 可於非 GUI 線程使用）"""
+
+    layouts_ready = pyqtSignal(object)  # {文本: CaptionLayout}
+
+    def __init__(self, texts, font, max_width):
+        super().__init__()
+        self.texts = list(texts)
+        self.font = QFont(font)
+        self.max_width = max_width
+        self.elapsed = 0.0
+
+    def run(self):
+        start_time = time.perf_counter()
+        layouts = {}
+        for text in self.texts:
+            try:
+                layouts[text] = CaptionLayout(text, self.font, self.max_width)
+            except Exception as e:
+                print(f"字幕預先排版失敗: {e}")
+        self.elapsed = time.perf_counter() - start_time
+        self.layouts_ready.emit(layouts)
@@ -3,9 +3,9 @@
 
 from PyQt6.QtWidgets import QWidget, QLabel, QVBoxLayout
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QRect, QObject
-from PyQt6.QtGui import QFont, QPalette, QColor, QPainter, QFontMetrics
+from PyQt6.QtGui import QFont, QPalette, QColor, QPainter, QPixmap, QFontMetrics
 from utils.font_manager import FontManager
-import re
+from .caption_layout import CaptionLayout, CaptionLayoutThread
 import time
 
 
@@ -29,19 +29,33 @@ class CaptionWidget(QWidget):
         self.tc_text = ""
         self.en_text = ""
         self.current_phase = ""  # "tc", "en", "simultaneous"
-        self.tc_lines_cache = []
         
-        # 打字機效果計時器
+        # 排版快取：文本 -> CaptionLayout（僅在尺寸或字型改變時失效）
+        self.layout_cache = {}
+        
+        # 已完成行的預先繪製圖像：(文本, 行號) -> QPixmap
+        self.line_pixmaps = {}
+        self.painted_rows = None  # 上次要求重繪時的可見行
+        self.line_height = None
+        self.layout_threads = []  # 背景排版線程（完成前保留參照）
+        self.last_prelayout_ms = None  # 最近一次背景排版耗時
+        
+        # 打字機效果計時器：以畫面更新頻率觸發，字數由經過時間決定
         self.typing_timer = QTimer()
+        self.typing_timer.setTimerType(Qt.TimerType.PreciseTimer)
         self.typing_timer.timeout.connect(self.type_next_character)
+        self.typing_start_time = None
+        self.char_interval = 0.05  # 每個字元的秒數
+        self.typing_duration = 0.0
         
         # 設定透明背景
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
         self.setAutoFillBackground(False)
         
-        # 字型設定
+        # 字型設定：優先使用字幕子集字型，缺字時由完整字型補上
         base_font_size = int(font_size * scale_factor)
-        self.font = QFont("Noto Sans CJK TC", base_font_size)
+        self.font = FontManager.instance().get_caption_font(base_font_size)
+        self.first_paint_pending = False  # 新字幕的第一幀尚未繪製（用於量測）
         
         # 文字邊距
         self.padding = 20
@@ -51,6 +65,7 @@ class CaptionWidget(QWidget):
         self.tts_sync_enabled = False
         self.tts_text = ""
         self.tts_start_time = None
+        self.tts_estimated_duration = 0.0  # 時長模型預估的朗讀秒數（同步模式的基準進度）
         self.char_timings = []  # 每個字符的預計時間點
         
         # 隱藏控制項
@@ -63,13 +78,16 @@ class CaptionWidget(QWidget):
         self.current_index = 0
         self.is_showing = True
         self.is_bilingual_mode = False
+        self.first_paint_pending = True
+        
+        # 完整字幕只排版一次（若已在背景預先排版則直接使用）
+        self._prepare_layouts([text])
         
         self.show()
         
         # 如果啟用TTS同步，不使用常規計時器
         if not self.tts_sync_enabled:
-            typing_speed_int = int(typing_speed)
-            self.typing_timer.start(typing_speed_int)
+            self._start_typing(typing_speed, len(text))
         
         self.update()
         
@@ -88,32 +106,84 @@ class CaptionWidget(QWidget):
         self._tc_completed = False
         self._en_completed = False
         self.is_showing = True
+        self.first_paint_pending = True
         
-        # 清空缓存
-        self.tc_lines_cache = []
+        # 完整字幕只排版一次（若已在背景預先排版則直接使用）
+        self._prepare_layouts([tc_text, en_text])
         
         self.show()
         
         # 如果啟用TTS同步，不使用常規計時器
         if not self.tts_sync_enabled:
-            typing_speed_int = int(typing_speed)
-            self.typing_timer.start(typing_speed_int)
+            self._start_typing(typing_speed, self.estimate_typing_chars(tc_text, en_text))
         
         self.update()
         
-    def enable_tts_sync(self, tts_text, tts_rate_wpm=140):
-        """啟用TTS實時進度同步模式"""
+    @staticmethod
+    def estimate_typing_chars(tc_text, en_text=""):
+        """打字所需的字元步數（雙語同時打字時依較長者計算）"""
+        return max(len(tc_text or ""), len(en_text or ""))
+    
+    @staticmethod
+    def char_interval_for(typing_speed):
+        """每個字元的秒數（typing_speed 為每字毫秒數，最少 1ms）"""
+        return max(1.0, float(typing_speed)) / 1000.0
+    
+    @staticmethod
+    def estimate_typing_duration(typing_speed, tc_text, en_text=""):
+        """打字完成所需秒數（與實際打字使用相同的換算），供無介面執行規劃時間軸"""
+        return CaptionWidget.estimate_typing_chars(tc_text, en_text) * CaptionWidget.char_interval_for(typing_speed)
+        
+    def _start_typing(self, typing_speed, char_count):
+        """開始打字：記錄起始時間，計時器以畫面更新頻率推進"""
+        self.char_interval = self.char_interval_for(typing_speed)
+        self.typing_duration = char_count * self.char_interval
+        self.typing_start_time = time.monotonic()
+        
+        refresh_rate = 60.0
+        screen = self.screen()
+        if screen and screen.refreshRate() > 0:
+            refresh_rate = screen.refreshRate()
+        
+        # 字元間隔比畫面更新慢時不需要逐幀觸發
+        frame_ms = max(1, int(1000.0 / refresh_rate))
+        self.typing_timer.start(max(1, min(frame_ms, int(typing_speed))))
+        
+    def typing_completion_time(self):
+        """打字預計完成的單調時鐘時間（未在打字時為 None）"""
+        if self.typing_start_time is None:
+            return None
+        return self.typing_start_time + self.typing_duration
+        
+    def enable_tts_sync(self, tts_text, estimated_duration=0.0):
+        """啟用TTS實時進度同步模式
+
+        estimated_duration 為時長模型預估的朗讀秒數：朗讀開始後（start_tts_pacing）字幕至少依此速度推進，
+        TTS 進度較快時以進度為準；字幕完成仍以真正的朗讀結束為準。
+        """
         self.tts_sync_enabled = True
         self.tts_text = tts_text
         self.tts_text_length = len(tts_text)
+        self.tts_estimated_duration = estimated_duration
         self.current_tts_position = 0
         self.last_valid_tts_position = 0  # 記錄最後一個有效進度
         
         # 停止原來的打字計時器
-        if self.typing_timer.isActive():
-            self.typing_timer.stop()
+        self._stop_typing()
         
-        print(f"TTS同步啟用: 字符數={len(tts_text)}, 基於實時TTS進度")
+        print(f"TTS同步啟用: 字符數={len(tts_text)}, 預估朗讀 {estimated_duration:.1f}s")
+        
+    def start_tts_pacing(self):
+        """朗讀開始：依預估時長推進字幕（TTS 進度事件稀疏或缺少時仍平順打字）"""
+        if not self.tts_sync_enabled or self.tts_estimated_duration <= 0 or not self.is_showing:
+            return
+        if self.is_bilingual_mode:
+            char_count = self.estimate_typing_chars(self.tc_text, self.en_text)
+        else:
+            char_count = len(getattr(self, 'full_text', ''))
+        if char_count <= 0:
+            return
+        self._start_typing(self.tts_estimated_duration * 1000 / char_count, char_count)
         
     def update_tts_progress(self, current_pos, total_len):
         """更新TTS進度並同步字幕顯示"""
@@ -149,7 +219,7 @@ class CaptionWidget(QWidget):
             if target_index > self.current_index:
                 self.current_text = self.full_text[:target_index]
                 self.current_index = target_index
-                self.update()
+                self._request_repaint()
                 
                 # 不要在這裡觸發完成信號，等待真正的TTS完成
                     
@@ -179,7 +249,7 @@ class CaptionWidget(QWidget):
             
             # 不要在這裡觸發完成信號，等待真正的TTS完成
         
-        self.update()
+        self._request_repaint()
         
         # 不在這裡檢查完成，等待真正的TTS完成信號
         
@@ -208,7 +278,7 @@ class CaptionWidget(QWidget):
             if target_index > self.current_index:
                 self.current_text = self.full_text[:target_index]
                 self.current_index = target_index
-                self.update()
+                self._request_repaint()
                 
                 if self.current_index >= len(self.full_text):
                     print("All caption typing complete")
@@ -238,7 +308,7 @@ class CaptionWidget(QWidget):
                 self._tc_completed = True
                 self.tc_typing_complete.emit()
         
-        self.update()
+        self._request_repaint()
         
         # 檢查是否都完成
         if self._tc_completed and self._en_completed:
@@ -253,6 +323,7 @@ class CaptionWidget(QWidget):
         print("TTS真正完成，觸發字幕完成信號")
         self.tts_sync_enabled = False
         self.tts_start_time = None
+        self._stop_typing()  # 停止預估時長的基準進度，完成信號只在此發出一次
         
         # 立即完成所有字幕顯示
         if self.is_bilingual_mode:
@@ -289,90 +360,95 @@ class CaptionWidget(QWidget):
             self.char_timings = []
 
     def type_next_character(self):
-        """打字機效果 - 如果啟用TTS同步則跳過"""
-        if self.tts_sync_enabled:
+        """打字機效果（TTS同步時為預估時長的基準進度，不觸發完成）"""
+        if self.typing_start_time is None:
             return
-            
+        
+        # 目前應顯示的字數只由經過時間決定，計時器延遲時一次推進多個字元
+        elapsed = time.monotonic() - self.typing_start_time
+        
         if self.is_bilingual_mode and self.current_phase == "simultaneous":
-            self._handle_simultaneous_typing()
+            self._handle_simultaneous_typing(elapsed)
         else:
-            self._handle_single_typing()
+            self._handle_single_typing(elapsed)
     
-    def _handle_single_typing(self):
+    def _handle_single_typing(self, elapsed):
         """處理單語打字"""
-        if self.current_index < len(self.full_text):
-            self.current_text = self.full_text[:self.current_index + 1]
-            self.current_index += 1
-            self.update()
-        else:
-            self.typing_timer.stop()
+        target_index = min(len(self.full_text), int(elapsed / self.char_interval))
+        if self.tts_sync_enabled:
+            # 保留最後一個字元給真正的朗讀結束
+            target_index = min(target_index, len(self.full_text) - 1)
+        
+        if target_index > self.current_index:
+            self.current_index = target_index
+            self.current_text = self.full_text[:target_index]
+            self._request_repaint()
+        
+        if self.current_index >= len(self.full_text) and not self.tts_sync_enabled:
+            self._stop_typing()
             self.typing_complete.emit()
     
-    def _handle_simultaneous_typing(self):
-        """處理同時打字模式 - 改進的同步算法"""
+    def _handle_simultaneous_typing(self, elapsed):
+        """處理同時打字模式 - 兩種語言依相同進度比例推進，同時完成"""
         tc_total = len(self.tc_text)
         en_total = len(self.en_text)
         
-        # 計算當前進度
-        tc_progress = self.tc_index / tc_total if tc_total > 0 else 1.0
-        en_progress = self.en_index / en_total if en_total > 0 else 1.0
-        
-        # 決定要推進哪個語言
-        tc_advancing = False
-        en_advancing = False
-        
-        # 如果兩個都還沒完成
-        if not self._tc_completed and not self._en_completed:
-            # 比較進度，推進落後的那個
-            if tc_progress <= en_progress and self.tc_index < tc_total:
-                tc_advancing = True
-            if en_progress <= tc_progress and self.en_index < en_total:
-                en_advancing = True
-            
-            # 確保至少有一個在推進
-            if not tc_advancing and not en_advancing:
-                if self.tc_index < tc_total:
-                    tc_advancing = True
-                elif self.en_index < en_total:
-                    en_advancing = True
+        if self.typing_duration > 0:
+            progress = min(1.0, elapsed / self.typing_duration)
         else:
-            # 如果其中一個完成了，繼續推進另一個
-            if not self._tc_completed and self.tc_index < tc_total:
-                tc_advancing = True
-            if not self._en_completed and self.en_index < en_total:
-                en_advancing = True
-        
-        # 執行推進
-        if tc_advancing:
-            self.tc_current_text = self.tc_text[:self.tc_index + 1]
-            self.tc_index += 1
+            progress = 1.0
+        if self.tts_sync_enabled:
+            # 保留結尾給真正的朗讀結束
+            progress = min(progress, 0.99)
+        
+        tc_target = int(tc_total * progress)
+        en_target = int(en_total * progress)
+        changed = False
+        
+        if tc_target > self.tc_index:
+            self.tc_index = tc_target
+            self.tc_current_text = self.tc_text[:tc_target]
+            changed = True
             
-            if self.tc_index >= tc_total:
+            if self.tc_index >= tc_total and not self._tc_completed:
                 self._tc_completed = True
                 self.tc_typing_complete.emit()
                 
-        if en_advancing:
-            self.en_current_text = self.en_text[:self.en_index + 1]
-            self.en_index += 1
+        if en_target > self.en_index:
+            self.en_index = en_target
+            self.en_current_text = self.en_text[:en_target]
+            changed = True
             
-            if self.en_index >= en_total:
+            if self.en_index >= en_total and not self._en_completed:
                 self._en_completed = True
                 self.en_typing_complete.emit()
         
-        self.update()
+        if changed:
+            self._request_repaint()
         
         # 檢查是否都完成
-        if self._tc_completed and self._en_completed:
-            self.typing_timer.stop()
+        if progress >= 1.0:
+            if not self._tc_completed:
+                self._tc_completed = True
+                self.tc_typing_complete.emit()
+            if not self._en_completed:
+                self._en_completed = True
+                self.en_typing_complete.emit()
+            self._stop_typing()
             self.typing_complete.emit()
+    
+    def _stop_typing(self):
+        """停止打字計時"""
+        self.typing_timer.stop()
+        self.typing_start_time = None
             
     def hide(self):
         """隱藏字幕"""
-        self.typing_timer.stop()
+        self._stop_typing()
         self.current_text = ""
         self.is_showing = False
         self.is_bilingual_mode = False
-        self.tc_lines_cache = []
+        self._reset_render_cache()
         
         # 重置狀態
         self.tc_current_text = ""
@@ -380,163 +456,209 @@ class CaptionWidget(QWidget):
         self._tc_completed = False
         self._en_completed = False
         
-        # 重置TTS同步
-        self.disable_tts_sync()
+        # 重置TTS同步（字幕被收起而非朗讀完成，不發出完成信號）
+        self.tts_sync_enabled = False
+        self.tts_start_time = None
             
         super().hide()
         
-    def paintEvent(self, event):
-        """繪製字幕和背景"""
-        if not self.is_showing:
+    def set_caption_font(self, font):
+        """更換字型（排版快取失效）"""
+        self.font = font
+        self._reset_render_cache()
+        self.update()
+        
+    def resizeEvent(self, event):
+        """尺寸改變時排版快取失效"""
+        self._reset_render_cache()
+        super().resizeEvent(event)
+        
+    def _reset_render_cache(self):
+        """清除排版與行圖像快取"""
+        self.layout_cache = {}
+        self.line_pixmaps = {}
+        self.painted_rows = None
+        self.line_height = None
+        
+    def _get_layout(self, text):
+        """取得文本的排版結果，必要時重新排版"""
+        max_width = self.width() - 2 * self.padding
+        layout = self.layout_cache.get(text)
+        if layout is None or not layout.matches(text, self.font, max_width):
+            layout = CaptionLayout(text, self.font, max_width)
+            self.layout_cache[text] = layout
+        self.line_height = layout.line_height
+        return layout
+    
+    def _prepare_layouts(self, texts):
+        """顯示新字幕前：保留這些文本的排版，清除其餘快取"""
+        max_width = self.width() - 2 * self.padding
+        ready = {text: self.layout_cache[text] for text in texts
+                 if text in self.layout_cache and
+                 self.layout_cache[text].matches(text, self.font, max_width)}
+        
+        missing = [text for text in texts if text and text not in ready]
+        if missing:
+            print(f"字幕未預先排版，於顯示時排版 {len(missing)} 段")
+        
+        self._reset_render_cache()
+        self.layout_cache = ready
+        for text in texts:
+            self._get_layout(text)
+    
+    def prelayout(self, texts, on_ready=None, fallback_ms=100):
+        """在背景線程預先排版字幕，排版線程完成時立即呼叫 on_ready
+
+        fallback_ms 只是排版線程異常緩慢時的保險：逾時即呼叫 on_ready（改於顯示時排版），
+        之後才完成的結果仍會存入快取，顯示時若字型與寬度相同即可直接使用。
+        排版耗時記錄於 last_prelayout_ms（逾時或沒有文本時為 None）。
+        """
+        texts = [text for text in texts if text]
+        state = {'done': False}
+        self.last_prelayout_ms = None
+        fallback = QTimer(self)
+        fallback.setSingleShot(True)
+        
+        def finish(layouts=None):
+            if layouts is not None:
+                max_width = self.width() - 2 * self.padding
+                for text, layout in layouts.items():
+                    if layout.matches(text, self.font, max_width):
+                        self.layout_cache[text] = layout
+            if state['done']:
+                return
+            state['done'] = True
+            fallback.stop()
+            fallback.deleteLater()
+            if layouts is not None:
+                self.last_prelayout_ms = thread.elapsed * 1000
+            if on_ready:
+                on_ready()
+        
+        if not texts:
+            finish()
             return
-            
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
-        painter.setFont(self.font)
-        metrics = QFontMetrics(self.font)
+        self.layout_threads = [t for t in self.layout_threads if not t.isFinished()]
+        thread = CaptionLayoutThread(texts, self.font, self.width() - 2 * self.padding)
+        thread.layouts_ready.connect(finish)
+        self.layout_threads.append(thread)
+        thread.start()
         
+        fallback.timeout.connect(finish)
+        fallback.start(fallback_ms)
+        
+    def _visible_rows(self):
+        """目前應顯示的行 [(快取鍵, 文字, 寬度, 是否已完成), ...]，None 表示語言間的空行"""
         if self.is_bilingual_mode:
-            self._paint_bilingual(painter, metrics)
+            sections = []
+            if getattr(self, 'tc_current_text', ''):
+                sections.append((self.tc_text, len(self.tc_current_text)))
+            if getattr(self, 'en_current_text', ''):
+                sections.append((self.en_text, len(self.en_current_text)))
         else:
-            self._paint_single_language(painter, metrics)
-                
-    def _paint_single_language(self, painter, metrics):
-        """繪製單語字幕"""
-        if not self.current_text:
-            return
-            
-        lines = self._wrap_text(self.current_text, metrics)
-        line_height = metrics.height()
-        total_height = len(lines) * (line_height + self.line_spacing) - self.line_spacing + 2 * self.padding
+            sections = [(self.full_text, len(self.current_text))] if self.current_text else []
+        
+        rows = []
+        for text, index in sections:
+            if rows:
+                rows.append(None)  # 語言之間的間隔
+            layout = self._get_layout(text)
+            for line_no, (line, width) in enumerate(layout.visible_lines(index)):
+                complete = line == layout.lines[line_no].text.rstrip()
+                rows.append(((text, line_no), line, width, complete))
+        return rows
+    
+    def _row_rect(self, row_index, row_count, width):
+        """第 row_index 行背景的區域"""
+        if self.line_height is None:
+            self.line_height = QFontMetrics(self.font).height()
+        line_height = self.line_height
+        total_height = row_count * (line_height + self.line_spacing) - self.line_spacing + 2 * self.padding
         y_offset = self.height() - total_height
+        return QRect((self.width() - width) // 2 - self.padding,
+                     y_offset + row_index * (line_height + self.line_spacing) - 5,
+                     width + 2 * self.padding,
+                     line_height + 10)
+    
+    def _request_repaint(self):
+        """打字推進後只重繪內容改變的行；行數改變時才整個重繪"""
+        rows = self._visible_rows()
+        previous = self.painted_rows
+        self.painted_rows = rows
         
-        for i, line in enumerate(lines):
-            if line.strip():
-                self._draw_text_line(painter, line, i, y_offset, line_height, metrics)
-                
-    def _paint_bilingual(self, painter, metrics):
-        """繪製雙語字幕"""
-        line_height = metrics.height()
-        
-        tc_lines = []
-        en_lines = []
-        
-        if hasattr(self, 'tc_current_text') and self.tc_current_text:
-            tc_lines = self._wrap_text(self.tc_current_text, metrics)
+        if previous is None or len(previous) != len(rows):
+            self.update()
+            return
         
-        if hasattr(self, 'en_current_text') and self.en_current_text:
-            en_lines = self._wrap_text(self.en_current_text, metrics)
+        for index, (row, old_row) in enumerate(zip(rows, previous)):
+            if row == old_row or row is None:
+                continue
+            # 行寬以該行完整寬度計算，涵蓋打字中每個置中位置
+            key = row[0]
+            full_width = self._get_layout(key[0]).lines[key[1]].widths[-1]
+            self.update(self._row_rect(index, len(rows), max(full_width, row[2])))
         
-        total_lines = len(tc_lines) + len(en_lines)
-        if total_lines > 0 and len(tc_lines) > 0 and len(en_lines) > 0:
-            total_lines += 1  # 語言之間的間隔
+    def paintEvent(self, event):
+        """繪製字幕和背景：已完成的行使用預先繪製的圖像，只即時繪製打字中的行"""
+        if not self.is_showing:
+            return
             
-        total_height = total_lines * (line_height + self.line_spacing) - self.line_spacing + 2 * self.padding
-        y_offset = self.height() - total_height
+        paint_start = time.perf_counter()
+        rows = self._visible_rows()
+        self.painted_rows = rows
+        if not rows:
+            return
         
-        current_line = 0
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setFont(self.font)
         
-        # 繪製中文
-        for line in tc_lines:
-            if line.strip():
-                self._draw_text_line(painter, line, current_line, y_offset, line_height, metrics)
-            current_line += 1
+        dirty = event.rect()
+        for index, row in enumerate(rows):
+            if row is None:
+                continue
+            key, line, width, complete = row
+            if not line.strip():
+                continue
             
-        # 語言之間的間隔
-        if len(tc_lines) > 0 and len(en_lines) > 0:
-            current_line += 1
+            rect = self._row_rect(index, len(rows), width)
+            if not rect.intersects(dirty):
+                continue
             
-        # 繪製英文
-        for line in en_lines:
-            if line.strip():
-                self._draw_text_line(painter, line, current_line, y_offset, line_height, metrics)
-            current_line += 1
-                
-    def _draw_text_line(self, painter, line, line_index, y_offset, line_height, metrics):
-        """繪製單行文本"""
-        line_width = metrics.horizontalAdvance(line)
-        
-        bg_x = (self.width() - line_width) // 2 - self.padding
-        bg_y = y_offset + line_index * (line_height + self.line_spacing) - 5
-        bg_width = line_width + 2 * self.padding
-        bg_height = line_height + 10
+            if complete:
+                pixmap = self.line_pixmaps.get(key)
+                if pixmap is None:
+                    pixmap = self._render_line_pixmap(line, width, rect)
+                    self.line_pixmaps[key] = pixmap
+                painter.drawPixmap(rect.topLeft(), pixmap)
+            else:
+                self._draw_text_line(painter, line, rect)
         
+        if self.first_paint_pending:
+            self.first_paint_pending = False
+            print(f"字幕首幀繪製: {(time.perf_counter() - paint_start) * 1000:.1f}ms")
+                
+    def _render_line_pixmap(self, line, width, rect):
+        """將完成的行（含背景）繪製為圖像"""
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(int(rect.width() * ratio), int(rect.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setFont(self.font)
+        self._draw_text_line(painter, line, QRect(0, 0, rect.width(), rect.height()))
+        painter.end()
+        return pixmap
+                
+    def _draw_text_line(self, painter, line, rect):
+        """在背景區域內繪製單行文本"""
         painter.setPen(Qt.PenStyle.NoPen)
         painter.setBrush(QColor(0, 0, 0, 180))
-        painter.drawRoundedRect(bg_x, bg_y, bg_width, bg_height, 5, 5)
+        painter.drawRoundedRect(rect, 5, 5)
         
+        # 基線位於背景上緣下方一個行高
         painter.setPen(QColor(255, 255, 255))
-        text_x = (self.width() - line_width) // 2
-        text_y = y_offset + line_index * (line_height + self.line_spacing) + line_height - 5
-        painter.drawText(text_x, text_y, line)
-
-    def _wrap_text(self, text, metrics):
-        """文字自動換行"""
-        if not text:
-            return []
-            
-        text = self._clean_text_for_display(text)
-        lines = []
-        max_width = self.width() - 2 * self.padding
-        
-        # 檢測是否為中文文本
-        chinese_char_count = sum(1 for char in text if '\u4e00' <= char <= '\u9fff')
-        total_char_count = len(text)
-        is_mostly_chinese = chinese_char_count > total_char_count * 0.5
-        
-        if is_mostly_chinese:
-            # 中文按字符換行
-            lines = self._wrap_by_character(text, metrics, max_width)
-        else:
-            # 英文按單詞換行
-            words = text.split(' ')
-            current_line = ""
-            
-            for word in words:
-                test_line = current_line + (' ' if current_line else '') + word
-                line_width = metrics.horizontalAdvance(test_line)
-                
-                if line_width > max_width and current_line:
-                    lines.append(current_line.strip())
-                    current_line = word
-                else:
-                    current_line = test_line
-                    
-            if current_line.strip():
-                lines.append(current_line.strip())
-        
-        return lines
-
-    def _clean_text_for_display(self, text):
-        """清理文本，避免顯示問題"""
-        if not text:
-            return text
-        
-        # 移除不可見字符
-        text = re.sub(r'[^\x00-\x7F\u4e00-\u9fff]+', ' ', text)
-        
-        # 合併多個空格
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text.strip()
-
-    def _wrap_by_character(self, text, metrics, max_width):
-        """按字符換行（主要用於中文）"""
-        lines = []
-        current_line = ""
-        
-        for char in text:
-            test_line = current_line + char
-            line_width = metrics.horizontalAdvance(test_line)
-            
-            if line_width > max_width and current_line:
-                lines.append(current_line)
-                current_line = char
-            else:
-                current_line = test_line
-                
-        if current_line:
-            lines.append(current_line)
-            
-        return lines
\ No newline at end of file
+        painter.drawText(rect.x() + self.padding, rect.y() + rect.height() - 10, line)
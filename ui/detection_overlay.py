@@ -1,27 +1,30 @@
 # Location: project_v2/ui/detection_overlay.py
 # Usage: 人臉檢測框動畫覆蓋層 - 基於 test_frame_effect 的動畫系統
 
-import cv2
+import time
 import random
-import numpy as np
 from PyQt6.QtWidgets import QWidget
-from PyQt6.QtGui import QPainter, QImage, QPixmap
-from PyQt6.QtCore import QTimer, pyqtSignal
+from PyQt6.QtGui import QPainter, QImage, QPixmap, QPen, QColor
+from PyQt6.QtCore import Qt, QTimer, QRect, QRectF, QLineF, pyqtSignal
 from utils import AnimConfigLoader
 
 
 class VisualRect:
-    """視覺矩形動畫類 - 完全基於 test_frame_effect/text_camera3.py 實現"""
+    """視覺矩形動畫類 - 完全基於 test_frame_effect/text_camera3.py 實現
+
+    目標位置由偵測結果設定（set_target），動畫由 DetectionOverlay 以固定時間步長
+    推進（step），速度與相機幀率及人臉數量無關；各狀態持續時間以秒為單位。
+    參數來自共用的 AnimParams，重新載入設定時整體替換。
+    """
     
-    def __init__(self, x, y, w, h, config):
-        self.config = config
+    def __init__(self, x, y, w, h, params):
+        self.params = params
         self.target_x = x
         self.target_y = y
         
-        # 從配置獲取框放大倍數 (默認1.5倍)
-        size_multiplier = self.config.get_float('BASIC', 'frame_size_multiplier', 1.5)
-        self.target_w = w * size_multiplier
-        self.target_h = h * size_multiplier
+        # 框放大倍數
+        self.target_w = w * params.frame_size_multiplier
+        self.target_h = h * params.frame_size_multiplier
         
         self.x = x
         self.y = y
@@ -30,205 +33,121 @@ class VisualRect:
         self.outside_w = 0
         self.outside_h = 0
         
-        self.time_count = 0
+        self.elapsed = 0.0  # 動畫已進行秒數（只增加，不重置）
         self.state = 0
         self.start_line = 0
         self.end_line = 0
-        self.max_time = 0  # 記錄最大時間，避免重置
-        
-        # 從設定檔載入動畫參數
-        self.position_smooth = self.config.get_float('BASIC', 'position_smooth', 0.08)
-        self.state1_duration = self.config.get_int('BASIC', 'state1_duration', 60)
-        self.state2_duration = self.config.get_int('BASIC', 'state2_duration', 60)
-        self.state3_duration = self.config.get_int('BASIC', 'state3_duration', 60)
-        self.state4_duration = self.config.get_int('BASIC', 'state4_duration', 60)
         
-        # 計算總動畫時長
-        self.total_duration = self.state1_duration + self.state2_duration + self.state3_duration + self.state4_duration
+    @property
+    def total_duration(self):
+        """總動畫時長（秒）"""
+        return self.params.total_duration
         
-    def update(self, target_x, target_y, target_w, target_h):
-        """更新目標位置和尺寸"""
-        # 從配置獲取框放大倍數
-        size_multiplier = self.config.get_float('BASIC', 'frame_size_multiplier', 1.5)
-        
-        # 更新目標位置和尺寸
+    def set_target(self, target_x, target_y, target_w, target_h):
+        """更新目標位置和尺寸（每次偵測結果呼叫，不推進動畫）"""
+        multiplier = self.params.frame_size_multiplier
         self.target_x = target_x
         self.target_y = target_y
-        self.target_w = target_w * size_multiplier
-        self.target_h = target_h * size_multiplier
-       
-        # 使用設定檔中的位置平滑參數 - 更穩定的平滑
-        self.x += (self.target_x - self.x) * self.position_smooth
-        self.y += (self.target_y - self.y) * self.position_smooth
+        self.target_w = target_w * multiplier
+        self.target_h = target_h * multiplier
+        
+    def step(self):
+        """推進一個固定時間步長（params.fixed_dt 秒）"""
+        p = self.params
+        
+        # 位置平滑 - 更穩定的平滑
+        self.x += (self.target_x - self.x) * p.position_step
+        self.y += (self.target_y - self.y) * p.position_step
        
         # 穩定的時間計數器 - 只增加，不重置
-        self.time_count += 1
-        self.max_time = max(self.max_time, self.time_count)
+        self.elapsed += p.fixed_dt
         
         # 動畫完成後保持在最終狀態，避免重置
-        if self.time_count >= self.total_duration:
-            self.state = 4  # 保持在最終狀態
-        elif self.time_count < self.state1_duration:
+        if self.elapsed < p.state1_end:
             self.state = 1
-        elif self.time_count < self.state1_duration + self.state2_duration:
+        elif self.elapsed < p.state2_end:
             self.state = 2
-        elif self.time_count < self.state1_duration + self.state2_duration + self.state3_duration:
+        elif self.elapsed < p.state3_end:
             self.state = 3
         else:
             self.state = 4
             
         # 狀態1: 外框角落線條出現
-        if self.state >= 1:
-            outside_smooth = self.config.get_float('STATE1', 'outside_smooth', 0.12)
-            self.outside_w += (self.target_w - self.outside_w) * outside_smooth
-            self.outside_h += (self.target_h - self.outside_h) * outside_smooth
+        self.outside_w += (self.target_w - self.outside_w) * p.outside_step
+        self.outside_h += (self.target_h - self.outside_h) * p.outside_step
             
         # 狀態2: 內框出現 - 保持之前狀態的效果
         if self.state >= 2:
-            inner_smooth = self.config.get_float('STATE2', 'inner_smooth', 0.1)
-            self.w += (self.target_w - self.w) * inner_smooth
-            self.h += (self.target_h - self.h) * inner_smooth
+            self.w += (self.target_w - self.w) * p.inner_step
+            self.h += (self.target_h - self.h) * p.inner_step
             
         # 狀態3: 十字線開始出現 - 保持之前狀態的效果
         if self.state >= 3:
-            cross_start_smooth = self.config.get_float('STATE3', 'cross_start_smooth', 0.08)
-            self.start_line += (1 - self.start_line) * cross_start_smooth
+            self.start_line += (1 - self.start_line) * p.cross_start_step
             
         # 狀態4: 十字線完全延伸 - 保持之前狀態的效果
         if self.state >= 4:
-            cross_end_smooth = self.config.get_float('STATE4', 'cross_end_smooth', 0.12)
-            self.end_line += (1 - self.end_line) * cross_end_smooth
+            self.end_line += (1 - self.end_line) * p.cross_end_step
 
-    def draw(self, frame):
-        """繪製動畫框 - 完全基於 test_frame_effect 實現"""
-        # 使用設定檔中的閃爍機率
-        flicker_prob = self.config.get_float('VISUAL', 'flicker_probability', 0.2)
-        show = random.random() > flicker_prob
-        
-        if show and (self.state in [1, 2, 3, 4]):
-            # 使用設定檔中的顏色 (BGR格式)
-            color = self.config.get_color_bgr()
+    def paint(self, painter, corner_pen, cross_pen, fill_color):
+        """以 QPainter 繪製動畫框（向量、抗鋸齒）"""
+        # 閃爍
+        if self.state == 0 or random.random() <= self.params.flicker_probability:
+            return
+        
+        # 狀態1和以後: 角落線條
+        half_w = self.outside_w * 0.5
+        half_h = self.outside_h * 0.5
+        corner_w = self.outside_w * self.params.corner_length_ratio
+        corner_h = self.outside_h * self.params.corner_length_ratio
+        left, right = self.x - half_w, self.x + half_w
+        top, bottom = self.y - half_h, self.y + half_h
+        
+        painter.setPen(corner_pen)
+        painter.drawLines([
+            QLineF(left, top, left + corner_w, top), QLineF(left, top, left, top + corner_h),
+            QLineF(right, top, right - corner_w, top), QLineF(right, top, right, top + corner_h),
+            QLineF(right, bottom, right - corner_w, bottom), QLineF(right, bottom, right, bottom - corner_h),
+            QLineF(left, bottom, left + corner_w, bottom), QLineF(left, bottom, left, bottom - corner_h)
+        ])
+        
+        # 狀態2和3: 內框
+        if self.state in (2, 3):
+            inner_w = self.w * self.params.inner_size_ratio
+            inner_h = self.h * self.params.inner_size_ratio
+            painter.fillRect(QRectF(self.x - inner_w * 0.5, self.y - inner_h * 0.5, inner_w, inner_h),
+                             fill_color)
+        
+        # 狀態3和4: 十字準星
+        if self.state in (3, 4):
+            start_h = self.start_line * self.h * self.params.cross_length_ratio_h
+            end_h = self.end_line * self.h * self.params.cross_length_ratio_h
+            start_w = self.start_line * self.w * self.params.cross_length_ratio_w
+            end_w = self.end_line * self.w * self.params.cross_length_ratio_w
             
-            # 狀態1和以後: 繪製角落線條
-            self._draw_corner_lines(frame, color)
-            
-        # 狀態2和3: 繪製內框
-        if show and (self.state in [2, 3]):
-            self._draw_inner_rectangle(frame, color)
-       
-        # 狀態3和4: 繪製十字準星
-        if show and (self.state in [3, 4]):
-            self._draw_cross_lines(frame, color)
-
-    def _draw_corner_lines(self, frame, color):
-        """繪製角落線條"""
-        # 使用設定參數的角落線條
-        corner_length = self.config.get_float('STATE1', 'corner_length_ratio', 0.07)
-        line_thickness = self.config.get_int('STATE1', 'line_thickness', 1)
-        
-        # 轉換為整數坐標
-        center_x = int(self.x)
-        center_y = int(self.y)
-        half_w = int(self.outside_w * 0.5)
-        half_h = int(self.outside_h * 0.5)
-        corner_len_w = int(self.outside_w * corner_length)
-        corner_len_h = int(self.outside_h * corner_length)
-        
-        # 左上角
-        cv2.line(frame, 
-                (center_x - half_w, center_y - half_h),
-                (center_x - half_w + corner_len_w, center_y - half_h), 
-                color, line_thickness)
-        cv2.line(frame, 
-                (center_x - half_w, center_y - half_h),
-                (center_x - half_w, center_y - half_h + corner_len_h), 
-                color, line_thickness)
-        
-        # 右上角
-        cv2.line(frame, 
-                (center_x + half_w, center_y - half_h),
-                (center_x + half_w - corner_len_w, center_y - half_h), 
-                color, line_thickness)
-        cv2.line(frame, 
-                (center_x + half_w, center_y - half_h),
-                (center_x + half_w, center_y - half_h + corner_len_h), 
-                color, line_thickness)
-        
-        # 右下角
-        cv2.line(frame, 
-                (center_x + half_w, center_y + half_h),
-                (center_x + half_w - corner_len_w, center_y + half_h), 
-                color, line_thickness)
-        cv2.line(frame, 
-                (center_x + half_w, center_y + half_h),
-                (center_x + half_w, center_y + half_h - corner_len_h), 
-                color, line_thickness)
-        
-        # 左下角
-        cv2.line(frame, 
-                (center_x - half_w, center_y + half_h),
-                (center_x - half_w + corner_len_w, center_y + half_h), 
-                color, line_thickness)
-        cv2.line(frame, 
-                (center_x - half_w, center_y + half_h),
-                (center_x - half_w, center_y + half_h - corner_len_h), 
-                color, line_thickness)
-
-    def _draw_inner_rectangle(self, frame, color):
-        """繪製內框半透明矩形"""
-        # 使用配置參數
-        inner_alpha = self.config.get_float('STATE2', 'inner_alpha', 50) / 255.0
-        inner_size_ratio = self.config.get_float('STATE2', 'inner_size_ratio', 0.9)
-        
-        # 創建半透明覆蓋層
-        overlay = frame.copy()
-        inner_w = int(self.w * inner_size_ratio)
-        inner_h = int(self.h * inner_size_ratio)
-        
-        cv2.rectangle(overlay,
-                     (int(self.x - inner_w*0.5), int(self.y - inner_h*0.5)),
-                     (int(self.x + inner_w*0.5), int(self.y + inner_h*0.5)),
-                     color, -1)
-        
-        cv2.addWeighted(overlay, inner_alpha, frame, 1 - inner_alpha, 0, frame)
-
-    def _draw_cross_lines(self, frame, color):
-        """繪製十字準星線條"""
-        # 使用配置參數
-        cross_length_h = self.config.get_float('STATE3', 'cross_length_ratio_h', 0.59)
-        cross_length_w = self.config.get_float('STATE3', 'cross_length_ratio_w', 0.55)
-        line_thickness = self.config.get_int('STATE4', 'line_thickness', 2)
-        
-        # 計算十字線位置
-        start_h = int(self.start_line * self.h * cross_length_h)
-        end_h = int(self.end_line * self.h * cross_length_h)
-        start_w = int(self.start_line * self.w * cross_length_w)
-        end_w = int(self.end_line * self.w * cross_length_w)
-        
-        # 垂直線 - 上
-        cv2.line(frame,
-                (int(self.x), int(self.y - start_h)),
-                (int(self.x), int(self.y - end_h)),
-                color, line_thickness)
-        # 垂直線 - 下
-        cv2.line(frame,
-                (int(self.x), int(self.y + start_h)),
-                (int(self.x), int(self.y + end_h)),
-                color, line_thickness)
-        # 水平線 - 右
-        cv2.line(frame,
-                (int(self.x + start_w), int(self.y)),
-                (int(self.x + end_w), int(self.y)),
-                color, line_thickness)
-        # 水平線 - 左
-        cv2.line(frame,
-                (int(self.x - start_w), int(self.y)),
-                (int(self.x - end_w), int(self.y)),
-                color, line_thickness)
+            painter.setPen(cross_pen)
+            painter.drawLines([
+                QLineF(self.x, self.y - start_h, self.x, self.y - end_h),
+                QLineF(self.x, self.y + start_h, self.x, self.y + end_h),
+                QLineF(self.x + start_w, self.y, self.x + end_w, self.y),
+                QLineF(self.x - start_w, self.y, self.x - end_w, self.y)
+            ])
+        
+    def bounds(self):
+        """目前圖形涵蓋的範圍（含線寬），用於局部重繪"""
+        half_w = max(self.outside_w, self.w) * 0.5
+        half_h = max(self.outside_h, self.h) * 0.5
+        margin = max(self.params.corner_thickness, self.params.cross_thickness) + 2
+        return QRect(int(self.x - half_w) - margin, int(self.y - half_h) - margin,
+                     int(half_w * 2) + margin * 2, int(half_h * 2) + margin * 2)
 
 
 class DetectionOverlay(QWidget):
-    """檢測框覆蓋層 - 使用新動畫系統"""
+    """檢測框覆蓋層 - 使用新動畫系統
+
+    檢測框以 QPainter 繪製在獨立的透明圖層上，依自己的動畫步進重繪，
+    不修改相機畫面。
+    """
     
     # 信號定義
     detection_updated = pyqtSignal(bool)  # 檢測狀態更新信號
@@ -236,6 +155,11 @@ class DetectionOverlay(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         
+        # 透明圖層，不攔截滑鼠事件
+        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setAutoFillBackground(False)
+        
         # 載入動畫配置
         self.anim_config = AnimConfigLoader()
         
@@ -246,16 +170,29 @@ class DetectionOverlay(QWidget):
             for key, error in config_errors.items():
                 print(f"  {error}")
         
-        # 檢測框列表
+        # 檢測框列表（依追蹤 ID 對應）
         self.visual_rects = []
+        self.rects_by_id = {}
+        self.painted_region = QRect()  # 上次繪製的範圍（局部重繪用）
+        self.paint_params = None  # 畫筆對應的參數快照
+        self.corner_pen = None
+        self.cross_pen = None
+        self.fill_color = None
+        
+        # 固定時間步長（params.fixed_dt）：計時器只負責喚醒，推進幾步由實際經過時間決定
+        self.max_steps_per_tick = 8  # 卡頓過久時丟棄多餘時間，避免追趕
+        self.accumulator = 0.0
+        self.last_tick_time = None
         
         # 動畫定時器 - 60 FPS
         self.animation_timer = QTimer()
+        self.animation_timer.setTimerType(Qt.TimerType.PreciseTimer)
         self.animation_timer.timeout.connect(self.update_animation)
         self.animation_timer.start(16)  # ~60 FPS (1000ms / 60fps = 16.67ms)
         
         # 當前檢測到的人臉
         self.current_faces = []
+        self.current_ids = []
         self.has_faces = False
         
         # 性能統計
@@ -263,11 +200,17 @@ class DetectionOverlay(QWidget):
         self.last_fps_update = 0
         self.fps = 0
         
-        print(f"檢測框動畫初始化完成，總動畫時長: {self.anim_config.get_total_duration()} 幀")
+        print(f"檢測框動畫初始化完成，總動畫時長: {self.anim_config.get_total_duration():.1f} 秒")
     
-    def update_faces(self, faces):
-        """更新檢測到的人臉"""
+    def update_faces(self, faces, track_ids=None):
+        """更新檢測到的人臉
+
+        faces: [(x, y, w, h), ...]；track_ids 為對應的追蹤 ID，
+        檢測框依 ID 對應，人臉順序改變時動畫不會重新開始或跳動。
+        未提供時依列表順序對應。
+        """
         self.current_faces = faces
+        self.current_ids = list(track_ids) if track_ids is not None else list(range(len(faces)))
         new_has_faces = len(faces) > 0
         
         # 發送檢測狀態變化信號
@@ -279,77 +222,80 @@ class DetectionOverlay(QWidget):
         self._update_visual_rects()
     
     def _update_visual_rects(self):
-        """更新視覺矩形列表"""
-        current_count = len(self.visual_rects)
-        needed_count = len(self.current_faces)
-        
-        # 添加新的矩形
-        while len(self.visual_rects) < needed_count:
-            face = self.current_faces[len(self.visual_rects)]
-            x, y, w, h = face
+        """依追蹤 ID 更新視覺矩形：既有身分沿用動畫，新身分建立新矩形"""
+        rects = {}
+        for track_id, (x, y, w, h) in zip(self.current_ids, self.current_faces):
             center_x = x + w // 2
             center_y = y + h // 2
             
-            rect = VisualRect(center_x, center_y, w, h, self.anim_config)
-            self.visual_rects.append(rect)
+            rect = self.rects_by_id.get(track_id)
+            if rect is None:
+                rect = VisualRect(center_x, center_y, w, h, self.anim_config.params)
+            else:
+                rect.set_target(center_x, center_y, w, h)
+            rects[track_id] = rect
         
-        # 移除多餘的矩形
-        self.visual_rects = self.visual_rects[:needed_count]
-        
-        # 更新現有矩形的目標位置
-        for i, rect in enumerate(self.visual_rects):
-            if i < len(self.current_faces):
-                x, y, w, h = self.current_faces[i]
-                center_x = x + w // 2
-                center_y = y + h // 2
-                rect.update(center_x, center_y, w, h)
+        self.rects_by_id = rects
+        self.visual_rects = list(rects.values())
         
     def update_animation(self):
-        """更新動畫幀"""
-        # 只有在有檢測框時才進行動畫更新
-        if self.visual_rects:
-            # 更新每個視覺矩形的動畫狀態
+        """依實際經過時間，以固定步長推進所有檢測框（每步每個框只更新一次）"""
+        now = time.monotonic()
+        
+        # 沒有檢測框時不累積時間，重新出現時從目前時間開始
+        if not self.visual_rects:
+            self.last_tick_time = None
+            self.accumulator = 0.0
+            return
+        
+        fixed_dt = self.anim_config.params.fixed_dt
+        if self.last_tick_time is None:
+            self.last_tick_time = now - fixed_dt
+        self.accumulator += now - self.last_tick_time
+        self.last_tick_time = now
+        
+        steps = int(self.accumulator / fixed_dt)
+        if steps > self.max_steps_per_tick:
+            steps = self.max_steps_per_tick
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * fixed_dt
+        
+        for _ in range(steps):
             for rect in self.visual_rects:
-                # 如果有當前人臉數據，繼續更新位置
-                if self.current_faces:
-                    for i, face in enumerate(self.current_faces):
-                        if i < len(self.visual_rects):
-                            x, y, w, h = face
-                            center_x = x + w // 2
-                            center_y = y + h // 2
-                            self.visual_rects[i].update(center_x, center_y, w, h)
-            
+                rect.step()
+        
+        if steps:
             # 觸發重繪
-            self.update()
+            self._request_repaint()
         
-        # 更新FPS統計
-        self.frame_count += 1
-        import time
-        current_time = time.time()
-        if current_time - self.last_fps_update >= 1.0:
+        # 更新FPS統計（每秒動畫步數）
+        self.frame_count += steps
+        if now - self.last_fps_update >= 1.0:
             self.fps = self.frame_count
             self.frame_count = 0
-            self.last_fps_update = current_time
+            self.last_fps_update = now
     
-    def draw_on_frame(self, frame):
-        """在OpenCV幀上繪製檢測框"""
-        if not self.visual_rects:
-            return frame
-        
-        # 為每個視覺矩形繪製動畫
+    def _request_repaint(self):
+        """只重繪檢測框目前與上次涵蓋的範圍"""
+        region = QRect()
         for rect in self.visual_rects:
-            rect.draw(frame)
+            region = region.united(rect.bounds())
+        self.update(region.united(self.painted_region))
+        self.painted_region = region
         
-        return frame
-    
     def clear_detections(self):
         """清除所有檢測框"""
         self.visual_rects.clear()
-        self.current_faces.clear()
+        self.rects_by_id.clear()
+        self.current_faces = []
+        self.current_ids = []
         if self.has_faces:
             self.has_faces = False
             self.detection_updated.emit(False)
-        self.update()
+        if not self.painted_region.isEmpty():
+            self.update(self.painted_region)
+            self.painted_region = QRect()
     
     def reload_config(self):
         """重新載入動畫配置"""
@@ -364,13 +310,14 @@ class DetectionOverlay(QWidget):
                 print(f"  {error}")
         
         # 重置所有動畫狀態
+        # 所有檢測框改用新的參數快照
+        params = self.anim_config.params
         for rect in self.visual_rects:
-            rect.config = self.anim_config
-            rect.time_count = 0
-            rect.max_time = 0
+            rect.params = params
+            rect.elapsed = 0.0
             rect.state = 0
         
-        print(f"配置重載完成，新動畫時長: {self.anim_config.get_total_duration()} 幀")
+        print(f"配置重載完成，新動畫時長: {self.anim_config.get_total_duration():.1f} 秒")
     
     def get_animation_info(self):
         """獲取動畫信息"""
@@ -385,13 +332,31 @@ class DetectionOverlay(QWidget):
             rect = self.visual_rects[0]  # 取第一個矩形的狀態
             info.update({
                 'current_state': rect.state,
-                'time_count': rect.time_count,
-                'animation_progress': min(100, (rect.time_count / rect.total_duration) * 100)
+                'elapsed': rect.elapsed,
+                'animation_progress': min(100, (rect.elapsed / max(rect.total_duration, 1e-6)) * 100)
             })
         
         return info
         
+    def _update_pens(self, params):
+        """參數快照替換時重建畫筆與填色"""
+        b, g, r = params.color
+        self.corner_pen = QPen(QColor(r, g, b), params.corner_thickness)
+        self.cross_pen = QPen(QColor(r, g, b), params.cross_thickness)
+        self.fill_color = QColor(r, g, b, int(round(params.inner_alpha * 255)))
+        self.paint_params = params
+        
     def paintEvent(self, event):
-        """PyQt繪製事件 - 目前主要用於調試"""
-        super().paintEvent(event)
-        # 這裡可以添加額外的PyQt繪製邏輯，但主要繪製在OpenCV幀上進行
\ No newline at end of file
+        """以 QPainter 繪製檢測框圖層"""
+        if not self.visual_rects:
+            return
+        
+        params = self.anim_config.params
+        if params is not self.paint_params:
+            self._update_pens(params)
+        
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        for rect in self.visual_rects:
+            rect.paint(painter, self.corner_pen, self.cross_pen, self.fill_color)
+        painter.end()
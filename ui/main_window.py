@@ -5,14 +5,20 @@ from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel, QGraphics
 from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, pyqtSignal, QRect
 from PyQt6.QtGui import QPainter, QPixmap, QFont, QFontDatabase
 import os
+import time
 import cv2
 import numpy as np
 
-from core import StateMachine, SystemState, CameraManager, FaceDetector, ArduinoController
+from core import StateMachine, SystemState, CameraManager, FaceDetector, ArduinoController, FramePipeline
+from core.motion_gate import MotionGate
+from core.frame_selector import BestFrameSelector
+from core.detections import PortraitTransform
+from core.state_machine import NO_LLM_CAPTION
 from core.ssr_controller import SSRController  # 新增SSR控制器
 from ui.detection_overlay import DetectionOverlay
 from ui.caption_widget import CaptionWidget
 from services import OllamaService, ImageService, TTSService
+from services.ollama_service import FALLBACK_CAPTION, ERROR_CAPTION
 from utils import ConfigLoader, FontManager
 
 
@@ -45,9 +51,24 @@ class MainWindow(QMainWindow):
         """初始化系統元件"""
         # 核心元件
         self.state_machine = StateMachine(self.config)
-        self.camera_manager = CameraManager()
+        idle_width = int(self.config.get('idle_capture_width', 640))
+        self.camera_manager = CameraManager(
+            idle_capture=(idle_width, idle_width * 9 // 16, int(self.config.get('idle_capture_fps', 10))))
         self.face_detector = FaceDetector(self.config)
         
+        # 截圖候選：偵測階段保留最近畫面中品質最好的一幀
+        self.display_transform = PortraitTransform()  # 偵測框 → 直式顯示座標（每幀重複使用）
+        self.frame_selector = BestFrameSelector(window=float(self.config.get('screenshot_best_window', 1.0)))
+        
+        # 依狀態開關畫面處理階段（畫面被遮住時停止顯示與偵測）
+        self.frame_pipeline = FramePipeline()
+        
+        # 省電模式：偵測階段長時間無人時降低擷取規格，只在畫面有動靜時執行人臉偵測
+        self.idle_timeout = float(self.config.get('idle_timeout', 30))
+        self.motion_gate = MotionGate(area_ratio=float(self.config.get('idle_motion_ratio', 0.01)))
+        self.idle_mode = False
+        self.last_activity_time = time.monotonic()
+        
         # Arduino (選配)
         self.arduino_controller = None
         if self.startup_params['arduino_port']:
@@ -68,6 +89,9 @@ class MainWindow(QMainWindow):
         # 設定TTS參數
         if self.tts_service.is_available():
             print(f"TTS 服務已啟用")
+            
+            # 預先合成固定字幕，避免每次朗讀都重新合成
+            self.tts_service.warm_up_cache([NO_LLM_CAPTION, FALLBACK_CAPTION, ERROR_CAPTION])
         
         # 狀態
         self.current_screenshot_path = None
@@ -78,10 +102,14 @@ class MainWindow(QMainWindow):
         self.caption_completed = False
         self.tts_completed = True
         self.wait_timer_completed = False
+        self.caption_wait_scheduled = False
         
         # 防止重複顯示字幕
         self.caption_displayed = False
         
+        # 本週期排程的計時器（週期取消時一併停止）
+        self.cycle_timers = []
+        
         # FPS 計算
         self.fps_timer = QTimer()
         self.fps_timer.timeout.connect(self.update_fps)
@@ -139,6 +167,10 @@ class MainWindow(QMainWindow):
         self.screenshot_label.setScaledContents(True)
         self.screenshot_label.hide()
         
+        # 字幕字型：先載入子集字型，完整字型於啟動後延遲載入
+        self.font_manager = FontManager.instance()
+        self.font_manager.prepare_caption_font(self.get_caption_charset_sources())
+        
         # 字幕顯示
         caption_text_size = self.startup_params.get('caption_text_size', 28)
         self.caption_widget = CaptionWidget(self.central_widget, self.scale_factor, caption_text_size)
@@ -150,6 +182,8 @@ class MainWindow(QMainWindow):
         self.weapon_label.resize(self.window_width, self.window_height)
         self.weapon_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.weapon_label.setScaledContents(False)
+        # 黑色底：圖片小於視窗時不露出下方停止更新的相機畫面（IMG_SHOW 期間不顯示相機畫面）
+        self.weapon_label.setStyleSheet("background-color: black;")
         self.weapon_label.hide()
         
         # 黑屏遮罩
@@ -178,12 +212,16 @@ class MainWindow(QMainWindow):
         """連接信號"""
         # 狀態機信號
         self.state_machine.state_changed.connect(self.on_state_changed)
+        self.state_machine.state_changed.connect(self.frame_pipeline.on_state_changed)
+        self.frame_pipeline.stages_changed.connect(self.on_pipeline_stages_changed)
+        self.font_manager.full_font_loaded.connect(self.on_full_font_loaded)
         self.state_machine.screenshot_requested.connect(self.take_screenshot)
         self.state_machine.llm_analysis_requested.connect(self.start_llm_analysis)
         self.state_machine.caption_display_requested.connect(self.display_caption)
         self.state_machine.spotlight_requested.connect(self.on_spotlight_requested)  # 新增
         self.state_machine.weapon_display_requested.connect(self.display_weapons)
         self.state_machine.reset_requested.connect(self.reset_system)
+        self.state_machine.cycle_cancelled.connect(self.on_cycle_cancelled)
         
         # 相機信號
         self.camera_manager.frame_ready.connect(self.process_frame)
@@ -204,6 +242,7 @@ class MainWindow(QMainWindow):
             self.tts_service.tts_finished.connect(self.on_tts_finished)
             self.tts_service.tts_progress.connect(self.on_tts_progress)  # 新增進度追蹤
             self.tts_service.tts_progress.connect(self.caption_widget.update_tts_progress)  # 連接到字幕進度更新
+            self.tts_service.tts_started.connect(self.caption_widget.start_tts_pacing)  # 朗讀開始後依預估時長推進字幕
             
         # SSR控制器信號
         self.ssr_controller.spotlight_ready.connect(self.on_spotlight_ready)
@@ -223,6 +262,34 @@ class MainWindow(QMainWindow):
         # 啟動狀態機
         self.state_machine.start()
         
+        # 視窗顯示後再預熱字形；完整字型於背景執行緒註冊，不延遲第一個畫面
+        QTimer.singleShot(0, self.warm_up_caption_font)
+        self.font_manager.load_custom_font_async()
+        
+    def get_caption_charset_sources(self):
+        """字幕固定會出現的文字：提示詞、武器名稱與預設字幕"""
+        texts = [info.get('name', '') for info in self.weapon_config.values()]
+        texts += ['緊急防禦協議啟動。', '防禦協議已啟動。',
+                  NO_LLM_CAPTION, FALLBACK_CAPTION, ERROR_CAPTION]
+        
+        if os.path.exists("prompt_config.txt"):
+            try:
+                with open("prompt_config.txt", 'r', encoding='utf-8') as f:
+                    texts.append(f.read())
+            except OSError:
+                pass
+        return texts
+        
+    def warm_up_caption_font(self):
+        """以字幕實際字級預先點陣化常用字形"""
+        charset = self.font_manager.get_caption_charset(self.get_caption_charset_sources())
+        self.font_manager.warm_up_glyphs(self.caption_widget.font, charset)
+        
+    def on_full_font_loaded(self, family):
+        """完整字型已於背景註冊：加入字幕字型作為缺字備援"""
+        self.caption_widget.set_caption_font(
+            self.font_manager.get_caption_font(self.caption_widget.font.pointSize()))
+        
     def process_frame(self, frame):
         """處理相機畫面"""
         self.frame_count += 1
@@ -232,8 +299,9 @@ class MainWindow(QMainWindow):
             self.first_frame_received = True
             self.loading_label.hide()
         
-        # 從 1920x1080 裁切出中間的 1080x1920 區域
-        cropped_frame = self.crop_frame_to_portrait(frame)
+        # 相機畫面被遮住的狀態：不裁切、不上傳、不偵測
+        if self.frame_pipeline.is_idle():
+            return
         
         # 根據 mini mode 進行縮放
         if self.startup_params.get('mini_mode', False):
@@ -243,122 +311,106 @@ class MainWindow(QMainWindow):
             target_width = 1080
             target_height = 1920
         
+        if self.frame_pipeline.is_enabled('render'):
+            self.render_frame(frame, target_width, target_height)
+        
+        # 省電模式：沒有動靜時略過人臉偵測；一有動靜立即恢復全速並偵測這一幀
+        if self.idle_mode:
+            if not self.motion_gate.update(frame):
+                return
+            self.set_idle_mode(False)
+        
+        if not self.frame_pipeline.is_enabled('detect'):
+            return
+        
+        # 人臉偵測與追蹤
+        self.face_detector.process_frame(frame)
+        current_state = self.state_machine.current_state
+        self.update_idle_mode(current_state)
+        
+        # 一次換算所有追蹤框到顯示座標，只保留顯示範圍內的人臉（停留最久者在前）
+        boxes = self.face_detector.track_boxes.view()
+        display_boxes = self.display_transform.apply(boxes, frame.shape, target_width, target_height)
+        track_ids = [box.track_id for box in display_boxes]
+        
+        self.last_detection_bbox = display_boxes[0].copy() if display_boxes else None
+        
+        # 為主要人臉畫面評分（須在更新狀態機前加入，觸發截圖時才包含這一幀）
+        if display_boxes and current_state == SystemState.DETECTING:
+            self.frame_selector.add(frame, boxes[self.display_transform.source_index[0]], time.monotonic())
+        
+        # 只在 DETECTING 與 LLM_LOADING 狀態更新狀態機（停留時間依身分計算）
+        if current_state in [SystemState.DETECTING, SystemState.LLM_LOADING]:
+            self.state_machine.update_face_tracks(track_ids)
+        
+        # 更新偵測框動畫（框向上偏移約框高度的20%，不超出畫面頂端）
+        if display_boxes and self.frame_pipeline.is_enabled('overlay'):
+            face_rects = self.display_transform.overlay_rects(display_boxes)
+            self.detection_overlay.update_faces(face_rects, track_ids)
+        else:
+            self.detection_overlay.clear_detections()
+                
+    def render_frame(self, frame, target_width, target_height):
+        """裁切、縮放並顯示相機畫面"""
+        # 從 16:9 畫面裁切出中間的直式區域
+        cropped_frame = self.crop_frame_to_portrait(frame)
+        
         # 縮放到目標尺寸
         if cropped_frame.shape[1] != target_width or cropped_frame.shape[0] != target_height:
             cropped_frame = cv2.resize(cropped_frame, (target_width, target_height), 
                                      interpolation=cv2.INTER_LINEAR)
         
-        # 在幀上繪製檢測框
-        final_frame = self.detection_overlay.draw_on_frame(cropped_frame)
+        # 相機畫面不再修改（檢測框由 detection_overlay 圖層繪製），以唯讀方式共用
+        cropped_frame.flags.writeable = False
         
         # 顯示畫面
-        qimage = CameraManager.frame_to_qimage(final_frame)
+        qimage = CameraManager.frame_to_qimage(cropped_frame)
         pixmap = QPixmap.fromImage(qimage)
         self.camera_label.setPixmap(pixmap)
         
-        # 人臉偵測
-        detection_result = self.face_detector.process_frame(frame)
-        current_state = self.state_machine.current_state
-        
-        if detection_result:
-            # 調整偵測結果座標
-            adjusted_bbox = self.adjust_detection_coordinates(detection_result, frame.shape, target_width, target_height)
-            if adjusted_bbox:
-                self.last_detection_bbox = adjusted_bbox
-                
-                # 只在 DETECTING 狀態更新狀態機
-                if current_state == SystemState.DETECTING:
-                    self.state_machine.update_face_detection(True)
-                
-                # 更新偵測框動畫
-                if current_state not in [SystemState.CAPTION, SystemState.SPOTLIGHT, SystemState.IMG_SHOW]:
-                    # 將檢測框向上偏移一點（約框高度的20%）
-                    frame_offset_y = int(adjusted_bbox['height'] * 0.2)
-                    adjusted_y = int(adjusted_bbox['y']) - frame_offset_y
-                    
-                    # 確保Y座標不會超出畫面邊界
-                    adjusted_y = max(0, adjusted_y)
-                    
-                    face_rect = (int(adjusted_bbox['x']), adjusted_y, 
-                               int(adjusted_bbox['width']), int(adjusted_bbox['height']))
-                    self.detection_overlay.update_faces([face_rect])
-                else:
-                    self.detection_overlay.clear_detections()
-            else:
-                self.last_detection_bbox = None
-                if current_state == SystemState.DETECTING:
-                    self.state_machine.update_face_detection(False)
-                self.detection_overlay.clear_detections()
-        else:
-            self.last_detection_bbox = None
-            if current_state == SystemState.DETECTING:
-                self.state_machine.update_face_detection(False)
+    def on_pipeline_stages_changed(self, changed):
+        """畫面處理階段切換"""
+        if changed.get('overlay') is False:
             self.detection_overlay.clear_detections()
-                
+        if changed.get('detect') is True:
+            # 停止偵測期間的追蹤與光流已過時，重新開始
+            self.face_detector.reset()
+            
+    def update_idle_mode(self, current_state):
+        """偵測階段無人臉超過 idle_timeout 秒即進入省電模式"""
+        now = time.monotonic()
+        if self.face_detector.tracks or current_state != SystemState.DETECTING:
+            self.last_activity_time = now
+        elif self.idle_timeout > 0 and now - self.last_activity_time >= self.idle_timeout:
+            self.set_idle_mode(True)
+            
+    def set_idle_mode(self, enabled):
+        """切換省電模式（相機低解析度、低幀率）"""
+        if enabled == self.idle_mode:
+            return
+        self.idle_mode = enabled
+        self.last_activity_time = time.monotonic()
+        self.camera_manager.set_low_power(enabled)
+        if enabled:
+            self.motion_gate.reset()
+            print("進入省電模式：等待畫面變化")
+        else:
+            print("偵測到畫面變化，恢復全速偵測")
+            
     def crop_frame_to_portrait(self, frame):
-        """從 1920x1080 裁切出中間的 1080x1920 區域"""
+        """從 16:9 畫面裁切出中間的直式區域並縮放為 1080x1920"""
         height, width = frame.shape[:2]
         
-        if width != 1920 or height != 1080:
-            frame = cv2.resize(frame, (1920, 1080), interpolation=cv2.INTER_LINEAR)
-            width, height = 1920, 1080
-        
+        # 依原始解析度裁切（省電模式的低解析度畫面不需先放大）
         target_ratio = 9/16
-        current_height = 1080
-        required_width = int(current_height * target_ratio)
-        crop_x = (1920 - required_width) // 2
+        required_width = int(height * target_ratio)
+        crop_x = (width - required_width) // 2
         
-        cropped = frame[0:1080, crop_x:crop_x+required_width]
+        cropped = frame[0:height, crop_x:crop_x+required_width]
         portrait_crop = cv2.resize(cropped, (1080, 1920), interpolation=cv2.INTER_LINEAR)
         
         return portrait_crop
         
-    def adjust_detection_coordinates(self, detection_result, original_shape, display_width, display_height):
-        """調整偵測座標以配合裁切後的顯示"""
-        orig_h, orig_w = original_shape[:2]
-        
-        target_ratio = 9/16
-        required_width = int(orig_h * target_ratio)
-        crop_x = (orig_w - required_width) // 2
-        
-        face_left = detection_result['x']
-        face_right = detection_result['x'] + detection_result['width']
-        
-        if face_right < crop_x or face_left > crop_x + required_width:
-            return None
-            
-        adjusted_x = max(0, detection_result['x'] - crop_x)
-        adjusted_y = detection_result['y']
-        adjusted_width = min(detection_result['width'], required_width - adjusted_x)
-        adjusted_height = detection_result['height']
-        
-        if adjusted_x + adjusted_width <= 0 or adjusted_y + adjusted_height <= 0:
-            return None
-            
-        crop_scale_x = 1080 / required_width
-        crop_scale_y = 1920 / orig_h
-        
-        scaled_x = adjusted_x * crop_scale_x
-        scaled_y = adjusted_y * crop_scale_y
-        scaled_width = adjusted_width * crop_scale_x
-        scaled_height = adjusted_height * crop_scale_y
-        
-        final_scale_x = display_width / 1080
-        final_scale_y = display_height / 1920
-        
-        final_x = scaled_x * final_scale_x
-        final_y = scaled_y * final_scale_y
-        final_width = scaled_width * final_scale_x
-        final_height = scaled_height * final_scale_y
-        
-        return {
-            'x': final_x,
-            'y': final_y,
-            'width': final_width,
-            'height': final_height,
-            'confidence': detection_result.get('confidence', 0)
-        }
-            
     def on_face_detected(self, detected, bbox):
         """處理人臉偵測結果"""
         pass
@@ -372,18 +424,33 @@ class MainWindow(QMainWindow):
         """處理狀態變更"""
         print(f"State changed to: {state.value}")
         
+        if state == SystemState.DETECTING:
+            self.frame_selector.reset()
+        
         # 更新 debug 顯示
         if self.startup_params['debug_mode']:
             self.update_debug_info()
             
     def take_screenshot(self):
-        """擷取畫面"""
-        self.current_screenshot_path = self.camera_manager.take_screenshot()
+        """擷取畫面：使用最近畫面中品質最好的一幀"""
+        best_frame = None
+        best = self.frame_selector.best()
+        if best:
+            best_frame, score, timestamp, parts = best
+            print(f"截圖選用 {time.monotonic() - timestamp:.2f} 秒前的畫面：分數 {score:.2f}"
+                  f"（清晰 {parts['sharpness']:.2f}、大小 {parts['size']:.2f}、"
+                  f"信心 {parts['confidence']:.2f}、正面 {parts['frontal']:.2f}），"
+                  f"評分 {self.frame_selector.get_cost_ms():.2f}ms/幀 × {self.frame_selector.score_count} 幀")
+        self.current_screenshot_path = self.camera_manager.take_screenshot(best_frame)
+        
+        # 週期取消時中止所有排程工作
+        if self.state_machine.cycle_token:
+            self.state_machine.cycle_token.add_callback(self.abort_cycle_work)
         
         if self.current_screenshot_path:
             if self.startup_params['no_llm_mode']:
                 default_response = {
-                    'caption': 'Emergency defense protocol activated.',
+                    'caption': NO_LLM_CAPTION,
                     'caption_tc': '緊急防禦協議啟動。',
                     'weapons': ['01', '02']
                 }
@@ -394,10 +461,18 @@ class MainWindow(QMainWindow):
     def start_llm_analysis(self, image_path):
         """開始 AI 分析"""
         weapon_list = self.config_loader.get_weapon_list()
-        self.ollama_service.analyze_image(image_path, weapon_list)
+        self.ollama_service.analyze_image(image_path, weapon_list, self.state_machine.cycle_token)
         
     def on_llm_complete(self, response):
-        """AI 分析完成"""
+        """AI 分析完成：先在背景完成字幕排版，CAPTION 狀態的第一幀即可直接繪製"""
+        captions = [response.get('caption_tc', ''), response.get('caption', '')]
+        self.caption_widget.prelayout(captions, lambda: self.on_caption_prelayout_ready(response))
+        
+    def on_caption_prelayout_ready(self, response):
+        """字幕排版完成（或逾時）：進入 CAPTION 狀態"""
+        if self.startup_params['debug_mode']:
+            elapsed = self.caption_widget.last_prelayout_ms
+            print("字幕預先排版逾時，於顯示時排版" if elapsed is None else f"字幕預先排版完成 ({elapsed:.1f}ms)")
         self.state_machine.on_llm_complete(response)
         
     def display_caption(self, response):
@@ -413,6 +488,7 @@ class MainWindow(QMainWindow):
         self.caption_completed = False
         self.tts_completed = False  # 修正：初始應為 False
         self.wait_timer_completed = False
+        self.caption_wait_scheduled = False
         
         # 啟動SSR1（字幕燈光）
         print("=== CAPTION STATE: Starting SSR1 (caption lighting) ===")
@@ -447,6 +523,9 @@ class MainWindow(QMainWindow):
         caption_en = response.get('caption', '')
         typing_speed = self.config.get('caption_typing_speed', 50)
         
+        # 記錄新出現的字元，下次啟動納入字幕子集字型
+        self.font_manager.record_caption_chars(caption_tc + caption_en)
+        
         # 儲存武器列表
         self.current_weapons = response.get('weapons', [])
         
@@ -454,20 +533,7 @@ class MainWindow(QMainWindow):
         if caption_tc and caption_en:
             # 雙語模式
             if caption_en and hasattr(self, 'tts_service') and self.tts_service.is_available():
-                # 獲取TTS預估時長
-                tts_duration = self.tts_service.get_estimated_duration(caption_en)
-                
-                # 計算同步速率
-                tts_rate_wpm = 140
-                if hasattr(self.tts_service, 'worker') and self.tts_service.worker and self.tts_service.worker.config:
-                    tts_rate_wpm = self.tts_service.worker.config.get_int('rate', 140)
-                
-                # 啟用同步模式
-                self.caption_widget.enable_tts_sync(caption_en, tts_rate_wpm)
-                
-                print(f"TTS: Starting synchronized caption display")
-                self.tts_completed = False
-                self.tts_service.speak_text(caption_en)
+                self.start_synchronized_caption(caption_en)
             
             self.caption_widget.show_bilingual_caption(caption_tc, caption_en, typing_speed)
         elif caption_tc:
@@ -476,23 +542,52 @@ class MainWindow(QMainWindow):
         elif caption_en:
             # 只有英文
             if hasattr(self, 'tts_service') and self.tts_service.is_available():
-                tts_duration = self.tts_service.get_estimated_duration(caption_en)
-                tts_rate_wpm = 140
-                if hasattr(self.tts_service, 'worker') and self.tts_service.worker and self.tts_service.worker.config:
-                    tts_rate_wpm = self.tts_service.worker.config.get_int('rate', 140)
-                
-                self.caption_widget.enable_tts_sync(caption_en, tts_rate_wpm)
-                
-                print(f"TTS: Starting synchronized caption display")
-                self.tts_completed = False
-                self.tts_service.speak_text(caption_en)
+                self.start_synchronized_caption(caption_en)
             
             self.caption_widget.show_caption(caption_en, typing_speed)
         else:
             # 沒有字幕
             self.caption_completed = True
             self.check_all_completed()
+            return
+        
+        # 一般打字的完成時間在開始時即已確定：等待計時器直接排在完成時間之後
+        # （與 TTS 同步時完成時間取決於朗讀，於打字完成時才排定）
+        completion_time = self.caption_widget.typing_completion_time()
+        if completion_time is not None:
+            self.schedule_caption_wait(completion_time)
     
+    def start_synchronized_caption(self, caption_en):
+        """以時長模型預估的朗讀時間同步字幕並開始朗讀"""
+        # 字幕於朗讀開始後依預估時長推進，TTS 進度事件較快時以進度為準
+        tts_duration = self.tts_service.get_estimated_duration(caption_en)
+        self.caption_widget.enable_tts_sync(caption_en, tts_duration)
+        
+        # 字幕階段時間軸：截圖淡入（預先合成模式於淡入後播放）→ 朗讀 → 等待
+        fade_in = self.config.get('screenshot_fade_in', 1.0) if self.tts_service.uses_presynthesis() else 0.0
+        wait_after = self.config.get('caption_wait_after', 2.0)
+        print(f"TTS: Starting synchronized caption display "
+              f"(預估字幕階段 {fade_in + tts_duration + wait_after:.1f}s = "
+              f"淡入 {fade_in:.1f}s + 朗讀 {tts_duration:.1f}s + 等待 {wait_after:.1f}s)")
+        
+        self.tts_completed = False
+        self.start_caption_speech(caption_en)
+        
+    def start_caption_speech(self, caption_en):
+        """開始朗讀英文字幕"""
+        cycle_token = self.state_machine.cycle_token
+        
+        if not self.tts_service.uses_presynthesis():
+            self.tts_service.speak_text(caption_en, cycle_token)
+            return
+            
+        # 預先合成模式：截圖淡入期間合成音訊，淡入結束後立即播放
+        self.tts_service.prepare_speech(caption_en, cycle_token)
+        fade_in_delay = 0
+        if self.current_screenshot_path:
+            fade_in_delay = self.config.get('screenshot_fade_in', 1.0) * 1000
+        self.schedule_cycle_timer(fade_in_delay, self.tts_service.play_prepared)
+            
     def on_tts_progress(self, current_pos, total_len):
         """TTS進度更新"""
         if self.startup_params['debug_mode']:
@@ -512,9 +607,19 @@ class MainWindow(QMainWindow):
         print("All caption typing complete")
         self.caption_completed = True
         
-        # 啟動等待計時器
-        wait_time = self.config.get('caption_wait_after', 2.0) * 1000
-        QTimer.singleShot(int(wait_time), self.on_wait_timer_complete)
+        # 啟動等待計時器（一般打字已於字幕開始時排定）
+        self.schedule_caption_wait()
+        
+    def schedule_caption_wait(self, typing_completion_time=None):
+        """排定字幕後的等待計時器：於打字完成時間（單調時鐘，未提供時為現在）之後 caption_wait_after 秒觸發"""
+        if self.caption_wait_scheduled:
+            return
+        self.caption_wait_scheduled = True
+        
+        delay = self.config.get('caption_wait_after', 2.0)
+        if typing_completion_time is not None:
+            delay += max(0.0, typing_completion_time - time.monotonic())
+        self.schedule_cycle_timer(delay * 1000, self.on_wait_timer_complete)
         
     def on_tts_finished(self):
         """TTS朗讀完成"""
@@ -621,7 +726,7 @@ class MainWindow(QMainWindow):
         else:
             total_time = 2000
             
-        QTimer.singleShot(int(total_time), self.display_next_weapon)
+        self.schedule_cycle_timer(total_time, self.display_next_weapon)
         
     def show_weapon_image(self, weapon_info):
         """顯示武器圖片"""
@@ -650,8 +755,8 @@ class MainWindow(QMainWindow):
             display_time = weapon_info.get('image_display', 3.0) * 1000
             fade_out_time = weapon_info.get('image_fade_out', 1.0) * 1000
             
-            QTimer.singleShot(int(display_time), 
-                            lambda: self.fade_out_weapon_with_black_transition(int(fade_out_time)))
+            self.schedule_cycle_timer(display_time,
+                                      lambda: self.fade_out_weapon_with_black_transition(int(fade_out_time)))
         else:
             print(f"Error: Weapon image file not found - {image_path}")
         
@@ -689,6 +794,42 @@ class MainWindow(QMainWindow):
         self.fade_out_animation.finished.connect(self.weapon_label.hide)
         self.fade_out_animation.start()
                             
+    def schedule_cycle_timer(self, delay_ms, callback):
+        """排程本週期的單次計時器，週期取消時會被停止"""
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.timeout.connect(callback)
+        timer.timeout.connect(lambda: self._release_cycle_timer(timer))
+        self.cycle_timers.append(timer)
+        timer.start(int(delay_ms))
+        return timer
+        
+    def _release_cycle_timer(self, timer):
+        """移除已觸發的計時器"""
+        if timer in self.cycle_timers:
+            self.cycle_timers.remove(timer)
+        timer.deleteLater()
+        
+    def abort_cycle_work(self):
+        """中止本週期所有待處理的計時器、動畫與 Arduino 指令"""
+        for timer in self.cycle_timers:
+            timer.stop()
+            timer.deleteLater()
+        self.cycle_timers = []
+        
+        for name in ('fade_animation', 'fade_out_animation'):
+            animation = getattr(self, name, None)
+            if animation:
+                animation.stop()
+        
+        if self.arduino_controller:
+            self.arduino_controller.cancel_pending()
+            
+    def on_cycle_cancelled(self, reason):
+        """週期被取消，立即清除畫面並返回偵測"""
+        print(f"=== CYCLE CANCELLED ({reason}): returning to detection ===")
+        self.reset_system()
+        
     def reset_system(self):
         """重置系統"""
         # 隱藏所有顯示元件
@@ -712,6 +853,7 @@ class MainWindow(QMainWindow):
         self.caption_completed = False
         self.tts_completed = True
         self.wait_timer_completed = False
+        self.caption_wait_scheduled = False
         self.caption_displayed = False  # 重置防重複標記
         
         # 確保所有SSR關閉
@@ -807,6 +949,7 @@ Detection Time: {detection_time:.1f}s
 Arduino: {arduino_status}
 SSR: {ssr_status}
 LLM Mode: {llm_mode}
+Power: {"Idle" if self.idle_mode else "Active"}
 Display: {mode}
 Weapons: {weapons_display}
 Window: {self.window_width}x{self.window_height}
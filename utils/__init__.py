@@ -4,11 +4,12 @@
 from .config_loader import ConfigLoader
 from .font_manager import FontManager
 from .tts_config_loader import TTSConfigLoader
-from .anim_config_loader import AnimConfigLoader
+from .anim_config_loader import AnimConfigLoader, AnimParams
 
 __all__ = [
     'ConfigLoader',
     'FontManager',
     'TTSConfigLoader',
-    'AnimConfigLoader'
+    'AnimConfigLoader',
+    'AnimParams'
 ]
\ No newline at end of file
@@ -6,12 +6,77 @@ import csv
 from typing import Dict, Any, Union
 
 
+# 平滑係數以每 1/60 秒套用一次為基準
+SMOOTH_REFERENCE_RATE = 60.0
+
+
+def smooth_factor(smooth, dt):
+    """將每 1/60 秒的平滑係數換算為時間步長 dt 的係數"""
+    smooth = min(max(smooth, 0.0), 1.0)
+    return 1.0 - (1.0 - smooth) ** (dt * SMOOTH_REFERENCE_RATE)
+
+
+class AnimParams:
+    """編譯後的動畫參數（唯讀）
+
+    載入或重新載入設定時建立一次，所有檢測框共用；
+    每幀的更新與繪製只讀取一般屬性，不再查詢字典或轉換型別。
+    """
+
+    __slots__ = (
+        'frame_size_multiplier', 'tick_rate', 'fixed_dt',
+        'state1_end', 'state2_end', 'state3_end', 'total_duration',
+        'position_step', 'outside_step', 'inner_step', 'cross_start_step', 'cross_end_step',
+        'corner_length_ratio', 'corner_thickness',
+        'inner_alpha', 'inner_size_ratio',
+        'cross_length_ratio_h', 'cross_length_ratio_w', 'cross_thickness',
+        'color', 'flicker_probability'
+    )
+
+    def __init__(self, loader):
+        values = {
+            'frame_size_multiplier': loader.get_float('BASIC', 'frame_size_multiplier', 1.5),
+            'tick_rate': max(1.0, loader.get_float('BASIC', 'tick_rate', 60)),
+            'corner_length_ratio': loader.get_float('STATE1', 'corner_length_ratio', 0.07),
+            'corner_thickness': loader.get_int('STATE1', 'line_thickness', 1),
+            'inner_alpha': loader.get_float('STATE2', 'inner_alpha', 50) / 255.0,
+            'inner_size_ratio': loader.get_float('STATE2', 'inner_size_ratio', 0.9),
+            'cross_length_ratio_h': loader.get_float('STATE3', 'cross_length_ratio_h', 0.59),
+            'cross_length_ratio_w': loader.get_float('STATE3', 'cross_length_ratio_w', 0.55),
+            'cross_thickness': loader.get_int('STATE4', 'line_thickness', 2),
+            'color': loader.get_color_bgr(),
+            'flicker_probability': loader.get_float('VISUAL', 'flicker_probability', 0.2)
+        }
+
+        # 各狀態結束時間（秒）
+        values['state1_end'] = loader.get_float('BASIC', 'state1_duration', 1.0)
+        values['state2_end'] = values['state1_end'] + loader.get_float('BASIC', 'state2_duration', 1.0)
+        values['state3_end'] = values['state2_end'] + loader.get_float('BASIC', 'state3_duration', 1.0)
+        values['total_duration'] = values['state3_end'] + loader.get_float('BASIC', 'state4_duration', 1.0)
+
+        # 平滑係數預先換算為每一個固定步長的係數
+        dt = 1.0 / values['tick_rate']
+        values['fixed_dt'] = dt
+        values['position_step'] = smooth_factor(loader.get_float('BASIC', 'position_smooth', 0.08), dt)
+        values['outside_step'] = smooth_factor(loader.get_float('STATE1', 'outside_smooth', 0.12), dt)
+        values['inner_step'] = smooth_factor(loader.get_float('STATE2', 'inner_smooth', 0.1), dt)
+        values['cross_start_step'] = smooth_factor(loader.get_float('STATE3', 'cross_start_smooth', 0.08), dt)
+        values['cross_end_step'] = smooth_factor(loader.get_float('STATE4', 'cross_end_smooth', 0.12), dt)
+
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("動畫參數為唯讀，請以 reload_config 重新載入")
+
+
 class AnimConfigLoader:
     """動畫配置文件加載器 - 用於讀取 anim_config.csv"""
     
     def __init__(self, config_file='anim_config.csv'):
         self.config_file = config_file
         self.config = {}
+        self.params = None  # 編譯後的 AnimParams（載入時整體替換）
         self.load_config()
     
     def load_config(self):
@@ -61,6 +126,7 @@ class AnimConfigLoader:
                 config_dict[section][key] = self._parse_value(value)
             
             self.config = config_dict
+            self.params = AnimParams(self)
             print(f"動畫配置已加載，共 {len(self.config)} 個區段")
             
             # 顯示關鍵配置
@@ -100,7 +166,7 @@ class AnimConfigLoader:
             print("  基本設定:")
             basic = self.config['BASIC']
             for key in ['position_smooth', 'state1_duration', 'state2_duration', 
-                       'state3_duration', 'state4_duration', 'frame_size_multiplier']:
+                       'state3_duration', 'state4_duration', 'frame_size_multiplier', 'tick_rate']:
                 if key in basic:
                     print(f"    {key}: {basic[key]}")
         
@@ -117,11 +183,12 @@ class AnimConfigLoader:
         self.config = {
             'BASIC': {
                 'position_smooth': 0.08,
-                'state1_duration': 60,
-                'state2_duration': 60,
-                'state3_duration': 60,
-                'state4_duration': 60,
-                'frame_size_multiplier': 1.5
+                'state1_duration': 1.0,
+                'state2_duration': 1.0,
+                'state3_duration': 1.0,
+                'state4_duration': 1.0,
+                'frame_size_multiplier': 1.5,
+                'tick_rate': 60
             },
             'STATE1': {
                 'outside_smooth': 0.12,
@@ -165,6 +232,7 @@ class AnimConfigLoader:
                 'flicker_probability': 0.2
             }
         }
+        self.params = AnimParams(self)
         print("使用動畫默認配置")
     
     def get(self, section: str, key: str, default: Any = None) -> Any:
@@ -226,11 +294,15 @@ class AnimConfigLoader:
         if not (0.5 <= frame_multiplier <= 5.0):
             errors['frame_size_multiplier'] = f"框放大倍數必須在0.5-5.0之間，當前值: {frame_multiplier}"
         
-        # 檢查持續時間
+        # 檢查持續時間（秒）
         for state in ['state1_duration', 'state2_duration', 'state3_duration', 'state4_duration']:
-            duration = basic.get(state, 60)
-            if not (1 <= duration <= 1000):
-                errors[state] = f"{state}必須在1-1000之間，當前值: {duration}"
+            duration = basic.get(state, 1.0)
+            if not (0.0 < duration <= 60.0):
+                errors[state] = f"{state}必須在0-60秒之間，當前值: {duration}"
+        
+        tick_rate = basic.get('tick_rate', 60)
+        if not (10 <= tick_rate <= 240):
+            errors['tick_rate'] = f"動畫步進頻率必須在10-240之間，當前值: {tick_rate}"
         
         # 檢查視覺設定
         visual = self.get_section('VISUAL')
@@ -246,13 +318,12 @@ class AnimConfigLoader:
         
         return errors
     
-    def get_total_duration(self) -> int:
-        """獲取總動畫持續時間"""
-        basic = self.get_section('BASIC')
-        return (basic.get('state1_duration', 60) + 
-                basic.get('state2_duration', 60) + 
-                basic.get('state3_duration', 60) + 
-                basic.get('state4_duration', 60))
+    def get_total_duration(self) -> float:
+        """獲取總動畫持續時間（秒）"""
+        return (self.get_float('BASIC', 'state1_duration', 1.0) + 
+                self.get_float('BASIC', 'state2_duration', 1.0) + 
+                self.get_float('BASIC', 'state3_duration', 1.0) + 
+                self.get_float('BASIC', 'state4_duration', 1.0))
     
     def get_color_bgr(self) -> tuple:
         """獲取BGR格式的顏色 (OpenCV格式)"""
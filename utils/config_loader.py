@@ -27,7 +27,12 @@ class ConfigLoader(QObject):
                 reader = csv.DictReader(f)
                 for row in reader:
                     param_name = row['參數名稱']
-                    default_value = float(row['預設值'])
+                    
+                    # 數值設定轉為浮點數，其餘（如偵測後端名稱）保留字串
+                    try:
+                        default_value = float(row['預設值'])
+                    except ValueError:
+                        default_value = row['預設值'].strip()
                     self.period_config[param_name] = default_value
                     
             print(f"載入時間設定: {len(self.period_config)} 項")
@@ -120,11 +125,22 @@ class ConfigLoader(QObject):
             'detection_sensitivity': 0.75,
             'detect_duration': 3.0,
             'detect_area_ratio': 0.8,
+            'track_max_age': 0.5,
+            'detect_keyframe_interval': 3,
+            'detector_backend': 'mediapipe_short',
+            'detector_process': 0,
+            'detector_cpu_affinity': '',
+            'idle_timeout': 30.0,
+            'idle_capture_width': 640,
+            'idle_capture_fps': 10,
+            'idle_motion_ratio': 0.01,
             'detect_anim_stage1_duration': 0.5,
             'detect_anim_stage2_duration': 0.5,
             'detect_anim_stage3_duration': 0.2,
             'detect_anim_stage4_duration': 0.3,
             'llm_response_timeout': 10.0,
+            'abort_absence_time': 3.0,
+            'screenshot_best_window': 1.0,
             'screenshot_fade_in': 1.0,
             'screenshot_display': 5.0,
             'screenshot_fade_out': 1.0,
@@ -1,40 +1,299 @@
 # Location: project_v2/utils/font_manager.py
-# Usage: 字型管理器，處理中文字型載入
+# Usage: 字型管理器，處理中文字型載入、字幕用子集字型快取與字形預熱
 
 import os
-from PyQt6.QtGui import QFont, QFontDatabase
-from PyQt6.QtCore import QObject
+import time
+import hashlib
+import threading
+from PyQt6.QtGui import QFont, QFontDatabase, QImage, QPainter, QColor
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+
+try:
+    from fontTools import subset as font_subset
+    FONTTOOLS_AVAILABLE = True
+except ImportError:
+    FONTTOOLS_AVAILABLE = False
+
+
+# 字幕常用的標點與符號（子集一定包含）
+CAPTION_BASE_CHARS = (
+    ''.join(chr(code) for code in range(0x20, 0x7F)) +
+    '，。、！？：；「」『』（）《》〈〉…—～·'
+)
 
 
 class FontManager(QObject):
-    """字型管理器"""
-    
-    def __init__(self):
+    """字型管理器
+
+    每個字型檔在整個程式中只註冊一次。字幕使用的字元會整理為子集字型並快取於磁碟，
+    下次啟動先載入小型子集，完整字型於背景執行緒註冊後作為缺字時的備援。
+    """
+
+    full_font_loaded = pyqtSignal(str)  # 完整字型於背景註冊完成（家族名稱）
+
+    FONT_PATH = os.path.join("fonts", "NotoSansCJKtc-Regular.otf")
+    CACHE_DIR = os.path.join("fonts", "cache")
+    SUBSET_FAMILY = "Noto Sans CJK TC Caption"
+
+    _shared = None
+    _registered = {}  # 字型檔路徑 -> (家族名稱, 註冊耗時秒數)
+    _lock = threading.Lock()
+    _register_lock = threading.Lock()
+
+    def __init__(self, load_full_font=True):
         super().__init__()
         self.font_loaded = False
         self.font_family = None
-        self.load_custom_font()
-        
+        self.subset_family = None
+        self.subset_path = None  # 已載入的子集字型檔
+        self.full_font_thread = None
+        self.stats = {}
+        self.charset_path = os.path.join(self.CACHE_DIR, "caption_charset.txt")
+
+        if load_full_font:
+            self.load_custom_font()
+
+    @classmethod
+    def instance(cls):
+        """全程式共用的字型管理器（完整字型延後載入）"""
+        if cls._shared is None:
+            cls._shared = cls(load_full_font=False)
+        return cls._shared
+
     def load_custom_font(self):
         """載入自訂字型"""
-        font_path = os.path.join("fonts", "NotoSansCJKtc-Regular.otf")
-        
+        font_path = self.FONT_PATH
+
         if os.path.exists(font_path):
-            font_id = QFontDatabase.addApplicationFont(font_path)
-            
-            if font_id != -1:
-                families = QFontDatabase.applicationFontFamilies(font_id)
-                if families:
-                    self.font_family = families[0]
-                    self.font_loaded = True
-                    print(f"成功載入字型: {self.font_family}")
-                else:
-                    print("無法取得字型家族名稱")
+            already_loaded = font_path in self._registered
+            family, elapsed = self._register_font(font_path)
+
+            if family:
+                self.font_family = family
+                self.font_loaded = True
+                self.stats['full_font_ms'] = elapsed * 1000
+                if not already_loaded:
+                    print(f"成功載入字型: {self.font_family} ({elapsed * 1000:.0f}ms)")
+                    self._report_savings()
             else:
                 print(f"載入字型失敗: {font_path}")
         else:
             print(f"找不到字型檔案: {font_path}")
-            
+
+    def load_custom_font_async(self):
+        """在背景執行緒註冊完整字型（數 MB 的 CJK 字型，不佔用介面執行緒），完成後發出 full_font_loaded"""
+        if self.font_loaded or self.full_font_thread is not None:
+            return
+        self.full_font_thread = threading.Thread(target=self._load_custom_font_background, daemon=True)
+        self.full_font_thread.start()
+
+    def _load_custom_font_background(self):
+        """背景執行緒：註冊完整字型（QFontDatabase.addApplicationFont 可跨執行緒呼叫）"""
+        self.load_custom_font()
+        if self.font_family:
+            self.full_font_loaded.emit(self.font_family)
+
+    def _register_font(self, font_path):
+        """註冊字型檔（已註冊過則直接回傳結果）"""
+        with self._register_lock:
+            return self._register_font_locked(font_path)
+
+    def _register_font_locked(self, font_path):
+        cached = self._registered.get(font_path)
+        if cached:
+            return cached
+
+        start_time = time.perf_counter()
+        font_id = QFontDatabase.addApplicationFont(font_path)
+        elapsed = time.perf_counter() - start_time
+
+        family = None
+        if font_id != -1:
+            families = QFontDatabase.applicationFontFamilies(font_id)
+            if families:
+                family = families[0]
+            else:
+                print("無法取得字型家族名稱")
+
+        if family:
+            self._registered[font_path] = (family, elapsed)
+        return family, elapsed
+
+    def prepare_caption_font(self, texts):
+        """載入字幕用子集字型；字元有變動時先沿用最新的既有子集，並於背景重新產生
+
+        texts: 固定會出現的文字（提示詞、武器名稱、預設字幕）
+        """
+        charset = self._collect_charset(texts)
+        subset_path = self._subset_path(charset)
+        if not subset_path:
+            return False
+
+        if os.path.exists(subset_path):
+            loaded = self._load_subset(subset_path, len(charset))
+            self._prune_subsets(keep=(subset_path,))
+            if loaded:
+                return True
+
+        # 字元集已變動（例如字幕出現新字）：先載入最新的既有子集，
+        # 缺少的字由完整字型補上，不必等到子集重新產生
+        fallback = self._newest_subset()
+        if fallback:
+            self._load_subset(fallback, None)
+
+        if FONTTOOLS_AVAILABLE:
+            # 子集產生需數秒，在背景執行，下次啟動即可使用
+            threading.Thread(target=self._build_subset, args=(charset, subset_path),
+                             daemon=True).start()
+        return bool(self.subset_family)
+
+    def _load_subset(self, subset_path, char_count):
+        """註冊子集字型"""
+        family, elapsed = self._register_font(subset_path)
+        if not family:
+            return False
+        self.subset_family = family
+        self.subset_path = subset_path
+        self.stats['subset_ms'] = elapsed * 1000
+        if char_count is not None:
+            self.stats['subset_chars'] = char_count
+            print(f"載入字幕子集字型: {char_count} 字 ({elapsed * 1000:.0f}ms)")
+        else:
+            print(f"載入先前的字幕子集字型（重新產生中）: {os.path.basename(subset_path)} ({elapsed * 1000:.0f}ms)")
+        return True
+
+    def _newest_subset(self):
+        """快取中最新的子集字型檔；沒有時為 None"""
+        if not os.path.isdir(self.CACHE_DIR):
+            return None
+        paths = [os.path.join(self.CACHE_DIR, filename) for filename in os.listdir(self.CACHE_DIR)
+                 if filename.startswith('caption-') and filename.endswith('.otf')]
+        return max(paths, key=os.path.getmtime) if paths else None
+
+    def _prune_subsets(self, keep):
+        """刪除過時的子集字型（保留 keep 與目前已載入的檔案）"""
+        if not os.path.isdir(self.CACHE_DIR):
+            return
+        keep = set(keep) | {self.subset_path}
+        for filename in os.listdir(self.CACHE_DIR):
+            path = os.path.join(self.CACHE_DIR, filename)
+            if filename.startswith('caption-') and path not in keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass  # 其他程式仍在使用，下次啟動再刪除
+
+    def _collect_charset(self, texts):
+        """整理子集字元：基本符號、固定文字與歷次字幕出現過的字元"""
+        chars = set(CAPTION_BASE_CHARS)
+        for text in texts:
+            chars.update(text or '')
+
+        if os.path.exists(self.charset_path):
+            try:
+                with open(self.charset_path, 'r', encoding='utf-8') as f:
+                    chars.update(f.read())
+            except OSError:
+                pass
+
+        chars.discard('\n')
+        chars.discard('\r')
+        return ''.join(sorted(chars))
+
+    def _subset_path(self, charset):
+        """子集快取檔路徑（依完整字型版本與字元集命名）"""
+        if not os.path.exists(self.FONT_PATH):
+            return None
+        stat = os.stat(self.FONT_PATH)
+        digest = hashlib.sha1(
+            f"{stat.st_size}:{stat.st_mtime_ns}:{charset}".encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.CACHE_DIR, f"caption-{digest}.otf")
+
+    def _build_subset(self, charset, subset_path):
+        """以 fontTools 產生子集字型，並改名以免與完整字型衝突"""
+        try:
+            start_time = time.perf_counter()
+            os.makedirs(self.CACHE_DIR, exist_ok=True)
+
+            options = font_subset.Options()
+            options.name_IDs = ['*']
+            options.layout_features = ['*']
+            font = font_subset.load_font(self.FONT_PATH, options)
+            subsetter = font_subset.Subsetter(options)
+            subsetter.populate(text=charset)
+            subsetter.subset(font)
+
+            for record in font['name'].names:
+                if record.nameID in (1, 4, 16):
+                    record.string = self.SUBSET_FAMILY
+                elif record.nameID == 6:
+                    record.string = self.SUBSET_FAMILY.replace(' ', '')
+
+            temp_path = subset_path + '.tmp'
+            font_subset.save_font(font, temp_path, options)
+            os.replace(temp_path, subset_path)
+
+            # 移除舊的子集（本次執行已載入的先保留，下次啟動時刪除）
+            self._prune_subsets(keep=(subset_path,))
+
+            size_kb = os.path.getsize(subset_path) / 1024
+            print(f"字幕子集字型已產生: {len(charset)} 字，{size_kb:.0f} KB "
+                  f"({time.perf_counter() - start_time:.1f}s)，下次啟動生效")
+        except Exception as e:
+            print(f"字幕子集字型產生失敗: {e}")
+
+    def record_caption_chars(self, text):
+        """記錄字幕出現的新字元，下次啟動納入子集"""
+        if not text:
+            return
+
+        with self._lock:
+            known = set()
+            if os.path.exists(self.charset_path):
+                try:
+                    with open(self.charset_path, 'r', encoding='utf-8') as f:
+                        known = set(f.read())
+                except OSError:
+                    return
+
+            new_chars = set(text) - known - set(CAPTION_BASE_CHARS) - {'\n', '\r'}
+            if not new_chars:
+                return
+
+            try:
+                os.makedirs(self.CACHE_DIR, exist_ok=True)
+                with open(self.charset_path, 'a', encoding='utf-8') as f:
+                    f.write(''.join(sorted(new_chars)))
+            except OSError as e:
+                print(f"字幕字元記錄失敗: {e}")
+
+    def warm_up_glyphs(self, font, chars):
+        """在離屏影像上繪製字元，預先點陣化字形，避免第一次顯示字幕時卡頓"""
+        if not chars:
+            return 0.0
+
+        start_time = time.perf_counter()
+        image = QImage(2048, 256, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(Qt.GlobalColor.transparent)
+
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setFont(font)
+        painter.setPen(QColor(255, 255, 255))
+        for index in range(0, len(chars), 64):
+            painter.drawText(0, 128, chars[index:index + 64])
+        painter.end()
+
+        elapsed = (time.perf_counter() - start_time) * 1000
+        self.stats['warm_up_ms'] = elapsed
+        self.stats['warm_up_chars'] = len(chars)
+        print(f"字形預熱: {len(chars)} 字，{font.pointSize()}pt ({elapsed:.0f}ms)")
+        return elapsed
+
+    def get_caption_charset(self, texts=()):
+        """字幕子集包含的字元"""
+        return self._collect_charset(texts)
+
     def get_font(self, size=12, bold=False):
         """取得字型"""
         if self.font_loaded and self.font_family:
@@ -43,16 +302,37 @@ class FontManager(QObject):
             # 使用系統預設字型
             font = QFont()
             font.setFamily(self._get_system_font())
-            
+
         font.setPointSize(size)
         font.setBold(bold)
-        
+
+        return font
+
+    def get_caption_font(self, size):
+        """取得字幕字型：優先使用子集，缺字時由完整字型補上
+
+        完整字型尚未註冊完成時只有子集（其餘由系統字型補上）；
+        完整字型載入後（full_font_loaded）需重新取得字型。
+        """
+        families = [family for family in (self.subset_family, self.font_family) if family]
+        if not families:
+            families.append(self._get_system_font())
+
+        font = QFont(families[0], size)
+        font.setFamilies(families)
         return font
-        
+
+    def _report_savings(self):
+        """回報子集字型與預熱節省的時間"""
+        if 'subset_ms' in self.stats and 'full_font_ms' in self.stats:
+            saved = self.stats['full_font_ms'] - self.stats['subset_ms']
+            print(f"字型: 子集 {self.stats['subset_ms']:.0f}ms，完整字型延後載入 "
+                  f"{self.stats['full_font_ms']:.0f}ms，啟動節省 {saved:.0f}ms")
+
     def _get_system_font(self):
         """取得系統預設中文字型"""
         import platform
-        
+
         system = platform.system()
         if system == "Darwin":  # macOS
             return "PingFang TC"
@@ -60,14 +340,14 @@ class FontManager(QObject):
             return "Microsoft YaHei"
         else:  # Linux
             return "Noto Sans CJK TC"
-            
+
     def get_available_fonts(self):
         """取得可用的中文字型列表"""
         chinese_fonts = []
-        
+
         for family in QFontDatabase.families():
             # 檢查是否支援中文
             if any(char in family.lower() for char in ['chinese', 'cjk', 'tc', 'sc', '中文', '黑體', '宋體']):
                 chinese_fonts.append(family)
-                
-        return chinese_fonts
\ No newline at end of file
+
+        return chinese_fonts
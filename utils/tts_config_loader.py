@@ -118,6 +118,9 @@ class TTSConfigLoader:
             'queue_timeout': 1.0,
             'text_processing_delay': 100,
             'error_retry_count': 2,
+            'loop_interval_ms': 10,
+            'render_timeout': 15.0,
+            'speak_timeout_margin': 5.0,
             
             # 同步設定
             'synchronous_speech': True,
@@ -136,8 +139,21 @@ class TTSConfigLoader:
             
             # 高級設定
             'engine_priority': 'sapi5',
+            'synthesis_backend': 'engine',
+            'espeak_voice': 'en-us',
+            'piper_model_path': '',
+            'piper_length_scale': 1.0,
             'buffer_size': 200,
-            'preload_next_sentence': True
+            'preload_next_sentence': True,
+            'presynthesis_mode': True,
+            'presynthesis_min_pause_ms': 120,
+            'stream_lookahead': 2,
+            'audio_cache_enabled': True,
+            'audio_cache_dir': 'tts_cache',
+            'audio_cache_max_mb': 50,
+            'duration_model_enabled': True,
+            'duration_model_file': 'tts_duration_model.json',
+            'duration_model_prior_weight': 1.0
         }
         print("使用TTS默認配置")
     
@@ -286,6 +302,9 @@ class TTSConfigLoader:
             'queue_timeout': self.get_float('queue_timeout', 1.0),
             'text_processing_delay': self.get_int('text_processing_delay', 100),
             'error_retry_count': self.get_int('error_retry_count', 2),
+            'loop_interval_ms': self.get_int('loop_interval_ms', 10),
+            'render_timeout': self.get_float('render_timeout', 15.0),
+            'speak_timeout_margin': self.get_float('speak_timeout_margin', 5.0),
             'buffer_size': self.get_int('buffer_size', 200),
             'preload_next_sentence': self.get_bool('preload_next_sentence', True)
         }
\ No newline at end of file